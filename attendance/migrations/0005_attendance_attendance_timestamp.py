@@ -0,0 +1,18 @@
+# Generated by Django 5.0.5 on 2026-10-19 04:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("attendance", "0004_shift_alter_attendance_options_dailyattendancerecord"),
+        ("core", "0027_alter_userdetails_profile_picture_storage"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="attendance",
+            index=models.Index(fields=["timestamp"], name="attendance_timestamp"),
+        ),
+    ]
@@ -33,6 +33,9 @@ class Attendance(models.Model):
 
     class Meta:
         verbose_name_plural = "Attendances"
+        indexes = [
+            models.Index(fields=["timestamp"], name="attendance_timestamp"),
+        ]
 
     def __str__(self):
         return f"{self.user_id_from_device} - {self.punch} - {self.timestamp}"
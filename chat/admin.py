@@ -1,6 +1,20 @@
 from django.contrib import admin
 
-from chat.models import Message
+from chat.models import (
+    Channel,
+    ChannelMember,
+    ChannelMessage,
+    Conversation,
+    ConversationParticipant,
+    Message,
+    ReadWatermark,
+)
 
 # Register your models here.
+admin.site.register(Conversation)
+admin.site.register(ConversationParticipant)
 admin.site.register(Message)
+admin.site.register(ReadWatermark)
+admin.site.register(Channel)
+admin.site.register(ChannelMember)
+admin.site.register(ChannelMessage)
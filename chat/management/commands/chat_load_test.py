@@ -0,0 +1,250 @@
+import asyncio
+import contextvars
+import math
+import random
+import re
+import time
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient
+from django.urls import reverse
+
+from chat.management.commands.seed_chat_data import FIRST_NAMES, MESSAGE_WORDS
+from chat.models import ConversationParticipant
+
+# Relative frequency of each endpoint in a virtual user's session; an open
+# chat window mostly polls for new messages.
+ENDPOINT_MIX = {
+    "get_updated_messages": 60,
+    "select_chat_users": 15,
+    "search_chat_users": 15,
+    "send_chat_message": 10,
+}
+
+HTMX_HEADERS = {"HX-Request": "true"}
+
+MESSAGE_ID_PATTERN = re.compile(r'data-message-id="(\d+)"')
+
+# Query counter of the request in flight; contextvars follow the request from
+# the virtual user's task into the thread that runs the sync view.
+_request_queries = contextvars.ContextVar("chat_load_test_queries", default=None)
+
+
+def count_request_query(execute, sql, params, many, context):
+    query_counter = _request_queries.get()
+    if query_counter is not None:
+        query_counter[0] += 1
+    return execute(sql, params, many, context)
+
+
+def install_query_counter(sender, connection, **kwargs):
+    if count_request_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_request_query)
+
+
+def get_percentile(sorted_values, percentile):
+    if not sorted_values:
+        return 0
+    rank = math.ceil(percentile / 100 * len(sorted_values))
+    return sorted_values[max(rank, 1) - 1]
+
+
+def get_last_message_id(content, default):
+    message_ids = MESSAGE_ID_PATTERN.findall(content.decode())
+    return int(message_ids[-1]) if message_ids else default
+
+
+class VirtualUser:
+    def __init__(self, user, peer_ids, rng, results):
+        self.user = user
+        self.peer_ids = peer_ids
+        self.random = rng
+        self.results = results
+        self.client = AsyncClient(raise_request_exception=False)
+        self.peer_id = rng.choice(peer_ids)
+        self.last_message_id = 0
+
+    async def request(self, endpoint, data):
+        query_counter = [0]
+        token = _request_queries.set(query_counter)
+        started = time.perf_counter()
+        try:
+            response = await self.client.post(
+                reverse(f"chat:{endpoint}"), data, headers=HTMX_HEADERS
+            )
+        finally:
+            _request_queries.reset(token)
+        elapsed = time.perf_counter() - started
+        self.results[endpoint].append(
+            (elapsed, query_counter[0], response.status_code >= 400)
+        )
+        return response
+
+    async def search_chat_users(self):
+        search_query = self.random.choice(FIRST_NAMES)[: self.random.randint(2, 4)]
+        await self.request("search_chat_users", {"user_search": search_query})
+
+    async def select_chat_users(self):
+        self.peer_id = self.random.choice(self.peer_ids)
+        response = await self.request(
+            "select_chat_users", {"selected_user": self.peer_id}
+        )
+        self.last_message_id = get_last_message_id(response.content, 0)
+
+    async def get_updated_messages(self):
+        response = await self.request(
+            "get_updated_messages",
+            {"selected_user": self.peer_id, "last_message_id": self.last_message_id},
+        )
+        if response.status_code == 200:
+            self.last_message_id = get_last_message_id(
+                response.content, self.last_message_id
+            )
+
+    async def send_chat_message(self):
+        message = " ".join(self.random.choices(MESSAGE_WORDS, k=6)).capitalize()
+        response = await self.request(
+            "send_chat_message",
+            {"selected_user": self.peer_id, "chat_message": message},
+        )
+        self.last_message_id = get_last_message_id(
+            response.content, self.last_message_id
+        )
+
+    async def run(self, deadline, think_time):
+        await self.client.aforce_login(self.user)
+        # Open a conversation first so polls start from its newest message.
+        await self.select_chat_users()
+        endpoints = list(ENDPOINT_MIX)
+        weights = list(ENDPOINT_MIX.values())
+        while time.perf_counter() < deadline:
+            endpoint = self.random.choices(endpoints, weights)[0]
+            await getattr(self, endpoint)()
+            if think_time:
+                await asyncio.sleep(self.random.expovariate(1 / think_time))
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the chat endpoints with concurrent virtual users through Django's "
+        "async test client and report throughput, latency percentiles and "
+        "queries per request. Sync views share one thread, as in a single "
+        "worker process. Run seed_chat_data first; sent messages are kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=100,
+            help="Concurrent virtual users (default: 100).",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=30,
+            help="Seconds to generate load for (default: 30).",
+        )
+        parser.add_argument(
+            "--think-time",
+            type=float,
+            default=0,
+            help="Mean pause in seconds between a user's requests (default: 0).",
+        )
+        parser.add_argument(
+            "--prefix",
+            default="loadtest_",
+            help="Username prefix of seeded users (default: loadtest_).",
+        )
+        parser.add_argument("--seed", type=int, default=None, help="Random seed.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        users = list(
+            User.objects.filter(
+                username__startswith=options["prefix"], is_active=True
+            ).order_by("?")[: options["users"]]
+        )
+        if not users:
+            raise CommandError(
+                f"No users with prefix {options['prefix']!r}; run seed_chat_data first."
+            )
+
+        peer_ids = defaultdict(list)
+        for user_id, peer_id in ConversationParticipant.objects.filter(
+            user__in=users, peer__isnull=False
+        ).values_list("user", "peer"):
+            peer_ids[user_id].append(peer_id)
+        fallback_peer_ids = [user.id for user in users]
+
+        results = defaultdict(list)
+        virtual_users = [
+            VirtualUser(
+                user,
+                peer_ids[user.id]
+                or [peer_id for peer_id in fallback_peer_ids if peer_id != user.id]
+                or [user.id],
+                random.Random(rng.random()),
+                results,
+            )
+            for user in users
+        ]
+
+        connection_created.connect(install_query_counter)
+        try:
+            elapsed = asyncio.run(
+                self.generate_load(
+                    virtual_users, options["duration"], options["think_time"]
+                )
+            )
+        finally:
+            connection_created.disconnect(install_query_counter)
+
+        self.report(results, elapsed, len(virtual_users))
+
+    async def generate_load(self, virtual_users, duration, think_time):
+        # Connections opened before the run would not count queries.
+        await sync_to_async(self.close_connections)()
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(
+                virtual_user.run(started + duration, think_time)
+                for virtual_user in virtual_users
+            )
+        )
+        return time.perf_counter() - started
+
+    def close_connections(self):
+        connections.close_all()
+
+    def report(self, results, elapsed, user_count):
+        self.stdout.write(
+            f"{user_count} virtual users, {elapsed:.1f}s, "
+            f"{sum(len(samples) for samples in results.values())} requests\n"
+        )
+        header = (
+            f"{'endpoint':<24}{'requests':>10}{'errors':>8}{'req/s':>9}"
+            f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'max q':>7}"
+        )
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for endpoint in ENDPOINT_MIX:
+            samples = results.get(endpoint)
+            if not samples:
+                continue
+            latencies = sorted(sample[0] * 1000 for sample in samples)
+            queries = [sample[1] for sample in samples]
+            errors = sum(1 for sample in samples if sample[2])
+            self.stdout.write(
+                f"{endpoint:<24}{len(samples):>10}{errors:>8}"
+                f"{len(samples) / elapsed:>9.1f}"
+                f"{get_percentile(latencies, 50):>9.1f}"
+                f"{get_percentile(latencies, 95):>9.1f}"
+                f"{get_percentile(latencies, 99):>9.1f}"
+                f"{sum(queries) / len(queries):>9.1f}{max(queries):>7}"
+            )
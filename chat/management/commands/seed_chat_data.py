@@ -0,0 +1,298 @@
+import random
+from collections import defaultdict
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from chat.models import (
+    ChannelMember,
+    ChannelMessage,
+    Conversation,
+    ConversationParticipant,
+    Message,
+    ReadWatermark,
+)
+from core.models import BiometricDetail, Department, UserDetails
+
+FIRST_NAMES = (
+    "Andrea", "Bea", "Carlo", "Dana", "Elijah", "Faith", "Gabriel", "Hannah",
+    "Isaac", "Jasmine", "Kyle", "Lara", "Miguel", "Nicole", "Oscar", "Patricia",
+    "Rafael", "Sofia", "Tomas", "Vanessa",
+)  # fmt: skip
+LAST_NAMES = (
+    "Aquino", "Bautista", "Cruz", "Dela Cruz", "Garcia", "Lopez", "Mendoza",
+    "Navarro", "Ramos", "Reyes", "Santos", "Torres", "Villanueva",
+)  # fmt: skip
+MESSAGE_WORDS = (
+    "schedule", "shift", "patient", "ward", "report", "leave", "meeting",
+    "payroll", "overtime", "please", "thanks", "today", "tomorrow", "confirm",
+    "update", "duty", "endorsement", "rounds", "lab", "results",
+)  # fmt: skip
+
+BATCH_SIZE = 1000
+
+
+def get_skewed_weights(count, skew):
+    # Zipf-like: the k-th most active user is weighted 1 / k ** skew.
+    return [1 / (rank**skew) for rank in range(1, count + 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic users, conversations and messages for chat load tests. "
+        "Activity is skewed so a few users and conversations are very busy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users", type=int, default=1000, help="Users to create (default: 1000)."
+        )
+        parser.add_argument(
+            "--messages",
+            type=int,
+            default=50000,
+            help="Direct messages to create (default: 50000).",
+        )
+        parser.add_argument(
+            "--contacts",
+            type=int,
+            default=20,
+            help="Peers each user talks to (default: 20).",
+        )
+        parser.add_argument(
+            "--skew",
+            type=float,
+            default=1.1,
+            help="Zipf exponent for user and conversation activity (default: 1.1).",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=90,
+            help="Spread messages over this many past days (default: 90).",
+        )
+        parser.add_argument(
+            "--unread-ratio",
+            type=float,
+            default=0.2,
+            help="Share of conversations left with unread messages (default: 0.2).",
+        )
+        parser.add_argument(
+            "--prefix",
+            default="loadtest_",
+            help="Username prefix of seeded users (default: loadtest_).",
+        )
+        parser.add_argument(
+            "--password",
+            default="loadtest",
+            help="Password of seeded users (default: loadtest).",
+        )
+        parser.add_argument("--seed", type=int, default=None, help="Random seed.")
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete previously seeded users and their chat data, then exit.",
+        )
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        prefix = options["prefix"]
+        if options["clear"]:
+            with transaction.atomic():
+                self.clear_seeded_data(prefix)
+            return
+
+        with transaction.atomic():
+            users = self.create_users(prefix, options["users"], options["password"])
+            message_count = self.create_messages(users, options)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {len(users)} users and {message_count} messages "
+                f"(username prefix {prefix!r})."
+            )
+        )
+
+    def clear_seeded_data(self, prefix):
+        user_ids = list(
+            User.objects.filter(username__startswith=prefix).values_list(
+                "id", flat=True
+            )
+        )
+        conversation_ids = list(
+            ConversationParticipant.objects.filter(user_id__in=user_ids).values_list(
+                "conversation", flat=True
+            )
+        )
+        ChannelMember.objects.filter(user_id__in=user_ids).delete()
+        ChannelMessage.objects.filter(sender_id__in=user_ids).delete()
+        ReadWatermark.objects.filter(reader_id__in=user_ids).delete()
+        ReadWatermark.objects.filter(peer_id__in=user_ids).delete()
+        ConversationParticipant.objects.filter(
+            conversation_id__in=conversation_ids
+        ).delete()
+        Conversation.objects.filter(id__in=conversation_ids).update(last_message=None)
+        Message.objects.filter(sender_id__in=user_ids).delete()
+        Message.objects.filter(receiver_id__in=user_ids).delete()
+        Conversation.objects.filter(id__in=conversation_ids).delete()
+        UserDetails.objects.filter(user_id__in=user_ids).delete()
+        BiometricDetail.objects.filter(user_id__in=user_ids).delete()
+        User.objects.filter(id__in=user_ids).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {len(user_ids)} seeded users."))
+
+    def create_users(self, prefix, count, password):
+        start = User.objects.filter(username__startswith=prefix).count()
+        # Hashing is deliberately slow, so every seeded user shares one hash.
+        password = make_password(password)
+        users = User.objects.bulk_create(
+            [
+                User(
+                    username=f"{prefix}{number:06d}",
+                    email=f"{prefix}{number:06d}@example.com",
+                    first_name=self.random.choice(FIRST_NAMES),
+                    last_name=self.random.choice(LAST_NAMES),
+                    password=password,
+                )
+                for number in range(start, start + count)
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+        department_ids = list(
+            Department.objects.filter(is_active=True).values_list("id", flat=True)
+        )
+        UserDetails.objects.bulk_create(
+            [
+                UserDetails(
+                    user=user,
+                    department_id=(
+                        self.random.choice(department_ids) if department_ids else None
+                    ),
+                )
+                for user in users
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        BiometricDetail.objects.bulk_create(
+            [BiometricDetail(user=user) for user in users], batch_size=BATCH_SIZE
+        )
+        return users
+
+    def create_messages(self, users, options):
+        if len(users) < 2 or options["messages"] < 1:
+            return 0
+
+        user_weights = get_skewed_weights(len(users), options["skew"])
+        contact_weights = get_skewed_weights(
+            min(options["contacts"], len(users) - 1), options["skew"]
+        )
+        contacts = {}
+        for user in users:
+            peers = []
+            while len(peers) < len(contact_weights):
+                peer = self.random.choices(users, user_weights)[0]
+                if peer != user and peer not in peers:
+                    peers.append(peer)
+            contacts[user] = peers
+
+        senders = self.random.choices(users, user_weights, k=options["messages"])
+        pairs = [
+            (sender, self.random.choices(contacts[sender], contact_weights)[0])
+            for sender in senders
+        ]
+
+        conversations = {}
+        for sender, receiver in pairs:
+            user_ids = tuple(sorted([sender.id, receiver.id]))
+            if user_ids not in conversations:
+                conversations[user_ids] = Conversation(
+                    participant_key=f"direct:{user_ids[0]}:{user_ids[1]}"
+                )
+        Conversation.objects.bulk_create(conversations.values(), batch_size=BATCH_SIZE)
+
+        now = timezone.now()
+        timestamps = sorted(
+            now - timedelta(seconds=self.random.uniform(0, options["days"] * 86400))
+            for _ in pairs
+        )
+        messages = [
+            Message(
+                conversation=conversations[tuple(sorted([sender.id, receiver.id]))],
+                sender=sender,
+                receiver=receiver,
+                message=" ".join(
+                    self.random.choices(MESSAGE_WORDS, k=self.random.randint(2, 12))
+                ).capitalize(),
+                seen=True,
+            )
+            for sender, receiver in pairs
+        ]
+        Message.objects.bulk_create(messages, batch_size=BATCH_SIZE)
+        # auto_now_add overwrites timestamps on insert, so spread them afterwards.
+        for message, created in zip(messages, timestamps):
+            message.created = created
+        Message.objects.bulk_update(messages, ["created"], batch_size=BATCH_SIZE)
+
+        self.create_conversation_state(messages, conversations, options)
+        return len(messages)
+
+    def create_conversation_state(self, messages, conversations, options):
+        received = defaultdict(list)
+        last_messages = {}
+        for message in messages:
+            received[(message.receiver_id, message.sender_id)].append(message)
+            last_messages[message.conversation] = message
+
+        for conversation, last_message in last_messages.items():
+            conversation.last_message = last_message
+            conversation.last_activity = last_message.created
+        Conversation.objects.bulk_update(
+            conversations.values(),
+            ["last_message", "last_activity"],
+            batch_size=BATCH_SIZE,
+        )
+        ConversationParticipant.objects.bulk_create(
+            [
+                ConversationParticipant(
+                    conversation=conversation,
+                    user_id=user_id,
+                    peer_id=peer_id,
+                    last_activity=conversation.last_activity,
+                )
+                for (user_id, other_user_id), conversation in conversations.items()
+                for user_id, peer_id in (
+                    (user_id, other_user_id),
+                    (other_user_id, user_id),
+                )
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+        watermarks = []
+        unseen_messages = []
+        for (reader_id, peer_id), peer_messages in received.items():
+            unread_count = 0
+            if self.random.random() < options["unread_ratio"]:
+                unread_count = self.random.randint(1, min(5, len(peer_messages)))
+            read_messages = peer_messages[: len(peer_messages) - unread_count]
+            unseen_messages.extend(peer_messages[len(read_messages) :])
+            watermarks.append(
+                ReadWatermark(
+                    reader_id=reader_id,
+                    peer_id=peer_id,
+                    last_read_message_id=read_messages[-1].id if read_messages else 0,
+                    unread_count=unread_count,
+                )
+            )
+        ReadWatermark.objects.bulk_create(watermarks, batch_size=BATCH_SIZE)
+        for start in range(0, len(unseen_messages), BATCH_SIZE):
+            Message.objects.filter(
+                id__in=[
+                    message.id
+                    for message in unseen_messages[start : start + BATCH_SIZE]
+                ]
+            ).update(seen=False)
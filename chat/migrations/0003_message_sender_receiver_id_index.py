@@ -0,0 +1,21 @@
+# Generated by Django 5.0.5 on 2026-10-19 03:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0002_alter_message_created_alter_message_updated"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(
+                fields=["sender", "receiver", "id"], name="chat_message_sender_recv_id"
+            ),
+        ),
+    ]
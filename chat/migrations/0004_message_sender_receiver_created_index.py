@@ -0,0 +1,22 @@
+# Generated by Django 5.0.5 on 2026-10-19 03:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0003_message_sender_receiver_id_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(
+                fields=["sender", "receiver", "created"],
+                name="chat_message_sender_recv_crt",
+            ),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.0.5 on 2026-10-19 03:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_read_watermarks(apps, schema_editor):
+    message_model = apps.get_model("chat", "Message")
+    read_watermark_model = apps.get_model("chat", "ReadWatermark")
+    seen_messages = (
+        message_model.objects.filter(seen=True)
+        .values("receiver", "sender")
+        .annotate(last_read_message_id=models.Max("id"))
+    )
+    read_watermark_model.objects.bulk_create(
+        [
+            read_watermark_model(
+                reader_id=details["receiver"],
+                peer_id=details["sender"],
+                last_read_message_id=details["last_read_message_id"],
+            )
+            for details in seen_messages
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0004_message_sender_receiver_created_index"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReadWatermark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "last_read_message_id",
+                    models.BigIntegerField(
+                        default=0, verbose_name="Last Read Message ID"
+                    ),
+                ),
+                ("updated", models.DateTimeField(auto_now=True, null=True)),
+                (
+                    "peer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.RESTRICT,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "reader",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.RESTRICT,
+                        related_name="read_watermarks",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Read Watermarks",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="readwatermark",
+            constraint=models.UniqueConstraint(
+                fields=("reader", "peer"), name="chat_read_watermark_reader_peer"
+            ),
+        ),
+        migrations.RunPython(backfill_read_watermarks, migrations.RunPython.noop),
+    ]
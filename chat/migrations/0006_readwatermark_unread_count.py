@@ -0,0 +1,54 @@
+# Generated by Django 5.0.5 on 2026-10-19 03:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_unread_counts(apps, schema_editor):
+    message_model = apps.get_model("chat", "Message")
+    read_watermark_model = apps.get_model("chat", "ReadWatermark")
+    last_read_message_ids = {
+        (watermark.reader_id, watermark.peer_id): watermark.last_read_message_id
+        for watermark in read_watermark_model.objects.all()
+    }
+    conversations = (
+        message_model.objects.values_list("receiver", "sender").order_by().distinct()
+    )
+    for receiver_id, sender_id in conversations:
+        unread_count = message_model.objects.filter(
+            receiver_id=receiver_id,
+            sender_id=sender_id,
+            id__gt=last_read_message_ids.get((receiver_id, sender_id), 0),
+        ).count()
+        read_watermark_model.objects.update_or_create(
+            reader_id=receiver_id,
+            peer_id=sender_id,
+            defaults={"unread_count": unread_count},
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0005_readwatermark"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="readwatermark",
+            name="unread_count",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Unread Message Count"
+            ),
+        ),
+        migrations.RunPython(backfill_unread_counts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="readwatermark",
+            index=models.Index(
+                condition=models.Q(("unread_count__gt", 0)),
+                fields=["reader", "-updated"],
+                name="chat_read_watermark_unread",
+            ),
+        ),
+    ]
@@ -0,0 +1,55 @@
+from django.db import migrations
+from django.db.models import Max
+
+
+def backfill_conversations(apps, schema_editor):
+    message_model = apps.get_model("chat", "Message")
+    conversation_model = apps.get_model("chat", "Conversation")
+    participant_model = apps.get_model("chat", "ConversationParticipant")
+
+    last_message_ids = {}
+    for sender_id, receiver_id, last_message_id in (
+        message_model.objects.filter(conversation__isnull=True)
+        .values_list("sender", "receiver")
+        .order_by()
+        .annotate(last_message_id=Max("id"))
+    ):
+        user_ids = tuple(sorted([sender_id, receiver_id]))
+        last_message_ids[user_ids] = max(
+            last_message_ids.get(user_ids, 0), last_message_id
+        )
+
+    for (user_id, other_user_id), last_message_id in last_message_ids.items():
+        last_message = message_model.objects.get(id=last_message_id)
+        conversation, _ = conversation_model.objects.update_or_create(
+            participant_key=f"direct:{user_id}:{other_user_id}",
+            defaults={
+                "last_message": last_message,
+                "last_activity": last_message.created,
+            },
+        )
+        for participant_id, peer_id in (
+            (user_id, other_user_id),
+            (other_user_id, user_id),
+        ):
+            participant_model.objects.update_or_create(
+                conversation=conversation,
+                user_id=participant_id,
+                defaults={"peer_id": peer_id, "last_activity": last_message.created},
+            )
+        message_model.objects.filter(
+            sender_id__in=[user_id, other_user_id],
+            receiver_id__in=[user_id, other_user_id],
+            conversation__isnull=True,
+        ).update(conversation=conversation)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0007_conversation"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_conversations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+from django.db import migrations
+
+POSTGRESQL_FORWARD_SQL = [
+    """
+    ALTER TABLE "chat_message" ADD COLUMN "search_vector" tsvector
+    GENERATED ALWAYS AS (to_tsvector('simple', coalesce("message", ''))) STORED
+    """,
+    'CREATE INDEX "chat_message_search_vector" ON "chat_message" USING GIN ("search_vector")',
+]
+POSTGRESQL_REVERSE_SQL = [
+    'DROP INDEX IF EXISTS "chat_message_search_vector"',
+    'ALTER TABLE "chat_message" DROP COLUMN IF EXISTS "search_vector"',
+]
+
+SQLITE_FORWARD_SQL = [
+    """
+    CREATE VIRTUAL TABLE "chat_message_fts" USING fts5(
+        message, content='chat_message', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER "chat_message_fts_insert" AFTER INSERT ON "chat_message" BEGIN
+        INSERT INTO "chat_message_fts" (rowid, message) VALUES (new.id, new.message);
+    END
+    """,
+    """
+    CREATE TRIGGER "chat_message_fts_delete" AFTER DELETE ON "chat_message" BEGIN
+        INSERT INTO "chat_message_fts" ("chat_message_fts", rowid, message)
+        VALUES ('delete', old.id, old.message);
+    END
+    """,
+    """
+    CREATE TRIGGER "chat_message_fts_update" AFTER UPDATE OF message ON "chat_message" BEGIN
+        INSERT INTO "chat_message_fts" ("chat_message_fts", rowid, message)
+        VALUES ('delete', old.id, old.message);
+        INSERT INTO "chat_message_fts" (rowid, message) VALUES (new.id, new.message);
+    END
+    """,
+    """INSERT INTO "chat_message_fts" ("chat_message_fts") VALUES ('rebuild')""",
+]
+SQLITE_REVERSE_SQL = [
+    'DROP TRIGGER IF EXISTS "chat_message_fts_update"',
+    'DROP TRIGGER IF EXISTS "chat_message_fts_delete"',
+    'DROP TRIGGER IF EXISTS "chat_message_fts_insert"',
+    'DROP TABLE IF EXISTS "chat_message_fts"',
+]
+
+
+def run_vendor_sql(postgresql_sql, sqlite_sql):
+    def run(apps, schema_editor):
+        statements = {
+            "postgresql": postgresql_sql,
+            "sqlite": sqlite_sql,
+        }.get(schema_editor.connection.vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0008_backfill_conversations"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_vendor_sql(POSTGRESQL_FORWARD_SQL, SQLITE_FORWARD_SQL),
+            run_vendor_sql(POSTGRESQL_REVERSE_SQL, SQLITE_REVERSE_SQL),
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+def backfill_channels(apps, schema_editor):
+    channel_model = apps.get_model("chat", "Channel")
+    department_model = apps.get_model("core", "Department")
+
+    channel_model.objects.get_or_create(kind="BROADCAST", defaults={"name": "Everyone"})
+    channel_model.objects.bulk_create(
+        [
+            channel_model(
+                kind="DEPARTMENT", department=department, name=department.name
+            )
+            for department in department_model.objects.filter(
+                chat_channels__isnull=True
+            )
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0010_channel"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_channels, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.5 on 2026-10-19 04:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0011_backfill_channels"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="message",
+            name="chat_message_sender_recv_crt",
+        ),
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(
+                fields=["conversation", "id"], name="chat_message_conversation_id"
+            ),
+        ),
+    ]
@@ -0,0 +1,55 @@
+from django.db import migrations
+from django.db.models import Max
+
+
+def backfill_channel_members(apps, schema_editor):
+    channel_model = apps.get_model("chat", "Channel")
+    channel_member_model = apps.get_model("chat", "ChannelMember")
+    user_details_model = apps.get_model("core", "UserDetails")
+
+    # Existing users start with the history they never opened already read,
+    # like users who join from now on.
+    latest_message_ids = dict(
+        channel_model.objects.annotate(latest_message_id=Max("messages__id"))
+        .filter(kind__in=["BROADCAST", "DEPARTMENT"])
+        .values_list("id", "latest_message_id")
+    )
+    broadcast_channel_ids = list(
+        channel_model.objects.filter(kind="BROADCAST").values_list("id", flat=True)
+    )
+    department_channel_ids = dict(
+        channel_model.objects.filter(kind="DEPARTMENT").values_list(
+            "department_id", "id"
+        )
+    )
+
+    channel_members = []
+    for user_id, department_id in user_details_model.objects.values_list(
+        "user_id", "department_id"
+    ):
+        channel_ids = list(broadcast_channel_ids)
+        if department_id in department_channel_ids:
+            channel_ids.append(department_channel_ids[department_id])
+        channel_members.extend(
+            channel_member_model(
+                channel_id=channel_id,
+                user_id=user_id,
+                last_read_message_id=latest_message_ids[channel_id] or 0,
+            )
+            for channel_id in channel_ids
+        )
+    channel_member_model.objects.bulk_create(
+        channel_members, batch_size=1000, ignore_conflicts=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0012_message_conversation_index"),
+        ("core", "0028_userdetails_bank_account_number"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_channel_members, migrations.RunPython.noop),
+    ]
@@ -2,8 +2,74 @@ from django.contrib.auth.models import User
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+from core.models import Department
+
+
+class Conversation(models.Model):
+    participant_key = models.CharField(
+        _("Conversation Participant Key"), max_length=100, unique=True
+    )
+    last_message = models.ForeignKey(
+        "Message",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    last_activity = models.DateTimeField(
+        _("Conversation Last Activity"), null=True, blank=True
+    )
+    created = models.DateTimeField(auto_now_add=True, null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Conversations"
+
+    def __str__(self):
+        return f"Conversation {self.participant_key} ({self.last_activity})"
+
+
+class ConversationParticipant(models.Model):
+    conversation = models.ForeignKey(
+        Conversation, on_delete=models.RESTRICT, related_name="participants"
+    )
+    user = models.ForeignKey(
+        User, on_delete=models.RESTRICT, related_name="conversation_participants"
+    )
+    peer = models.ForeignKey(
+        User, on_delete=models.RESTRICT, null=True, blank=True, related_name="+"
+    )
+    # Copy of Conversation.last_activity so a user's inbox is one index range.
+    last_activity = models.DateTimeField(
+        _("Conversation Last Activity"), null=True, blank=True
+    )
+
+    class Meta:
+        verbose_name_plural = "Conversation Participants"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["conversation", "user"],
+                name="chat_conversation_participant",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-last_activity"],
+                name="chat_participant_activity",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user.get_full_name()} - {self.conversation}"
+
 
 class Message(models.Model):
+    conversation = models.ForeignKey(
+        Conversation,
+        on_delete=models.RESTRICT,
+        null=True,
+        blank=True,
+        related_name="messages",
+    )
     sender = models.ForeignKey(
         User, on_delete=models.RESTRICT, related_name="message_sender"
     )
@@ -17,6 +83,132 @@ class Message(models.Model):
 
     class Meta:
         verbose_name_plural = "Messages"
+        indexes = [
+            models.Index(
+                fields=["sender", "receiver", "id"],
+                name="chat_message_sender_recv_id",
+            ),
+            models.Index(
+                fields=["conversation", "id"],
+                name="chat_message_conversation_id",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.sender.get_full_name()} - {self.receiver.get_full_name()} ({self.created})"
+
+
+class ReadWatermark(models.Model):
+    reader = models.ForeignKey(
+        User, on_delete=models.RESTRICT, related_name="read_watermarks"
+    )
+    peer = models.ForeignKey(User, on_delete=models.RESTRICT, related_name="+")
+    last_read_message_id = models.BigIntegerField(_("Last Read Message ID"), default=0)
+    unread_count = models.PositiveIntegerField(_("Unread Message Count"), default=0)
+    updated = models.DateTimeField(auto_now=True, null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Read Watermarks"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["reader", "peer"], name="chat_read_watermark_reader_peer"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["reader", "-updated"],
+                condition=models.Q(unread_count__gt=0),
+                name="chat_read_watermark_unread",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.reader.get_full_name()} - {self.peer.get_full_name()} ({self.last_read_message_id})"
+
+
+class Channel(models.Model):
+
+    class Kind(models.TextChoices):
+        DEPARTMENT = "DEPARTMENT", _("Department")
+        GROUP = "GROUP", _("Group")
+        BROADCAST = "BROADCAST", _("Broadcast")
+
+    name = models.CharField(_("Channel Name"), max_length=500, null=True, blank=True)
+    kind = models.CharField(
+        _("Channel Kind"), choices=Kind.choices, max_length=10, default=Kind.GROUP
+    )
+    department = models.ForeignKey(
+        Department,
+        on_delete=models.RESTRICT,
+        null=True,
+        blank=True,
+        related_name="chat_channels",
+    )
+    is_active = models.BooleanField(_("Is Channel Active"), default=True)
+    created = models.DateTimeField(auto_now_add=True, null=True, blank=True)
+    updated = models.DateTimeField(auto_now=True, null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Channels"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["department"],
+                condition=models.Q(kind="DEPARTMENT"),
+                name="chat_channel_department",
+            ),
+            models.UniqueConstraint(
+                fields=["kind"],
+                condition=models.Q(kind="BROADCAST"),
+                name="chat_channel_broadcast",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.get_kind_display()})"
+
+
+class ChannelMember(models.Model):
+    channel = models.ForeignKey(
+        Channel, on_delete=models.RESTRICT, related_name="members"
+    )
+    user = models.ForeignKey(
+        User, on_delete=models.RESTRICT, related_name="chat_channel_memberships"
+    )
+    # Group channels list their members here; every user also gets a row for
+    # the broadcast channel and for their department's channel when they join
+    # it. The watermark starts at the channel's latest message.
+    last_read_message_id = models.BigIntegerField(_("Last Read Message ID"), default=0)
+    created = models.DateTimeField(auto_now_add=True, null=True, blank=True)
+    updated = models.DateTimeField(auto_now=True, null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Channel Members"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["channel", "user"], name="chat_channel_member"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user.get_full_name()} - {self.channel} ({self.last_read_message_id})"
+
+
+class ChannelMessage(models.Model):
+    channel = models.ForeignKey(
+        Channel, on_delete=models.RESTRICT, related_name="messages"
+    )
+    sender = models.ForeignKey(
+        User, on_delete=models.RESTRICT, related_name="chat_channel_messages"
+    )
+    message = models.TextField(_("Channel Message"), null=True, blank=True)
+    created = models.DateTimeField(auto_now_add=True, null=True, blank=True)
+    updated = models.DateTimeField(auto_now=True, null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Channel Messages"
+        indexes = [
+            models.Index(fields=["channel", "id"], name="chat_channel_message_id"),
+        ]
+
+    def __str__(self):
+        return f"{self.sender.get_full_name()} - {self.channel} ({self.created})"
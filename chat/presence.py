@@ -0,0 +1,86 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Seconds a user stays "online" after their last chat request, and "typing"
+# after their last keystroke in a conversation.
+PRESENCE_TTL_SECONDS = 60
+TYPING_TTL_SECONDS = 6
+
+# Per-worker TTL maps: user id -> expiry, and (user id, peer id) -> expiry.
+_online_users = {}
+_typing_users = {}
+_presence_lock = threading.Lock()
+_next_sweep = 0
+
+
+def is_presence_shared():
+    return getattr(settings, "CHAT_PRESENCE_SHARED", False)
+
+
+def get_presence_cache_key(user_id):
+    return f"chat_presence:{user_id}"
+
+
+def _sweep_expired(now):
+    global _next_sweep
+    if now < _next_sweep:
+        return
+    for store in (_online_users, _typing_users):
+        for key in [key for key, expires_at in store.items() if expires_at <= now]:
+            del store[key]
+    _next_sweep = now + PRESENCE_TTL_SECONDS
+
+
+def mark_user_online(user_id):
+    now = time.time()
+    with _presence_lock:
+        previous_expiry = _online_users.get(user_id, 0)
+        _online_users[user_id] = now + PRESENCE_TTL_SECONDS
+        _sweep_expired(now)
+
+    # Only refresh the shared entry once it is half way to expiring, so a
+    # burst of requests costs one cache write.
+    if is_presence_shared() and previous_expiry - now < PRESENCE_TTL_SECONDS / 2:
+        cache.set(get_presence_cache_key(user_id), True, PRESENCE_TTL_SECONDS)
+
+
+def get_online_user_ids(user_ids):
+    now = time.time()
+    user_ids = set(user_ids)
+    with _presence_lock:
+        online_user_ids = {
+            user_id for user_id in user_ids if _online_users.get(user_id, 0) > now
+        }
+
+    unknown_user_ids = user_ids - online_user_ids
+    if is_presence_shared() and unknown_user_ids:
+        shared_presence = cache.get_many(
+            [get_presence_cache_key(user_id) for user_id in unknown_user_ids]
+        )
+        online_user_ids.update(
+            user_id
+            for user_id in unknown_user_ids
+            if get_presence_cache_key(user_id) in shared_presence
+        )
+
+    return online_user_ids
+
+
+def mark_user_typing(user_id, peer_id):
+    now = time.time()
+    with _presence_lock:
+        _typing_users[(user_id, peer_id)] = now + TYPING_TTL_SECONDS
+        _sweep_expired(now)
+
+
+def clear_user_typing(user_id, peer_id):
+    with _presence_lock:
+        _typing_users.pop((user_id, peer_id), None)
+
+
+def is_user_typing(user_id, peer_id):
+    with _presence_lock:
+        return _typing_users.get((user_id, peer_id), 0) > time.time()
@@ -0,0 +1,56 @@
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from chat.models import ChannelMember
+from chat.utils import (
+    get_broadcast_channel,
+    get_latest_channel_message_id,
+    get_or_create_department_channel,
+    join_channel,
+    leave_department_channel,
+)
+from core.models import Department, UserDetails
+
+
+@receiver(post_save, sender=Department)
+def provision_department_channel(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        get_or_create_department_channel(instance)
+
+
+@receiver(pre_save, sender=ChannelMember)
+def start_channel_member_at_latest_message(sender, instance, raw=False, **kwargs):
+    # Members joining a channel are not shown its whole history as unread.
+    if not raw and instance._state.adding and not instance.last_read_message_id:
+        instance.last_read_message_id = get_latest_channel_message_id(
+            instance.channel_id
+        )
+
+
+@receiver(pre_save, sender=UserDetails)
+def remember_previous_department(sender, instance, raw=False, **kwargs):
+    # Compared after the save, so channels only change with the department.
+    instance._previous_department_id = None
+    if not raw and instance.pk is not None:
+        instance._previous_department_id = (
+            UserDetails.objects.filter(pk=instance.pk)
+            .values_list("department_id", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=UserDetails)
+def join_user_channels(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        join_channel(get_broadcast_channel(), instance.user)
+    previous_department_id = getattr(instance, "_previous_department_id", None)
+    if instance.department_id == previous_department_id:
+        return
+    if previous_department_id is not None:
+        leave_department_channel(instance.user, previous_department_id)
+    if instance.department_id is not None:
+        join_channel(
+            get_or_create_department_channel(instance.department), instance.user
+        )
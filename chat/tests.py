@@ -1,3 +1,321 @@
-from django.test import TestCase
+import asyncio
+import time
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from chat.models import ConversationParticipant, Message, ReadWatermark
+from chat.presence import (
+    PRESENCE_TTL_SECONDS,
+    clear_user_typing,
+    get_online_user_ids,
+    is_user_typing,
+    mark_user_online,
+    mark_user_typing,
+)
+from chat.utils import (
+    CONVERSATION_PAGE_SIZE,
+    advance_read_watermark,
+    get_broadcast_channel,
+    get_conversation_page,
+    get_messages_after,
+    get_or_create_direct_conversation,
+    get_recent_conversations,
+    get_unseen_messages,
+    get_user_channels,
+    post_channel_message,
+    publish_chat_event,
+    search_messages,
+    subscribe_to_chat_events,
+    unsubscribe_from_chat_events,
+)
+from core.models import Department
+
+
+class ChatTestCase(TestCase):
+    def send_message(self, sender, recipient, message="Hello"):
+        self.client.force_login(sender)
+        self.client.post(
+            reverse("chat:send_chat_message"),
+            {"selected_user": recipient.id, "chat_message": message},
+            HTTP_HX_REQUEST="true",
+        )
+        return Message.objects.latest("id")
+
+
+class ChatEventTests(ChatTestCase):
+    async def test_published_event_reaches_the_subscribers_stream(self):
+        subscription = subscribe_to_chat_events(1)
+        try:
+            publish_chat_event(1, "chat_message_2", "<div>\nHello</div>")
+            event = await asyncio.wait_for(subscription[1].get(), 1)
+        finally:
+            unsubscribe_from_chat_events(1, subscription)
+
+        self.assertEqual(
+            event, "event: chat_message_2\ndata: <div>\ndata: Hello</div>\n\n"
+        )
+
+    @override_settings(CHAT_POLL_SECONDS=10)
+    def test_conversation_polls_at_the_configured_interval(self):
+        user = User.objects.create_user(username="user")
+        peer = User.objects.create_user(username="peer")
+        self.send_message(peer, user)
+
+        self.client.force_login(user)
+        response = self.client.post(
+            reverse("chat:select_chat_users"),
+            {"selected_user": peer.id},
+            HTTP_HX_REQUEST="true",
+        )
+
+        self.assertContains(response, 'hx-trigger="every 10s, chatMessageReceived"')
+
+
+class GetUpdatedMessagesTests(ChatTestCase):
+    def setUp(self):
+        self.reader = User.objects.create_user(username="reader")
+        self.peer = User.objects.create_user(username="peer")
+
+    def test_poll_marks_messages_already_shown_as_read(self):
+        # Delivered over server-sent events: the page already shows it, so
+        # the poll finds nothing newer.
+        message = self.send_message(self.peer, self.reader)
+        watermark = ReadWatermark.objects.get(reader=self.reader, peer=self.peer)
+        self.assertEqual(watermark.unread_count, 1)
+
+        self.client.force_login(self.reader)
+        response = self.client.post(
+            reverse("chat:get_updated_messages"),
+            {"selected_user": self.peer.id, "last_message_id": message.id},
+            HTTP_HX_REQUEST="true",
+        )
+
+        self.assertEqual(response.status_code, 204)
+        watermark.refresh_from_db()
+        self.assertEqual(watermark.unread_count, 0)
+        self.assertEqual(watermark.last_read_message_id, message.id)
+
+    def test_idle_poll_is_one_query(self):
+        message = self.send_message(self.peer, self.reader)
+
+        with self.assertNumQueries(1):
+            new_messages, has_unread_messages = get_messages_after(
+                self.reader, self.peer.id, message.id - 1
+            )
+        self.assertEqual(new_messages, [message])
+        self.assertTrue(has_unread_messages)
+
+        advance_read_watermark(self.reader, self.peer, message.id)
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                get_messages_after(self.reader, self.peer.id, message.id), ([], False)
+            )
+
+
+class UnreadMessagesTests(ChatTestCase):
+    def setUp(self):
+        self.reader = User.objects.create_user(username="reader")
+        self.peer = User.objects.create_user(username="peer")
+
+    def test_unread_count_follows_the_read_watermark(self):
+        first_message = self.send_message(self.peer, self.reader)
+        self.send_message(self.peer, self.reader)
+        self.assertEqual(
+            get_unseen_messages(self.reader),
+            [{"user": self.peer, "unseen_count": 2}],
+        )
+
+        advance_read_watermark(self.reader, self.peer, first_message.id)
+        self.assertEqual(
+            get_unseen_messages(self.reader),
+            [{"user": self.peer, "unseen_count": 1}],
+        )
+        # A watermark never moves back.
+        advance_read_watermark(self.reader, self.peer, 0)
+        watermark = ReadWatermark.objects.get(reader=self.reader, peer=self.peer)
+        self.assertEqual(watermark.last_read_message_id, first_message.id)
+        self.assertEqual(get_unseen_messages(self.peer), [])
+
+
+class RecentConversationsTests(ChatTestCase):
+    def test_latest_conversation_comes_first(self):
+        user = User.objects.create_user(username="user")
+        peers = [
+            User.objects.create_user(username=f"peer{index}") for index in range(2)
+        ]
+
+        self.send_message(user, peers[0])
+        self.send_message(peers[1], user)
+        conversations, _ = get_recent_conversations(user)
+        self.assertEqual([row.peer for row in conversations], [peers[1], peers[0]])
+
+        message = self.send_message(peers[0], user, "Latest")
+        conversations, has_more_conversations = get_recent_conversations(user)
+        self.assertEqual([row.peer for row in conversations], [peers[0], peers[1]])
+        self.assertEqual(conversations[0].conversation.last_message, message)
+        self.assertFalse(has_more_conversations)
+
+
+class MessageSearchTests(ChatTestCase):
+    def test_only_the_users_messages_are_found(self):
+        user, peer, other = [
+            User.objects.create_user(username=username)
+            for username in ("user", "peer", "other")
+        ]
+        message = self.send_message(peer, user, "Payroll schedule for today")
+        self.send_message(user, peer, "Thanks")
+        self.send_message(peer, other, "Payroll is out")
+
+        results, has_more_results = search_messages(user, "payr sched")
+
+        self.assertEqual([result["message"] for result in results], [message])
+        self.assertEqual(results[0]["peer"], peer)
+        self.assertIn("<mark>", results[0]["snippet"])
+        self.assertFalse(has_more_results)
+        self.assertEqual(search_messages(user, "  "), ([], False))
+
+
+class PresenceTests(TestCase):
+    def test_user_is_online_until_the_presence_expires(self):
+        mark_user_online(101)
+        self.assertEqual(get_online_user_ids([101, 102]), {101})
+
+        expired = time.time() + PRESENCE_TTL_SECONDS + 1
+        with mock.patch("chat.presence.time.time", return_value=expired):
+            self.assertEqual(get_online_user_ids([101, 102]), set())
+
+    def test_typing_is_per_conversation(self):
+        mark_user_typing(101, 102)
+        self.assertTrue(is_user_typing(101, 102))
+        self.assertFalse(is_user_typing(102, 101))
+
+        clear_user_typing(101, 102)
+        self.assertFalse(is_user_typing(101, 102))
+
+
+class SeedChatDataTests(TestCase):
+    def test_seeded_conversations_are_consistent(self):
+        call_command(
+            "seed_chat_data",
+            users=20,
+            messages=300,
+            contacts=5,
+            seed=1,
+            stdout=StringIO(),
+        )
+        messages = Message.objects.filter(sender__username__startswith="loadtest_")
+
+        self.assertEqual(messages.count(), 300)
+        self.assertFalse(messages.filter(conversation__isnull=True).exists())
+        for watermark in ReadWatermark.objects.filter(
+            reader__username__startswith="loadtest_"
+        ):
+            self.assertEqual(
+                watermark.unread_count,
+                messages.filter(
+                    sender=watermark.peer_id,
+                    receiver=watermark.reader_id,
+                    id__gt=watermark.last_read_message_id,
+                ).count(),
+            )
+
+        call_command("seed_chat_data", clear=True, stdout=StringIO())
+        self.assertFalse(User.objects.filter(username__startswith="loadtest_").exists())
+        self.assertFalse(ConversationParticipant.objects.exists())
+
+
+class ConversationPageTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="user")
+        self.peer = User.objects.create_user(username="peer")
+        conversation = get_or_create_direct_conversation(self.user, self.peer)
+        self.messages = Message.objects.bulk_create(
+            [
+                Message(
+                    conversation=conversation,
+                    sender=(self.user, self.peer)[index % 2],
+                    receiver=(self.peer, self.user)[index % 2],
+                    message=str(index),
+                )
+                for index in range(CONVERSATION_PAGE_SIZE + 5)
+            ]
+        )
+        # Rows from before messages were timestamped are paged like any other.
+        Message.objects.filter(id=self.messages[0].id).update(created=None)
+
+    def test_pages_run_from_the_latest_message_back(self):
+        latest_page, has_older_messages = get_conversation_page(self.user, self.peer)
+        self.assertTrue(has_older_messages)
+        self.assertEqual(
+            [message.id for message in latest_page],
+            [message.id for message in self.messages[5:]],
+        )
+
+        older_page, has_older_messages = get_conversation_page(
+            self.peer, self.user, before_id=latest_page[0].id
+        )
+        self.assertFalse(has_older_messages)
+        self.assertEqual(
+            [message.id for message in older_page],
+            [message.id for message in self.messages[:5]],
+        )
+
+
+class UserChannelsTests(TestCase):
+    def setUp(self):
+        self.department = Department.objects.create(name="Nursing", code="NUR")
+        self.staff = User.objects.create_user(username="staff", is_staff=True)
+        self.broadcast_channel = get_broadcast_channel()
+        self.department_channel = self.department.chat_channels.get()
+        post_channel_message(self.broadcast_channel, self.staff, "Welcome")
+        post_channel_message(self.department_channel, self.staff, "Rounds at 8")
+
+    def get_unread_counts(self, user):
+        return {channel.id: channel.unread_count for channel in get_user_channels(user)}
+
+    def test_new_member_starts_with_nothing_unread(self):
+        user = User.objects.create_user(username="new_hire")
+        user.userdetails.department = self.department
+        user.userdetails.save()
+
+        self.assertEqual(
+            self.get_unread_counts(user),
+            {self.broadcast_channel.id: 0, self.department_channel.id: 0},
+        )
+
+        post_channel_message(self.department_channel, self.staff, "Rounds at 9")
+        self.assertEqual(self.get_unread_counts(user)[self.department_channel.id], 1)
+
+    def test_department_change_moves_the_membership(self):
+        user = User.objects.create_user(username="transferee")
+        user.userdetails.department = self.department
+        user.userdetails.save()
+        other_department = Department.objects.create(name="Pharmacy", code="PHA")
+        other_channel = other_department.chat_channels.get()
+
+        user.userdetails.department = other_department
+        user.userdetails.save()
+        self.assertEqual(
+            set(user.chat_channel_memberships.values_list("channel", flat=True)),
+            {self.broadcast_channel.id, other_channel.id},
+        )
+
+        # Saving without a department change leaves memberships alone.
+        user.chat_channel_memberships.filter(channel=other_channel).delete()
+        user.userdetails.save()
+        self.assertFalse(
+            user.chat_channel_memberships.filter(channel=other_channel).exists()
+        )
+
+    def test_user_without_details_sees_the_broadcast_channel(self):
+        user = User.objects.create_user(username="no_details")
+        user.chat_channel_memberships.all().delete()
+        user.userdetails.delete()
+        user = User.objects.get(id=user.id)
+
+        self.assertEqual(self.get_unread_counts(user), {self.broadcast_channel.id: 0})
@@ -13,6 +13,41 @@ urlpatterns = [
         chat_views.get_updated_messages,
         name="get_updated_messages",
     ),
+    path(
+        "channels/get-updated-messages",
+        chat_views.get_updated_channel_messages,
+        name="get_updated_channel_messages",
+    ),
+    path(
+        "channels/load-older-messages",
+        chat_views.load_older_channel_messages,
+        name="load_older_channel_messages",
+    ),
+    path(
+        "channels/select",
+        chat_views.select_chat_channel,
+        name="select_chat_channel",
+    ),
+    path(
+        "channels/send-message",
+        chat_views.send_channel_message,
+        name="send_channel_message",
+    ),
+    path(
+        "conversations/load-more",
+        chat_views.load_more_conversations,
+        name="load_more_conversations",
+    ),
+    path(
+        "load-older-messages",
+        chat_views.load_older_messages,
+        name="load_older_messages",
+    ),
+    path(
+        "events",
+        chat_views.stream_chat_events,
+        name="stream_chat_events",
+    ),
     path(
         "toggle/<str:open>",
         chat_views.toggle_chat_window,
@@ -23,11 +58,21 @@ urlpatterns = [
         chat_views.select_chat_users,
         name="select_chat_users",
     ),
+    path(
+        "users/typing",
+        chat_views.update_typing_status,
+        name="update_typing_status",
+    ),
     path(
         "users/send-chat-message",
         chat_views.send_chat_message,
         name="send_chat_message",
     ),
+    path(
+        "messages/search",
+        chat_views.search_chat_messages,
+        name="search_chat_messages",
+    ),
     path(
         "users",
         chat_views.search_chat_users,
@@ -1,6 +1,47 @@
+import asyncio
+import re
+import threading
+from collections import defaultdict
+
 from django.apps import apps
 from django.contrib.auth.models import User
-from django.db.models import Count, Q
+from django.db import IntegrityError, connection, transaction
+from django.db.models import (
+    BigIntegerField,
+    BooleanField,
+    Count,
+    ExpressionWrapper,
+    F,
+    Max,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from render_block import render_block_to_string
+
+# In-process pub/sub for server-sent chat events: user id -> set of
+# (event loop, queue) pairs, one per open event stream of that user.
+_chat_event_subscribers = defaultdict(set)
+_chat_event_subscribers_lock = threading.Lock()
+
+# Number of messages shown when a conversation is opened, and loaded per
+# "load older messages" request.
+CONVERSATION_PAGE_SIZE = 30
+
+# Number of recent conversations listed per page of the chat window.
+RECENT_CONVERSATIONS_PAGE_SIZE = 10
+
+# Number of hits returned per page of a chat message search.
+MESSAGE_SEARCH_PAGE_SIZE = 20
+
+# Control characters the database wraps around matched terms in search
+# snippets; they are swapped for <mark> tags after the snippet is escaped.
+SNIPPET_START, SNIPPET_STOP = "\x02", "\x03"
 
 
 def get_chat_model(model_name):
@@ -8,42 +49,580 @@ def get_chat_model(model_name):
 
 
 def get_conversation(sender, recipient):
+    # One range of the (conversation, id) index rather than two sender and
+    # receiver ranges joined by OR; ids follow the order messages were sent.
     message_model = get_chat_model("Message")
-    conversation_filters = (Q(sender=sender) & Q(receiver=recipient)) | (
-        Q(sender=recipient) & Q(receiver=sender)
-    )
-    conversation = message_model.objects.filter(conversation_filters).order_by(
-        "created"
+    conversation = message_model.objects.filter(
+        conversation__participant_key=get_direct_conversation_key(sender, recipient)
+    ).order_by("id")
+
+    return conversation
+
+
+def get_direct_conversation_key(user, other_user):
+    user_ids = sorted(
+        [getattr(user, "pk", user), getattr(other_user, "pk", other_user)]
     )
+    return f"direct:{user_ids[0]}:{user_ids[1]}"
+
+
+def get_or_create_direct_conversation(sender, recipient):
+    conversation_model = get_chat_model("Conversation")
+    participant_model = get_chat_model("ConversationParticipant")
+    with transaction.atomic():
+        conversation, created = conversation_model.objects.get_or_create(
+            participant_key=get_direct_conversation_key(sender, recipient)
+        )
+        if created:
+            participant_model.objects.bulk_create(
+                [
+                    participant_model(
+                        conversation=conversation, user=sender, peer=recipient
+                    ),
+                    participant_model(
+                        conversation=conversation, user=recipient, peer=sender
+                    ),
+                ]
+            )
 
     return conversation
 
 
-def get_unseen_messages(user):
+def record_conversation_activity(conversation, message):
+    conversation_model = get_chat_model("Conversation")
+    participant_model = get_chat_model("ConversationParticipant")
+    # Guard on the message id so a slower concurrent send cannot move the
+    # pointer back to an older message.
+    conversation_model.objects.filter(
+        Q(last_message__isnull=True) | Q(last_message_id__lt=message.id),
+        pk=conversation.pk,
+    ).update(last_message=message, last_activity=message.created)
+    participant_model.objects.filter(
+        Q(last_activity__isnull=True) | Q(last_activity__lt=message.created),
+        conversation=conversation,
+    ).update(last_activity=message.created)
+
+
+def get_recent_conversations(user, offset=0):
+    participant_model = get_chat_model("ConversationParticipant")
+    recent_conversations = list(
+        participant_model.objects.filter(user=user, last_activity__isnull=False)
+        .select_related(
+            "conversation__last_message",
+            "peer__userdetails__department",
+        )
+        .order_by("-last_activity", "-id")[
+            offset : offset + RECENT_CONVERSATIONS_PAGE_SIZE + 1
+        ]
+    )
+    has_more_conversations = len(recent_conversations) > RECENT_CONVERSATIONS_PAGE_SIZE
+
+    return recent_conversations[:RECENT_CONVERSATIONS_PAGE_SIZE], has_more_conversations
+
+
+def get_message_search_terms(search_query):
+    return re.findall(r"\w+", search_query or "")
+
+
+def highlight_search_snippet(snippet):
+    return mark_safe(
+        escape(snippet)
+        .replace(SNIPPET_START, "<mark>")
+        .replace(SNIPPET_STOP, "</mark>")
+    )
+
+
+# Returns (message id, snippet) pairs for the user's messages matching every
+# search term, newest first, through the full-text index added by chat 0009.
+def get_message_search_hits(user, search_terms, offset, limit):
+    user_id = getattr(user, "pk", user)
+    if connection.vendor == "postgresql":
+        # Headlines are only built for the page of hits, not for every match.
+        sql = """
+            WITH search AS (SELECT to_tsquery('simple', %s) AS query)
+            SELECT m.id, ts_headline(
+                'simple', coalesce(m.message, ''), search.query,
+                'StartSel=' || chr(2) || ', StopSel=' || chr(3) || ', MaxWords=20, MinWords=8'
+            )
+            FROM (
+                SELECT id, message, created FROM chat_message, search
+                WHERE search_vector @@ search.query
+                AND (sender_id = %s OR receiver_id = %s)
+                ORDER BY created DESC, id DESC
+                LIMIT %s OFFSET %s
+            ) m, search
+            ORDER BY m.created DESC, m.id DESC
+        """
+        params = [" & ".join(f"{term}:*" for term in search_terms)]
+    elif connection.vendor == "sqlite":
+        sql = """
+            SELECT m.id, snippet(chat_message_fts, 0, char(2), char(3), '...', 12)
+            FROM chat_message_fts
+            JOIN chat_message m ON m.id = chat_message_fts.rowid
+            WHERE chat_message_fts MATCH %s AND (m.sender_id = %s OR m.receiver_id = %s)
+            ORDER BY m.created DESC, m.id DESC
+            LIMIT %s OFFSET %s
+        """
+        params = [" ".join(f'"{term}"*' for term in search_terms)]
+    else:
+        message_model = get_chat_model("Message")
+        search_filter = Q()
+        for term in search_terms:
+            search_filter &= Q(message__icontains=term)
+        return [
+            (message_id, message or "")
+            for message_id, message in message_model.objects.filter(
+                search_filter, Q(sender=user_id) | Q(receiver=user_id)
+            )
+            .order_by("-created", "-id")
+            .values_list("id", "message")[offset : offset + limit]
+        ]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + [user_id, user_id, limit, offset])
+        return cursor.fetchall()
+
+
+def search_messages(user, search_query, offset=0):
+    search_terms = get_message_search_terms(search_query)
+    if not search_terms:
+        return [], False
+
+    hits = get_message_search_hits(
+        user, search_terms, offset, MESSAGE_SEARCH_PAGE_SIZE + 1
+    )
+    has_more_results = len(hits) > MESSAGE_SEARCH_PAGE_SIZE
+    hits = hits[:MESSAGE_SEARCH_PAGE_SIZE]
+
     message_model = get_chat_model("Message")
-    unseen_message_counter = (
-        message_model.objects.filter(receiver=user, seen=False)
-        .values("sender")
-        .annotate(unseen_count=Count("id"))
+    messages = message_model.objects.select_related("sender", "receiver").in_bulk(
+        [message_id for message_id, _ in hits]
+    )
+    results = []
+    for message_id, snippet in hits:
+        message = messages[message_id]
+        results.append(
+            {
+                "message": message,
+                "peer": (
+                    message.receiver
+                    if message.sender_id == getattr(user, "pk", user)
+                    else message.sender
+                ),
+                "snippet": highlight_search_snippet(snippet),
+            }
+        )
+
+    return results, has_more_results
+
+
+def get_conversation_page(sender, recipient, before_id=None):
+    conversation = get_conversation(sender, recipient)
+    if before_id is not None:
+        conversation = conversation.filter(id__lt=before_id)
+
+    latest_messages = list(conversation.order_by("-id")[: CONVERSATION_PAGE_SIZE + 1])
+    has_older_messages = len(latest_messages) > CONVERSATION_PAGE_SIZE
+    messages = latest_messages[:CONVERSATION_PAGE_SIZE][::-1]
+
+    return messages, has_older_messages
+
+
+def render_chat_messages(messages, current_user):
+    return "".join(
+        render_block_to_string(
+            "chat/conversation.html",
+            "chat_message",
+            {"current_user": current_user, "message": message},
+        )
+        for message in messages
+    )
+
+
+def get_messages_after(reader, peer, last_message_id):
+    # One query for what a poll must add and whether the messages it already
+    # shows are still unread: the messages after the last one shown, plus
+    # the peer's messages above the reader's watermark, flagged as unread.
+    last_read_message_id = (
+        get_chat_model("ReadWatermark")
+        .objects.filter(reader=reader, peer=peer)
+        .values("last_read_message_id")[:1]
+    )
+    unread_filter = Q(sender=peer, id__gt=F("last_read_message_id"))
+    messages = list(
+        get_conversation(reader, peer)
+        .alias(last_read_message_id=Subquery(last_read_message_id))
+        .filter(Q(id__gt=last_message_id) | unread_filter)
+        .annotate(is_unread=ExpressionWrapper(unread_filter, BooleanField()))
+    )
+    new_messages = [message for message in messages if message.id > last_message_id]
+    has_unread_messages = any(message.is_unread for message in messages)
+    return new_messages, has_unread_messages
+
+
+def get_unseen_messages(user):
+    read_watermark_model = get_chat_model("ReadWatermark")
+    unread_watermarks = (
+        read_watermark_model.objects.filter(reader=user, unread_count__gt=0)
+        .select_related("peer__userdetails__department")
+        .order_by("-updated")
     )
 
     unseen_records = [
-        {
-            "user": User.objects.get(id=details.get("sender")),
-            "unseen_count": details.get("unseen_count"),
-        }
-        for details in unseen_message_counter
+        {"user": watermark.peer, "unseen_count": watermark.unread_count}
+        for watermark in unread_watermarks
     ]
 
     return unseen_records
 
 
-def mark_messages_as_seen(sender, receiver):
+def increment_unread_count(receiver, sender):
+    read_watermark_model = get_chat_model("ReadWatermark")
+    updated = read_watermark_model.objects.filter(reader=receiver, peer=sender).update(
+        unread_count=F("unread_count") + 1, updated=timezone.now()
+    )
+    if not updated:
+        try:
+            with transaction.atomic():
+                read_watermark_model.objects.create(
+                    reader_id=getattr(receiver, "pk", receiver),
+                    peer_id=getattr(sender, "pk", sender),
+                    unread_count=1,
+                )
+        except IntegrityError:
+            # Another request created the counter first; increment it instead.
+            increment_unread_count(receiver, sender)
+
+
+def advance_read_watermark(reader, peer, last_read_message_id):
+    message_model = get_chat_model("Message")
+    read_watermark_model = get_chat_model("ReadWatermark")
+    new_last_read_message_id = Greatest(
+        "last_read_message_id", Value(last_read_message_id)
+    )
+    # Messages that arrived after the ones being marked as read stay unread.
+    unread_count = (
+        message_model.objects.filter(
+            sender=OuterRef("peer"),
+            receiver=OuterRef("reader"),
+            id__gt=Greatest(
+                OuterRef("last_read_message_id"), Value(last_read_message_id)
+            ),
+        )
+        .order_by()
+        .values("receiver")
+        .annotate(unread_count=Count("id"))
+        .values("unread_count")
+    )
+    updated = read_watermark_model.objects.filter(reader=reader, peer=peer).update(
+        last_read_message_id=new_last_read_message_id,
+        unread_count=Coalesce(Subquery(unread_count), 0),
+        updated=timezone.now(),
+    )
+    if not updated:
+        try:
+            with transaction.atomic():
+                read_watermark_model.objects.create(
+                    reader_id=getattr(reader, "pk", reader),
+                    peer_id=getattr(peer, "pk", peer),
+                    last_read_message_id=last_read_message_id,
+                )
+        except IntegrityError:
+            # Another request created the watermark first; advance it instead.
+            advance_read_watermark(reader, peer, last_read_message_id)
+
+
+def mark_messages_as_seen(sender, receiver, last_message_id=None):
     message_model = get_chat_model("Message")
     unseen_messages = message_model.objects.filter(
         sender=sender, receiver=receiver, seen=False
     )
+    if last_message_id is None:
+        last_message_id = message_model.objects.filter(
+            sender=sender, receiver=receiver
+        ).aggregate(last_message_id=Max("id"))["last_message_id"]
+        if last_message_id is None:
+            return
+    else:
+        unseen_messages = unseen_messages.filter(id__lte=last_message_id)
+
+    advance_read_watermark(
+        reader=receiver, peer=sender, last_read_message_id=last_message_id
+    )
+    # Keep the per-message flag in step for code that still reads it.
+    unseen_messages.update(seen=True)
+
+
+def format_server_sent_event(event, data):
+    data_lines = "".join(f"data: {line}\n" for line in data.splitlines() or [""])
+    return f"event: {event}\n{data_lines}\n"
 
-    for message in unseen_messages:
-        setattr(message, "seen", True)
-        message.save()
+
+def subscribe_to_chat_events(user_id):
+    subscription = (asyncio.get_running_loop(), asyncio.Queue())
+    with _chat_event_subscribers_lock:
+        _chat_event_subscribers[user_id].add(subscription)
+    return subscription
+
+
+def unsubscribe_from_chat_events(user_id, subscription):
+    with _chat_event_subscribers_lock:
+        subscriptions = _chat_event_subscribers.get(user_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del _chat_event_subscribers[user_id]
+
+
+def publish_chat_event(user_id, event, data):
+    with _chat_event_subscribers_lock:
+        subscriptions = list(_chat_event_subscribers.get(user_id, ()))
+
+    server_sent_event = format_server_sent_event(event, data)
+    for loop, queue in subscriptions:
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, server_sent_event)
+        except RuntimeError:
+            # The stream's event loop has already been closed.
+            unsubscribe_from_chat_events(user_id, (loop, queue))
+
+
+def get_broadcast_channel():
+    channel_model = get_chat_model("Channel")
+    channel, _ = channel_model.objects.get_or_create(
+        kind=channel_model.Kind.BROADCAST, defaults={"name": "Everyone"}
+    )
+    return channel
+
+
+def get_or_create_department_channel(department):
+    channel_model = get_chat_model("Channel")
+    channel, created = channel_model.objects.get_or_create(
+        kind=channel_model.Kind.DEPARTMENT,
+        department=department,
+        defaults={"name": department.name, "is_active": department.is_active},
+    )
+    if not created and (channel.name, channel.is_active) != (
+        department.name,
+        department.is_active,
+    ):
+        channel.name = department.name
+        channel.is_active = department.is_active
+        channel.save(update_fields=["name", "is_active", "updated"])
+    return channel
+
+
+def get_latest_channel_message_id(channel):
+    channel_message_model = get_chat_model("ChannelMessage")
+    return (
+        channel_message_model.objects.filter(channel=channel).aggregate(
+            latest_message_id=Max("id")
+        )["latest_message_id"]
+        or 0
+    )
+
+
+def join_channel(channel, user):
+    # The watermark of a new membership starts at the channel's latest
+    # message (see the chat signals), so joining leaves nothing unread.
+    channel_member_model = get_chat_model("ChannelMember")
+    channel_member, _ = channel_member_model.objects.get_or_create(
+        channel=channel, user=user
+    )
+    return channel_member
+
+
+def leave_department_channel(user, department_id):
+    channel_model = get_chat_model("Channel")
+    channel_member_model = get_chat_model("ChannelMember")
+    channel_member_model.objects.filter(
+        user=user,
+        channel__kind=channel_model.Kind.DEPARTMENT,
+        channel__department_id=department_id,
+    ).delete()
+
+
+def get_user_channel_filter(user):
+    channel_model = get_chat_model("Channel")
+    channel_member_model = get_chat_model("ChannelMember")
+    if user.is_staff:
+        return Q()
+
+    channel_filter = Q(kind=channel_model.Kind.BROADCAST) | Q(
+        kind=channel_model.Kind.GROUP,
+        id__in=channel_member_model.objects.filter(user=user).values("channel"),
+    )
+    user_details = getattr(user, "userdetails", None)
+    if user_details is not None and user_details.department_id is not None:
+        channel_filter |= Q(
+            kind=channel_model.Kind.DEPARTMENT,
+            department_id=user_details.department_id,
+        )
+    return channel_filter
+
+
+def get_user_channels(user):
+    channel_model = get_chat_model("Channel")
+    channel_member_model = get_chat_model("ChannelMember")
+    channel_message_model = get_chat_model("ChannelMessage")
+    last_read_message_id = channel_member_model.objects.filter(
+        channel=OuterRef("pk"), user=user
+    ).values("last_read_message_id")[:1]
+    # Messages are stored once per channel, so unread counts are a range scan
+    # of the (channel, id) index above each member's watermark.
+    unread_count = (
+        channel_message_model.objects.filter(
+            channel=OuterRef("pk"), id__gt=OuterRef("last_read_message_id")
+        )
+        .order_by()
+        .values("channel")
+        .annotate(unread_count=Count("id"))
+        .values("unread_count")
+    )
+    # A channel the user has no membership in (e.g. one only staff can see)
+    # has nothing unread.
+    latest_message_id = (
+        channel_message_model.objects.filter(channel=OuterRef("pk"))
+        .order_by("-id")
+        .values("id")[:1]
+    )
+    return (
+        channel_model.objects.filter(get_user_channel_filter(user), is_active=True)
+        .annotate(
+            last_read_message_id=Coalesce(
+                Subquery(last_read_message_id),
+                Subquery(latest_message_id),
+                0,
+                output_field=BigIntegerField(),
+            ),
+            unread_count=Coalesce(Subquery(unread_count), 0),
+        )
+        .order_by("kind", "name")
+    )
+
+
+def get_user_channel(user, channel_id):
+    channel_model = get_chat_model("Channel")
+    return channel_model.objects.filter(get_user_channel_filter(user)).get(
+        id=channel_id
+    )
+
+
+def can_post_to_channel(user, channel):
+    if user.is_staff:
+        return True
+    if channel.kind != channel.Kind.GROUP:
+        return False
+    return channel.members.filter(user=user).exists()
+
+
+def get_channel_page(channel, before_id=None):
+    channel_message_model = get_chat_model("ChannelMessage")
+    messages = channel_message_model.objects.filter(channel=channel).select_related(
+        "sender"
+    )
+    if before_id is not None:
+        messages = messages.filter(id__lt=before_id)
+
+    page = list(messages.order_by("-id")[: CONVERSATION_PAGE_SIZE + 1])
+    has_older_messages = len(page) > CONVERSATION_PAGE_SIZE
+    messages = page[:CONVERSATION_PAGE_SIZE][::-1]
+    return messages, has_older_messages
+
+
+def render_channel_messages(messages, current_user):
+    return "".join(
+        render_block_to_string(
+            "chat/channel.html",
+            "channel_message",
+            {"current_user": current_user, "message": message},
+        )
+        for message in messages
+    )
+
+
+def get_channel_messages_after(channel, last_message_id):
+    channel_message_model = get_chat_model("ChannelMessage")
+    return (
+        channel_message_model.objects.filter(channel=channel, id__gt=last_message_id)
+        .select_related("sender")
+        .order_by("id")
+    )
+
+
+def mark_channel_as_read(channel, reader, last_read_message_id):
+    channel_member_model = get_chat_model("ChannelMember")
+    updated = channel_member_model.objects.filter(channel=channel, user=reader).update(
+        last_read_message_id=Greatest(
+            "last_read_message_id", Value(last_read_message_id)
+        ),
+        updated=timezone.now(),
+    )
+    if not updated:
+        try:
+            with transaction.atomic():
+                channel_member_model.objects.create(
+                    channel=channel,
+                    user_id=getattr(reader, "pk", reader),
+                    last_read_message_id=last_read_message_id,
+                )
+        except IntegrityError:
+            # Another request created the watermark first; advance it instead.
+            mark_channel_as_read(channel, reader, last_read_message_id)
+
+
+def get_channel_member_ids(channel, user_ids):
+    channel_member_model = get_chat_model("ChannelMember")
+    if channel.kind == channel.Kind.BROADCAST:
+        member_filter = Q(is_active=True)
+    elif channel.kind == channel.Kind.DEPARTMENT:
+        member_filter = Q(
+            is_active=True, userdetails__department_id=channel.department_id
+        )
+    else:
+        member_filter = Q(
+            id__in=channel_member_model.objects.filter(channel=channel).values("user")
+        )
+    return set(
+        User.objects.filter(
+            member_filter | Q(is_staff=True), id__in=user_ids
+        ).values_list("id", flat=True)
+    )
+
+
+def get_chat_event_subscriber_ids():
+    with _chat_event_subscribers_lock:
+        return [
+            user_id
+            for user_id, subscriptions in _chat_event_subscribers.items()
+            if subscriptions
+        ]
+
+
+def publish_channel_message(channel_message):
+    subscriber_ids = get_chat_event_subscriber_ids()
+    if not subscriber_ids:
+        return
+
+    channel = channel_message.channel
+    rendered_message = render_block_to_string(
+        "chat/channel.html", "channel_message", {"message": channel_message}
+    )
+    for member_id in get_channel_member_ids(channel, subscriber_ids):
+        if member_id != channel_message.sender_id:
+            publish_chat_event(
+                member_id, f"chat_channel_message_{channel.id}", rendered_message
+            )
+
+
+def post_channel_message(channel, sender, message):
+    channel_message_model = get_chat_model("ChannelMessage")
+    # A single row however many members the channel has; readers fan it out
+    # by reading the channel.
+    channel_message = channel_message_model.objects.create(
+        channel=channel, sender=sender, message=message
+    )
+    mark_channel_as_read(channel, sender, channel_message.id)
+    # Only connected members on this worker are looked up, once, after commit.
+    transaction.on_commit(lambda: publish_channel_message(channel_message))
+    return channel_message
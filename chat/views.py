@@ -1,22 +1,76 @@
+import asyncio
+
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import transaction
 from django.db.models import Q
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import render
 from django_htmx.http import reswap, retarget, trigger_client_event
 from render_block import render_block_to_string
 
 from chat.models import Message
-from chat.utils import get_conversation, get_unseen_messages, mark_messages_as_seen
+from chat.presence import (
+    TYPING_TTL_SECONDS,
+    clear_user_typing,
+    get_online_user_ids,
+    is_user_typing,
+    mark_user_online,
+    mark_user_typing,
+)
+from chat.utils import (
+    can_post_to_channel,
+    get_channel_messages_after,
+    get_channel_page,
+    get_conversation_page,
+    get_messages_after,
+    get_or_create_direct_conversation,
+    get_recent_conversations,
+    get_unseen_messages,
+    get_user_channel,
+    get_user_channels,
+    increment_unread_count,
+    mark_channel_as_read,
+    mark_messages_as_seen,
+    post_channel_message,
+    publish_chat_event,
+    record_conversation_activity,
+    render_channel_messages,
+    render_chat_messages,
+    search_messages,
+    subscribe_to_chat_events,
+    unsubscribe_from_chat_events,
+)
+from core.utils import get_users_with_details
+
+# Comment lines sent on idle event streams so proxies keep the connection open.
+CHAT_EVENT_KEEP_ALIVE_SECONDS = 15
 
 
 # Create your views here.
 def toggle_chat_window(request, open):
     context = {}
+    mark_user_online(request.user.id)
     unseen_records = get_unseen_messages(request.user)
     if request.htmx:
         response = HttpResponse()
         if open == "True":
-            context.update({"unseen_records": unseen_records})
+            recent_conversations, has_more_conversations = get_recent_conversations(
+                request.user
+            )
+            context.update(
+                {
+                    "unseen_records": unseen_records,
+                    "recent_conversations": recent_conversations,
+                    "has_more_conversations": has_more_conversations,
+                    "next_offset": len(recent_conversations),
+                    "channels": get_user_channels(request.user),
+                    "online_user_ids": get_online_user_ids(
+                        [record["user"].id for record in unseen_records]
+                        + [participant.peer_id for participant in recent_conversations]
+                    ),
+                }
+            )
             response.content = render_block_to_string(
                 "chat/chat_window.html", "chat_window", context
             )
@@ -31,13 +85,65 @@ def toggle_chat_window(request, open):
         return response
 
 
+def load_more_conversations(request):
+    if request.htmx and request.POST:
+        offset = int(request.POST.get("offset") or 0)
+        recent_conversations, has_more_conversations = get_recent_conversations(
+            request.user, offset=offset
+        )
+        context = {
+            "recent_conversations": recent_conversations,
+            "has_more_conversations": has_more_conversations,
+            "next_offset": offset + len(recent_conversations),
+            "online_user_ids": get_online_user_ids(
+                participant.peer_id for participant in recent_conversations
+            ),
+        }
+        response = HttpResponse()
+        response.content = render_block_to_string(
+            "chat/chat_window.html", "recent_conversation_list", context
+        )
+        response = retarget(response, "#load_more_conversations")
+        response = reswap(response, "outerHTML")
+        return response
+
+
+def search_chat_messages(request):
+    if request.htmx and request.POST:
+        search_query = request.POST.get("message_search", "")
+        offset = int(request.POST.get("offset") or 0)
+        results, has_more_results = search_messages(
+            request.user, search_query, offset=offset
+        )
+        context = {
+            "message_search": search_query,
+            "message_search_results": results,
+            "has_more_results": has_more_results,
+            "next_offset": offset + len(results),
+        }
+        response = HttpResponse()
+        if offset:
+            response.content = render_block_to_string(
+                "chat/chat_window.html", "message_search_result_list", context
+            )
+            response = retarget(response, "#load_more_message_search_results")
+        else:
+            response.content = render_block_to_string(
+                "chat/chat_window.html", "message_search_results", context
+            )
+            response = retarget(response, "#message_search_results")
+        response = reswap(response, "outerHTML")
+        return response
+
+
 def search_chat_users(request):
     context = {}
     if request.htmx and request.POST:
+        mark_user_online(request.user.id)
         search_query = request.POST.get("user_search")
-        users = User.objects.filter(
-            is_active=True,
-        ).exclude(id=request.user.id)
+        users = (
+            get_users_with_details().filter(is_active=True).exclude(id=request.user.id)
+        )
         if search_query:
             search_filter = (
                 Q(first_name__icontains=search_query)
@@ -49,7 +155,13 @@ def search_chat_users(request):
             users = users.filter(search_filter)
         else:
             users = users.none()
-        context.update({"users": users})
+        users = list(users)
+        context.update(
+            {
+                "users": users,
+                "online_user_ids": get_online_user_ids(user.id for user in users),
+            }
+        )
         response = HttpResponse()
         response.content = render_block_to_string(
             "chat/chat_window.html", "user_search_dropdown", context
@@ -62,15 +174,27 @@ def search_chat_users(request):
 def select_chat_users(request):
     context = {}
     if request.htmx and request.POST:
+        mark_user_online(request.user.id)
         selected_user_id = request.POST.get("selected_user")
         selected_user = User.objects.get(id=selected_user_id)
-        conversation = get_conversation(request.user, selected_user)
+        conversation, has_older_messages = get_conversation_page(
+            request.user, selected_user
+        )
         context = {
             "current_user": request.user,
             "selected_user": selected_user,
             "conversation": conversation,
+            "has_older_messages": has_older_messages,
+            "selected_user_online": bool(get_online_user_ids([selected_user.id])),
+            "selected_user_typing": is_user_typing(selected_user.id, request.user.id),
+            "poll_seconds": settings.CHAT_POLL_SECONDS,
         }
-        mark_messages_as_seen(sender=selected_user, receiver=request.user)
+        if conversation:
+            mark_messages_as_seen(
+                sender=selected_user,
+                receiver=request.user,
+                last_message_id=conversation[-1].id,
+            )
         response = HttpResponse()
         response.content = render_block_to_string(
             "chat/conversation.html", "conversation_window", context
@@ -81,25 +205,54 @@ def select_chat_users(request):
 
 
 def get_updated_messages(request):
-    context = {}
     if request.htmx and request.POST:
+        mark_user_online(request.user.id)
+        data = request.POST
+        selected_user_id = int(data.get("selected_user"))
+        last_message_id = int(data.get("last_message_id") or 0)
+        new_messages, has_unread_messages = get_messages_after(
+            request.user, selected_user_id, last_message_id
+        )
+        # Messages pushed over server-sent events are already shown, so they
+        # are read even when the poll finds nothing newer.
+        shown_message_id = new_messages[-1].id if new_messages else last_message_id
+        if has_unread_messages:
+            mark_messages_as_seen(
+                sender=selected_user_id,
+                receiver=request.user,
+                last_message_id=shown_message_id,
+            )
+        if not new_messages:
+            return HttpResponse(status=204)
+
         response = HttpResponse()
-        selected_user_id = request.POST.get("selected_user")
-        selected_user = User.objects.get(id=selected_user_id)
-        conversation = get_conversation(request.user, selected_user)
+        response.content = render_chat_messages(new_messages, request.user)
+        response = retarget(response, "#scrollable_conversation_container")
+        response = reswap(response, "beforeend")
+        return response
+
+
+def load_older_messages(request):
+    if request.htmx and request.POST:
+        data = request.POST
+        selected_user = User.objects.get(id=data.get("selected_user"))
+        conversation, has_older_messages = get_conversation_page(
+            request.user,
+            selected_user,
+            before_id=int(data.get("before_id")),
+        )
         context = {
-            "current_user": request.user,
             "selected_user": selected_user,
             "conversation": conversation,
+            "has_older_messages": has_older_messages,
         }
-        mark_messages_as_seen(sender=selected_user, receiver=request.user)
         response = HttpResponse()
         response.content = render_block_to_string(
-            "chat/conversation.html", "scrollable_conversation_container", context
-        )
-        response = retarget(response, "#scrollable_conversation_container")
+            "chat/conversation.html", "load_older_messages", context
+        ) + render_chat_messages(conversation, request.user)
+        response = retarget(response, "#load_older_messages")
         response = reswap(response, "outerHTML")
-    return response
+        return response
 
 
 def send_chat_message(request):
@@ -109,13 +262,33 @@ def send_chat_message(request):
         recipient_id = data.get("selected_user")
         recipient = User.objects.get(id=recipient_id)
         message = data.get("chat_message")
+        mark_user_online(request.user.id)
+        clear_user_typing(request.user.id, recipient.id)
         payload = {"sender": request.user, "receiver": recipient, "message": message}
-        Message.objects.create(**payload)
-        conversation = get_conversation(request.user, recipient)
+        with transaction.atomic():
+            conversation = get_or_create_direct_conversation(request.user, recipient)
+            new_message = Message.objects.create(conversation=conversation, **payload)
+            record_conversation_activity(conversation, new_message)
+            increment_unread_count(receiver=recipient, sender=request.user)
+        publish_chat_event(
+            recipient.id,
+            f"chat_message_{request.user.id}",
+            render_block_to_string(
+                "chat/conversation.html",
+                "chat_message",
+                {"current_user": recipient, "message": new_message},
+            ),
+        )
+        conversation, has_older_messages = get_conversation_page(
+            request.user, recipient
+        )
         context = {
             "current_user": request.user,
             "selected_user": recipient,
             "conversation": conversation,
+            "has_older_messages": has_older_messages,
+            "selected_user_online": bool(get_online_user_ids([recipient.id])),
+            "poll_seconds": settings.CHAT_POLL_SECONDS,
         }
 
         response = HttpResponse()
@@ -125,3 +298,134 @@ def send_chat_message(request):
         response = retarget(response, "#conversation_window")
         response = reswap(response, "outerHTML")
         return response
+
+
+def get_channel_window_context(user, channel, conversation, has_older_messages):
+    return {
+        "current_user": user,
+        "channel": channel,
+        "conversation": conversation,
+        "has_older_messages": has_older_messages,
+        "can_post": can_post_to_channel(user, channel),
+        "poll_seconds": settings.CHAT_POLL_SECONDS,
+    }
+
+
+def select_chat_channel(request):
+    if request.htmx and request.POST:
+        mark_user_online(request.user.id)
+        channel = get_user_channel(request.user, request.POST.get("selected_channel"))
+        conversation, has_older_messages = get_channel_page(channel)
+        if conversation:
+            mark_channel_as_read(channel, request.user, conversation[-1].id)
+        context = get_channel_window_context(
+            request.user, channel, conversation, has_older_messages
+        )
+        response = HttpResponse()
+        response.content = render_block_to_string(
+            "chat/channel.html", "channel_window", context
+        )
+        response = retarget(response, "#chat_window")
+        response = reswap(response, "outerHTML")
+        return response
+
+
+def get_updated_channel_messages(request):
+    if request.htmx and request.POST:
+        mark_user_online(request.user.id)
+        data = request.POST
+        channel = get_user_channel(request.user, data.get("selected_channel"))
+        last_message_id = int(data.get("last_message_id") or 0)
+        new_messages = list(get_channel_messages_after(channel, last_message_id))
+        if not new_messages:
+            return HttpResponse(status=204)
+
+        mark_channel_as_read(channel, request.user, new_messages[-1].id)
+        response = HttpResponse()
+        response.content = render_channel_messages(new_messages, request.user)
+        response = retarget(response, "#scrollable_conversation_container")
+        response = reswap(response, "beforeend")
+        return response
+
+
+def load_older_channel_messages(request):
+    if request.htmx and request.POST:
+        data = request.POST
+        channel = get_user_channel(request.user, data.get("selected_channel"))
+        conversation, has_older_messages = get_channel_page(
+            channel, before_id=int(data.get("before_id"))
+        )
+        context = {
+            "channel": channel,
+            "conversation": conversation,
+            "has_older_messages": has_older_messages,
+        }
+        response = HttpResponse()
+        response.content = render_block_to_string(
+            "chat/channel.html", "load_older_messages", context
+        ) + render_channel_messages(conversation, request.user)
+        response = retarget(response, "#load_older_messages")
+        response = reswap(response, "outerHTML")
+        return response
+
+
+def send_channel_message(request):
+    if request.htmx and request.POST:
+        mark_user_online(request.user.id)
+        data = request.POST
+        channel = get_user_channel(request.user, data.get("selected_channel"))
+        if not can_post_to_channel(request.user, channel):
+            return HttpResponse(status=403)
+
+        with transaction.atomic():
+            post_channel_message(channel, request.user, data.get("channel_message"))
+        conversation, has_older_messages = get_channel_page(channel)
+        context = get_channel_window_context(
+            request.user, channel, conversation, has_older_messages
+        )
+        response = HttpResponse()
+        response.content = render_block_to_string(
+            "chat/channel.html", "channel_window", context
+        )
+        response = retarget(response, "#channel_window")
+        response = reswap(response, "outerHTML")
+        return response
+
+
+def update_typing_status(request):
+    if request.htmx and request.POST:
+        mark_user_online(request.user.id)
+        recipient_id = int(request.POST.get("selected_user"))
+        mark_user_typing(request.user.id, recipient_id)
+        publish_chat_event(
+            recipient_id, f"chat_typing_{request.user.id}", str(TYPING_TTL_SECONDS)
+        )
+        return HttpResponse(status=204)
+
+
+async def stream_chat_events(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=401)
+
+    async def event_stream():
+        subscription = subscribe_to_chat_events(user.id)
+        _, queue = subscription
+        try:
+            mark_user_online(user.id)
+            yield ": connected\n\n"
+            while True:
+                try:
+                    yield await asyncio.wait_for(
+                        queue.get(), timeout=CHAT_EVENT_KEEP_ALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    mark_user_online(user.id)
+                    yield ": keep-alive\n\n"
+        finally:
+            unsubscribe_from_chat_events(user.id, subscription)
+
+    response = StreamingHttpResponse(event_stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,71 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.utils import get_referenced_media_paths
+
+
+def iter_media_files(root):
+    directories = [root]
+    while directories:
+        with os.scandir(directories.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    directories.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
+
+class Command(BaseCommand):
+    help = "Delete files under MEDIA_ROOT that are no longer referenced by any record."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=3600,
+            help="Only delete files older than this many seconds (default: 3600), "
+            "so uploads whose records are not yet committed are kept.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List orphaned files without deleting them.",
+        )
+
+    def handle(self, *args, **options):
+        media_root = str(settings.MEDIA_ROOT)
+        if not os.path.isdir(media_root):
+            self.stdout.write(f"{media_root} does not exist, nothing to do.")
+            return
+
+        referenced_paths = get_referenced_media_paths()
+        cutoff = time.time() - options["min_age"]
+        dry_run = options["dry_run"]
+
+        orphan_count = 0
+        orphan_bytes = 0
+        for entry in iter_media_files(media_root):
+            name = os.path.relpath(entry.path, media_root).replace(os.sep, "/")
+            if name in referenced_paths:
+                continue
+
+            stat = entry.stat(follow_symlinks=False)
+            if stat.st_mtime > cutoff:
+                continue
+
+            orphan_count += 1
+            orphan_bytes += stat.st_size
+            if dry_run:
+                self.stdout.write(name)
+            else:
+                os.remove(entry.path)
+
+        action = "Found" if dry_run else "Deleted"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{action} {orphan_count} orphaned files ({orphan_bytes} bytes)."
+            )
+        )
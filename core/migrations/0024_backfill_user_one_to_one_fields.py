@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def backfill_user_one_to_one_fields(apps, schema_editor):
+    user_model = apps.get_model(settings.AUTH_USER_MODEL)
+    user_details_model = apps.get_model("core", "UserDetails")
+    biometric_detail_model = apps.get_model("core", "BiometricDetail")
+
+    user_details_model.objects.bulk_create(
+        [
+            user_details_model(user_id=user_id)
+            for user_id in user_model.objects.filter(
+                userdetails__isnull=True
+            ).values_list("id", flat=True)
+        ]
+    )
+    biometric_detail_model.objects.bulk_create(
+        [
+            biometric_detail_model(user_id=user_id)
+            for user_id in user_model.objects.filter(
+                biometricdetail__isnull=True
+            ).values_list("id", flat=True)
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0023_alter_userdetails_education"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            backfill_user_one_to_one_fields, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0024_backfill_user_one_to_one_fields"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql='CREATE INDEX IF NOT EXISTS "auth_user_email_lower_idx" ON "auth_user" (LOWER("email"));',
+            reverse_sql='DROP INDEX IF EXISTS "auth_user_email_lower_idx";',
+        ),
+    ]
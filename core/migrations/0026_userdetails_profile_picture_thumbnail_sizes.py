@@ -0,0 +1,22 @@
+# Generated by Django 5.0.5 on 2026-10-19 03:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0025_auth_user_email_lower_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userdetails",
+            name="profile_picture_thumbnail_sizes",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                verbose_name="User Profile Picture Thumbnail Sizes",
+            ),
+        ),
+    ]
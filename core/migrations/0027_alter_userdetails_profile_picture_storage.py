@@ -0,0 +1,26 @@
+# Generated by Django 5.0.5 on 2026-10-19 03:39
+
+import core.storage
+import core.utils
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0026_userdetails_profile_picture_thumbnail_sizes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="userdetails",
+            name="profile_picture",
+            field=models.FileField(
+                blank=True,
+                null=True,
+                storage=core.storage.get_profile_picture_storage,
+                upload_to=core.utils.get_user_profile_picture_directory_path,
+                verbose_name="User Profile Picture",
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.5 on 2026-10-19 04:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0027_alter_userdetails_profile_picture_storage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userdetails",
+            name="bank_account_number",
+            field=models.CharField(
+                blank=True,
+                max_length=500,
+                null=True,
+                verbose_name="User Bank Account Number",
+            ),
+        ),
+    ]
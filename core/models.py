@@ -4,7 +4,12 @@ from django.contrib.auth.models import User
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
-from core.utils import date_to_string, get_user_profile_picture_directory_path
+from core.storage import get_profile_picture_storage
+from core.utils import (
+    date_to_string,
+    get_profile_picture_thumbnail_name,
+    get_user_profile_picture_directory_path,
+)
 
 
 class UserDetails(models.Model):
@@ -50,6 +55,10 @@ class UserDetails(models.Model):
         null=True,
         blank=True,
         upload_to=get_user_profile_picture_directory_path,
+        storage=get_profile_picture_storage,
+    )
+    profile_picture_thumbnail_sizes = models.JSONField(
+        _("User Profile Picture Thumbnail Sizes"), default=list, blank=True
     )
     date_of_birth = models.DateField(_("User Date of Birth"), null=True, blank=True)
     phone_number = models.CharField(
@@ -87,6 +96,9 @@ class UserDetails(models.Model):
     employee_number = models.CharField(
         _("User Employee Number"), max_length=500, null=True, blank=True
     )
+    bank_account_number = models.CharField(
+        _("User Bank Account Number"), max_length=500, null=True, blank=True
+    )
     rank = models.CharField(_("User Rank"), max_length=500, null=True, blank=True)
 
     department = models.ForeignKey(
@@ -159,6 +171,24 @@ class UserDetails(models.Model):
 
         return None
 
+    def get_profile_picture_url(self, size, extension="jpg"):
+        if not self.profile_picture:
+            return None
+
+        sufficient_sizes = [
+            thumbnail_size
+            for thumbnail_size in self.profile_picture_thumbnail_sizes
+            if thumbnail_size >= size
+        ]
+        if not sufficient_sizes:
+            return self.profile_picture.url
+
+        return self.profile_picture.storage.url(
+            get_profile_picture_thumbnail_name(
+                self.profile_picture.name, min(sufficient_sizes), extension
+            )
+        )
+
     def str_date_of_birth(self):
         return date_to_string(self.date_of_birth)
 
@@ -0,0 +1,32 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import Department
+from core.utils import (
+    bump_reference_data_version,
+    create_initial_user_one_to_one_fields,
+    get_unknown_login_email_cache_key,
+)
+
+
+@receiver(post_save, sender=User)
+def provision_user_one_to_one_fields(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        create_initial_user_one_to_one_fields(instance)
+
+
+@receiver(post_save, sender=User)
+def forget_unknown_login_email(sender, instance, **kwargs):
+    if instance.email:
+        cache.delete(get_unknown_login_email_cache_key(instance.email))
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def invalidate_department_list(sender, **kwargs):
+    # After the commit: bumped earlier, a reader could load the old list and
+    # cache it under the new version.
+    transaction.on_commit(lambda: bump_reference_data_version("departments"))
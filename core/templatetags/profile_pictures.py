@@ -0,0 +1,20 @@
+from django import template
+
+register = template.Library()
+
+
+@register.inclusion_tag("core/components/profile_picture.html")
+def profile_picture(user_details, size, css_class="", alt="User Profile Picture"):
+    context = {"css_class": css_class, "alt": alt}
+    if user_details and user_details.profile_picture:
+        context.update(
+            {
+                "webp_url": (
+                    user_details.get_profile_picture_url(size, "webp")
+                    if user_details.profile_picture_thumbnail_sizes
+                    else None
+                ),
+                "jpg_url": user_details.get_profile_picture_url(size, "jpg"),
+            }
+        )
+    return context
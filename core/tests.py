@@ -1,3 +1,62 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from core.models import Department
+from core.utils import get_department_list
+
+
+class SetNewUserPasswordTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="jane", email="Jane.Doe@Example.com", password=None
+        )
+
+    def set_password(self, email):
+        return self.client.post(
+            reverse("core:set_user_password"),
+            {"email": email, "password": "secret", "confirm_password": "secret"},
+            HTTP_HX_REQUEST="true",
+        )
+
+    def test_email_is_matched_whatever_its_case(self):
+        response = self.set_password("jane.doe@example.com")
+
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("secret"))
+
+    def test_account_with_a_password_is_refused(self):
+        self.user.set_password("original")
+        self.user.save()
+
+        response = self.set_password("jane.doe@example.com")
+
+        self.assertContains(response, "This account cannot have its password set here.")
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("original"))
+
+    def test_unknown_email_is_refused(self):
+        response = self.set_password("nobody@example.com")
+
+        self.assertContains(response, "This account cannot have its password set here.")
+        self.assertEqual(response["HX-Retarget"], "#error_list")
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.has_usable_password())
+
+
+class DepartmentListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_list_is_reloaded_only_once_the_change_is_committed(self):
+        self.assertEqual(get_department_list(), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            department = Department.objects.create(name="Nursing", code="NUR")
+            # Read before the commit: still the cached list.
+            self.assertEqual(get_department_list(), [])
+
+        self.assertEqual(get_department_list(), [department])
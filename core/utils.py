@@ -1,18 +1,63 @@
-import uuid
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from io import BytesIO
+from pathlib import PurePosixPath
 
 from django.apps import apps
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.db.models.functions import Lower
+from PIL import Image, ImageOps
 
+# Process-local copies of reference data, keyed by name and tagged with the
+# version they were loaded at. The version itself lives in the Django cache, so
+# a bump made by one worker invalidates the copies held by every worker sharing
+# that cache; see CACHES in the settings.
+_reference_data = {}
 
-def check_user_has_password(email):
-    try:
-        user = User.objects.get(email=email)
-        if user.password and user.has_usable_password():
-            return True
-        return False
-    except User.DoesNotExist:
-        return False
+# Square renditions generated for every uploaded profile picture, in pixels.
+PROFILE_PICTURE_THUMBNAIL_SIZES = (48, 128, 512)
+PROFILE_PICTURE_THUMBNAIL_FORMATS = {"webp": "WEBP", "jpg": "JPEG"}
+
+# Thumbnails are generated off the request thread, one picture at a time.
+_profile_picture_thumbnail_executor = ThreadPoolExecutor(max_workers=1)
+
+
+# How long an email with no matching account is remembered, so bursts of
+# login attempts against unknown addresses do not each hit the user table.
+UNKNOWN_LOGIN_EMAIL_CACHE_TIMEOUT = 60
+
+
+def get_unknown_login_email_cache_key(email):
+    return f"unknown_login_email:{email.lower()}"
+
+
+def get_user_by_email(email):
+    if not email:
+        return None
+
+    cache_key = get_unknown_login_email_cache_key(email)
+    if cache.get(cache_key):
+        return None
+
+    # Matches the functional index on LOWER(email) added in core 0025.
+    user = (
+        User.objects.alias(email_lower=Lower("email"))
+        .filter(email_lower=email.lower())
+        .order_by("id")
+        .first()
+    )
+    if user is None:
+        cache.set(cache_key, True, timeout=UNKNOWN_LOGIN_EMAIL_CACHE_TIMEOUT)
+    return user
+
+
+def check_user_has_password(user):
+    return bool(user.password) and user.has_usable_password()
 
 
 def generate_username_from_employee_id(employee_id):
@@ -53,9 +98,71 @@ def profile_picture_validation(image):
 
 
 def get_user_profile_picture_directory_path(instance, filename):
-    ext = filename.split(".")[1]
-    new_filename = f"{uuid.uuid4()}.{ext}"
-    return f"{instance.user.id}/profile_picture/{new_filename}"
+    # The file itself is renamed after its content hash by the field's storage.
+    return f"{instance.user.id}/profile_picture/{filename}"
+
+
+def get_referenced_media_paths():
+    referenced_paths = set()
+    user_details_model = apps.get_model("core", "UserDetails")
+    profile_pictures = (
+        user_details_model.objects.exclude(profile_picture__isnull=True)
+        .exclude(profile_picture="")
+        .values_list("profile_picture", flat=True)
+    )
+    for name in profile_pictures.iterator():
+        referenced_paths.add(name)
+        # Thumbnails may still be generating, so keep every possible rendition.
+        for size in PROFILE_PICTURE_THUMBNAIL_SIZES:
+            for extension in PROFILE_PICTURE_THUMBNAIL_FORMATS:
+                referenced_paths.add(
+                    get_profile_picture_thumbnail_name(name, size, extension)
+                )
+    return referenced_paths
+
+
+def get_profile_picture_thumbnail_name(name, size, extension):
+    path = PurePosixPath(name)
+    return str(path.with_name(f"{path.stem}_{size}.{extension}"))
+
+
+def generate_profile_picture_thumbnails(user_details_id, name):
+    close_old_connections()
+    try:
+        with default_storage.open(name) as original:
+            image = ImageOps.exif_transpose(Image.open(original))
+            image = image.convert("RGB")
+
+        generated_sizes = []
+        for size in PROFILE_PICTURE_THUMBNAIL_SIZES:
+            thumbnail = ImageOps.fit(image, (size, size), Image.LANCZOS)
+            for extension, image_format in PROFILE_PICTURE_THUMBNAIL_FORMATS.items():
+                buffer = BytesIO()
+                thumbnail.save(buffer, image_format, quality=85)
+                thumbnail_name = get_profile_picture_thumbnail_name(
+                    name, size, extension
+                )
+                if default_storage.exists(thumbnail_name):
+                    default_storage.delete(thumbnail_name)
+                default_storage.save(thumbnail_name, ContentFile(buffer.getvalue()))
+            generated_sizes.append(size)
+
+        # Only record the renditions if the picture was not replaced meanwhile.
+        apps.get_model("core", "UserDetails").objects.filter(
+            pk=user_details_id, profile_picture=name
+        ).update(profile_picture_thumbnail_sizes=generated_sizes)
+    finally:
+        close_old_connections()
+
+
+def schedule_profile_picture_thumbnails(user_details):
+    user_details_id = user_details.pk
+    name = user_details.profile_picture.name
+    transaction.on_commit(
+        lambda: _profile_picture_thumbnail_executor.submit(
+            generate_profile_picture_thumbnails, user_details_id, name
+        )
+    )
 
 
 def get_dict_for_user_and_user_details(querydict):
@@ -124,6 +231,53 @@ def update_user_and_user_details(user_instance, querydict):
         raise e
 
 
+def get_reference_data_version_key(name):
+    return f"reference_data:{name}:version"
+
+
+def get_reference_data_version(name):
+    version_key = get_reference_data_version_key(name)
+    version = cache.get(version_key)
+    if version is None:
+        # Start from a timestamp so a version key evicted from the cache never
+        # comes back at a value some worker has already seen.
+        cache.add(version_key, time.time_ns(), timeout=None)
+        version = cache.get(version_key)
+    return version
+
+
+def bump_reference_data_version(name):
+    version_key = get_reference_data_version_key(name)
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        cache.set(version_key, time.time_ns(), timeout=None)
+
+
+def get_reference_data(name, loader):
+    version = get_reference_data_version(name)
+    local_version, data = _reference_data.get(name, (None, None))
+    if local_version == version:
+        return data
+
+    data_key = f"reference_data:{name}:{version}"
+    data = cache.get(data_key)
+    if data is None:
+        data = loader()
+        cache.set(data_key, data, timeout=None)
+
+    _reference_data[name] = (version, data)
+    return data
+
+
+def get_department_list():
+    department_model = apps.get_model("core", "Department")
+    return get_reference_data(
+        "departments",
+        lambda: list(department_model.objects.filter(is_active=True).order_by("name")),
+    )
+
+
 def get_education_list():
     user_details_model = apps.get_model("core", "UserDetails")
     return user_details_model.EducationalAttainment.choices
@@ -149,18 +303,19 @@ def get_religion_list():
     return user_details_model.Religion.choices
 
 
-def get_or_create_intial_user_one_to_one_fields(user):
-    user_details, user_details_created = apps.get_model(
-        "core", "UserDetails"
-    ).objects.get_or_create(user=user, defaults={"user": user})
-    biometric_details, biometric_details_created = apps.get_model(
-        "core", "BiometricDetail"
-    ).objects.get_or_create(user=user, defaults={"user": user})
+def create_initial_user_one_to_one_fields(user):
+    user_details = apps.get_model("core", "UserDetails").objects.create(user=user)
+    biometric_details = apps.get_model("core", "BiometricDetail").objects.create(
+        user=user
+    )
 
-    return [
-        (user_details, user_details_created),
-        (biometric_details, biometric_details_created),
-    ]
+    return user_details, biometric_details
+
+
+def get_users_with_details():
+    return User.objects.select_related(
+        "userdetails", "userdetails__department", "biometricdetail"
+    )
 
 
 def check_if_biometric_uid_exists(current_user, uid):
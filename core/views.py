@@ -15,18 +15,21 @@ from django_htmx.http import (
 from openpyxl import load_workbook
 from render_block import render_block_to_string
 
-from core.models import BiometricDetail, Department, UserDetails
+from core.models import BiometricDetail, UserDetails
 from core.utils import (
     check_if_biometric_uid_exists,
     check_user_has_password,
     generate_username_from_employee_id,
     get_civil_status_list,
+    get_department_list,
     get_education_list,
     get_education_list_with_degrees_earned,
-    get_or_create_intial_user_one_to_one_fields,
     get_religion_list,
+    get_user_by_email,
+    get_users_with_details,
     password_validation,
     profile_picture_validation,
+    schedule_profile_picture_thumbnails,
     string_to_date,
     update_user_and_user_details,
 )
@@ -45,7 +48,6 @@ def user_login(request):
     if request.method == "POST":
         email = request.POST["email"]
         password = request.POST["password"]
-        # check_user_has_password(email=email)
         user = authenticate(request, username=email, password=password)
         response = HttpResponse()
         if user is not None:
@@ -54,7 +56,9 @@ def user_login(request):
             return response
         else:
             if not password:
-                if not check_user_has_password(email=email):
+                # Set by EmailBackend when the email belongs to an account
+                # that has no password yet, so no second lookup is needed.
+                if getattr(request, "login_user_password_unset", False):
                     context.update({"user_email": email})
                     response.content = render_block_to_string(
                         "core/components/set_password.html",
@@ -88,6 +92,12 @@ def set_new_user_password(request):
 
     errors = password_validation(password, confirm_password)
 
+    # Found the way login finds it, whatever the case the email was typed in;
+    # only accounts without a password yet can have one set here.
+    user = get_user_by_email(request.POST["email"])
+    if user is None or check_user_has_password(user):
+        errors.append("This account cannot have its password set here.")
+
     if errors:
         context.update({"password_validation_errors": errors})
         response.content = render_block_to_string(
@@ -97,8 +107,6 @@ def set_new_user_password(request):
         response = reswap(response, "outerHTML")
         return response
 
-    user_email = request.POST["email"]
-    user = User.objects.get(email=user_email)
     user.set_password(password)
     user.save()
 
@@ -166,9 +174,9 @@ def user_register(request):
         user.set_password(password)
         user.save()
 
-        user_details, _ = get_or_create_intial_user_one_to_one_fields(user)
-        user_details[0].employee_number = employee_id
-        user_details[0].save()
+        user_details = user.userdetails
+        user_details.employee_number = employee_id
+        user_details.save()
 
         context.update(
             {
@@ -189,7 +197,7 @@ def user_register(request):
 @login_required(login_url="/login")
 def user_profile(request):
     user = request.user
-    departments = Department.objects.filter(is_active=True).order_by("name")
+    departments = get_department_list()
     education_list = get_education_list()
     civil_status_list = get_civil_status_list()
     religion_list = get_religion_list()
@@ -200,7 +208,6 @@ def user_profile(request):
         "education_list": education_list,
         "religion_list": religion_list,
     }
-    get_or_create_intial_user_one_to_one_fields(user)
 
     if (
         not request.htmx
@@ -317,7 +324,9 @@ def upload_user_profile_picture(request):
             user = request.user
             user_details = request.user.userdetails
             user_details.profile_picture = profile_picture
+            user_details.profile_picture_thumbnail_sizes = []
             user_details.save()
+            schedule_profile_picture_thumbnails(user_details)
             context.update(
                 {
                     "error": False,
@@ -337,7 +346,7 @@ def upload_user_profile_picture(request):
 ### USER MANAGEMENT ###
 @login_required(login_url="/login")
 def user_management(request):
-    users = User.objects.exclude(id=request.user.id)
+    users = get_users_with_details().exclude(id=request.user.id)
     context = {"users": users}
     return render(request, "core/user_management.html", context)
 
@@ -363,9 +372,9 @@ def add_new_user(request):
                 },
             )
             if created:
-                user_details, _ = get_or_create_intial_user_one_to_one_fields(user)
-                user_details[0].employee_number = employee_id
-                user_details[0].save()
+                user_details = user.userdetails
+                user_details.employee_number = employee_id
+                user_details.save()
                 response = HttpResponseClientRedirect(reverse("core:user_management"))
             else:
                 context.update({"add_user_error_message": "Email already exists."})
@@ -403,9 +412,8 @@ def toggle_user_status(request, pk):
 
 @login_required(login_url="/login")
 def modify_user_details(request, pk):
-    user = User.objects.get(id=pk)
-    get_or_create_intial_user_one_to_one_fields(user)
-    departments = Department.objects.filter(is_active=True).order_by("name")
+    user = get_users_with_details().get(id=pk)
+    departments = get_department_list()
     civil_status_list = get_civil_status_list()
     education_list = get_education_list()
     religion_list = get_religion_list()
@@ -444,7 +452,7 @@ def modify_user_biometric_details(request, pk):
     context = {}
     if request.htmx and request.POST:
         data = request.POST
-        user = User.objects.get(id=pk)
+        user = get_users_with_details().get(id=pk)
         uid_in_device = data.get("uid_in_device", None)
         context.update(
             {
@@ -495,7 +503,6 @@ def bulk_add_new_users(request):
                 )
                 if created:
                     new_user_counter += 1
-                    get_or_create_intial_user_one_to_one_fields(user)
 
             if new_user_counter > 0:
                 messages.success(
@@ -1,15 +1,31 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend
 
+from core.utils import (
+    check_user_has_password,
+    get_user_by_email,
+    get_users_with_details,
+)
+
 
 class EmailBackend(ModelBackend):
     def authenticate(self, request, username=None, password=None, **kwargs):
-        UserModel = get_user_model()
-        try:
-            user = UserModel.objects.get(email=username)
-        except UserModel.DoesNotExist:
+        user = get_user_by_email(username)
+        if user is None:
             return None
-        else:
-            if user.check_password(password):
-                return user
+
+        if request is not None:
+            request.login_user_password_unset = not check_user_has_password(user)
+
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
         return None
+
+    def get_user(self, user_id):
+        # Called by AuthenticationMiddleware on every request; load the user's
+        # details, department and biometric detail alongside the user row.
+        try:
+            user = get_users_with_details().get(pk=user_id)
+        except get_user_model().DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
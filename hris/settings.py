@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     "core",
     "attendance",
     "chat",
+    "payroll",
 ]
 
 MIDDLEWARE = [
@@ -85,6 +86,43 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+# Reference data (departments, statutory tables) is invalidated by bumping a
+# version key in this cache, and unknown login emails are remembered in it.
+# LocMemCache is private to each process, so a bump only reaches the worker
+# that made it: with more than one worker, use a backend every worker can
+# reach (e.g. Redis or Memcached) through CACHE_BACKEND and CACHE_LOCATION.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", "hris"),
+    }
+}
+
+# Share chat presence across workers through the cache; requires a cache
+# backend every worker can reach (e.g. Redis or Memcached).
+CHAT_PRESENCE_SHARED = os.getenv("CHAT_PRESENCE_SHARED", False) == "True"
+
+# Server-sent events only reach streams open in the worker that saved the
+# message, so with several workers the chat poll delivers the rest. It is
+# slowed down only when one worker serves every stream (WEB_CONCURRENCY=1,
+# also gunicorn's default).
+CHAT_POLL_SECONDS = int(
+    os.getenv(
+        "CHAT_POLL_SECONDS", 60 if os.getenv("WEB_CONCURRENCY", "1") == "1" else 10
+    )
+)
+
+# Payroll credit file: the company's code with the bank and the account the
+# payroll is debited from.
+PAYROLL_BANK_COMPANY_CODE = os.getenv("PAYROLL_BANK_COMPANY_CODE", "")
+PAYROLL_BANK_ACCOUNT_NUMBER = os.getenv("PAYROLL_BANK_ACCOUNT_NUMBER", "")
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
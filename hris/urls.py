@@ -5,5 +5,6 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("chat/", include("chat.urls", namespace="chat")),
     path("attendance/", include("attendance.urls", namespace="attendance")),
+    path("payroll/", include("payroll.urls", namespace="payroll")),
     path("", include("core.urls", namespace="core")),
 ]
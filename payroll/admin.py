@@ -1,3 +1,120 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+
+from payroll.models import (
+    Compensation,
+    DeductionInstallment,
+    PayrollAdjustment,
+    PayrollPeriod,
+    PayrollRun,
+    PayrollRunShard,
+    PayrollSnapshot,
+    Payslip,
+    PayslipLine,
+    RecurringDeduction,
+    StatutoryBracket,
+    StatutoryTable,
+)
+from payroll.utils.deduction_utils import (
+    approve_recurring_deduction,
+    cancel_recurring_deduction,
+)
+
+
+class StatutoryBracketInline(admin.TabularInline):
+    model = StatutoryBracket
+    extra = 0
+
+
+class StatutoryTableAdmin(admin.ModelAdmin):
+    inlines = [StatutoryBracketInline]
+
+
+class DeductionInstallmentInline(admin.TabularInline):
+    model = DeductionInstallment
+    extra = 0
+    can_delete = False
+    readonly_fields = [
+        "sequence",
+        "due_date",
+        "amount",
+        "principal_amount",
+        "interest_amount",
+        "remaining_balance",
+    ]
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+class LockedPayrollPeriodAdmin(admin.ModelAdmin):
+    # Rows of a locked period are read-only, so its snapshot keeps matching.
+    period_lookup = "period"
+
+    def get_locked_rows(self, queryset):
+        return queryset.filter(
+            **{f"{self.period_lookup}__status": PayrollPeriod.Status.LOCKED}
+        )
+
+    def is_locked(self, obj):
+        return (
+            obj is not None
+            and self.get_locked_rows(self.model.objects.filter(id=obj.id)).exists()
+        )
+
+    def has_change_permission(self, request, obj=None):
+        return not self.is_locked(obj) and super().has_change_permission(request, obj)
+
+    def has_delete_permission(self, request, obj=None):
+        return not self.is_locked(obj) and super().has_delete_permission(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        if self.get_locked_rows(queryset).exists():
+            raise PermissionDenied
+        super().delete_queryset(request, queryset)
+
+
+class PayslipLineAdmin(LockedPayrollPeriodAdmin):
+    period_lookup = "payslip__period"
+
+
+class PayrollPeriodAdmin(admin.ModelAdmin):
+    # Locking takes a snapshot and unlocking keeps it, so the status only
+    # changes through lock_payroll_period.
+    readonly_fields = ["status"]
+
+
+@admin.action(description="Approve and schedule selected deductions")
+def approve_deductions(modeladmin, request, queryset):
+    for deduction in queryset.filter(status=RecurringDeduction.Status.PENDING):
+        try:
+            approve_recurring_deduction(deduction)
+        except ValueError as error:
+            modeladmin.message_user(request, f"{deduction}: {error}", messages.ERROR)
+
+
+@admin.action(description="Cancel selected deductions")
+def cancel_deductions(modeladmin, request, queryset):
+    for deduction in queryset.exclude(status=RecurringDeduction.Status.CANCELLED):
+        cancel_recurring_deduction(deduction)
+
+
+class RecurringDeductionAdmin(admin.ModelAdmin):
+    inlines = [DeductionInstallmentInline]
+    actions = [approve_deductions, cancel_deductions]
+    list_display = ["__str__", "kind", "installment_count", "start_date", "status"]
+    list_filter = ["status", "kind"]
+    readonly_fields = ["status", "approved"]
+
 
 # Register your models here.
+admin.site.register(Compensation)
+admin.site.register(PayrollAdjustment, LockedPayrollPeriodAdmin)
+admin.site.register(PayrollPeriod, PayrollPeriodAdmin)
+admin.site.register(PayrollRun)
+admin.site.register(PayrollRunShard)
+admin.site.register(PayrollSnapshot)
+admin.site.register(Payslip, LockedPayrollPeriodAdmin)
+admin.site.register(PayslipLine, PayslipLineAdmin)
+admin.site.register(RecurringDeduction, RecurringDeductionAdmin)
+admin.site.register(StatutoryTable, StatutoryTableAdmin)
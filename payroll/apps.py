@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PayrollConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "payroll"
+
+    def ready(self):
+        from payroll import signals  # noqa: F401
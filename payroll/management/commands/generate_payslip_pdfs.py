@@ -0,0 +1,54 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from payroll.models import PayrollPeriod
+from payroll.utils.payslip_pdf_utils import iter_payslip_zip
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the payslip PDFs of a payroll period in a process pool and "
+        "write them to a ZIP archive as they are rendered, reporting "
+        "payslips per second."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("period_id", type=int, help="Payroll period ID.")
+        parser.add_argument(
+            "--output",
+            default=None,
+            help="ZIP file to write (default: payslips-<start>-<end>.zip).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Worker processes; 1 renders in this process (default: CPU count).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            period = PayrollPeriod.objects.get(id=options["period_id"])
+        except PayrollPeriod.DoesNotExist:
+            raise CommandError(f"Payroll period {options['period_id']} does not exist.")
+
+        output = (
+            options["output"] or f"payslips-{period.start_date}-{period.end_date}.zip"
+        )
+        worker_count = max(options["workers"], 1)
+        payslip_count = period.payslips.count()
+
+        started = time.perf_counter()
+        with open(output, "wb") as archive:
+            for data in iter_payslip_zip(period, worker_count):
+                archive.write(data)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {payslip_count} payslips to {output} with {worker_count} "
+                f"workers in {elapsed:.2f}s ({payslip_count / elapsed:.0f} payslips/s)."
+            )
+        )
@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from payroll.models import PayrollPeriod
+from payroll.utils.snapshot_utils import (
+    get_period_snapshot,
+    lock_payroll_period,
+    unlock_payroll_period,
+    verify_payroll_snapshot,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Lock an approved payroll period, saving a compressed, content-hashed "
+        "snapshot of its inputs and payslips that reports read from then on. "
+        "Can also verify that the latest snapshot reproduces its payslips, or "
+        "unlock the period."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("period_id", type=int, help="Payroll period ID.")
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Recompute the payslips from the latest snapshot and compare.",
+        )
+        parser.add_argument(
+            "--unlock",
+            action="store_true",
+            help="Unlock the period so it can be recomputed; snapshots are kept.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            period = PayrollPeriod.objects.get(id=options["period_id"])
+        except PayrollPeriod.DoesNotExist:
+            raise CommandError(f"Payroll period {options['period_id']} does not exist.")
+
+        if options["unlock"]:
+            if not unlock_payroll_period(period):
+                raise CommandError(f"Payroll period {period} is not locked.")
+            period.refresh_from_db()
+            self.stdout.write(self.style.SUCCESS(f"Unlocked {period}."))
+            return
+
+        if options["verify"]:
+            snapshot = get_period_snapshot(period)
+            if not snapshot:
+                raise CommandError(f"Payroll period {period} has no snapshot.")
+            try:
+                mismatched_user_ids = verify_payroll_snapshot(snapshot)
+            except ValueError as error:
+                raise CommandError(error)
+            if mismatched_user_ids:
+                raise CommandError(
+                    f"Snapshot {snapshot.id} does not reproduce the payslips of "
+                    f"users {mismatched_user_ids}."
+                )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Snapshot {snapshot.id} ({snapshot.content_hash}) reproduces "
+                    f"all {snapshot.payslip_count} payslips of {period}."
+                )
+            )
+            return
+
+        try:
+            snapshot = lock_payroll_period(period)
+        except ValueError as error:
+            raise CommandError(error)
+        period.refresh_from_db()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Locked {period} with snapshot {snapshot.id} of "
+                f"{snapshot.payslip_count} payslips ({len(snapshot.data)} bytes, "
+                f"sha256 {snapshot.content_hash})."
+            )
+        )
@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from payroll.models import PayrollPeriod
+from payroll.utils.computation_utils import (
+    delete_payslips,
+    get_changed_payslip_user_ids,
+    run_payroll,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalculate only the payslips of a payroll period whose inputs "
+        "(attendance, compensation, adjustments, statutory tables) changed "
+        "since they were computed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("period_id", type=int, help="Payroll period ID.")
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List the employees that would be recalculated without saving.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            period = PayrollPeriod.objects.get(id=options["period_id"])
+        except PayrollPeriod.DoesNotExist:
+            raise CommandError(f"Payroll period {options['period_id']} does not exist.")
+
+        if period.is_locked:
+            raise CommandError(f"Payroll period {period} is locked.")
+
+        started = time.perf_counter()
+        payslip_count = period.payslips.count()
+        changed_user_ids, removed_user_ids = get_changed_payslip_user_ids(period)
+
+        if options["dry_run"]:
+            self.stdout.write(f"Changed: {changed_user_ids}")
+            self.stdout.write(f"Removed: {removed_user_ids}")
+            return
+
+        if removed_user_ids:
+            with transaction.atomic():
+                delete_payslips(period, removed_user_ids)
+        if changed_user_ids:
+            run_payroll(period, changed_user_ids)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Recomputed {len(changed_user_ids)} and removed "
+                f"{len(removed_user_ids)} of {payslip_count} payslips "
+                f"for {period} in {elapsed * 1000:.0f}ms."
+            )
+        )
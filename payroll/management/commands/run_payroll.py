@@ -0,0 +1,75 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from payroll.models import PayrollPeriod
+from payroll.utils.run_utils import (
+    execute_payroll_run,
+    get_resumable_payroll_run,
+    start_payroll_run,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute and save payslips for every employee in a payroll period, one "
+        "department shard at a time in a process pool. An interrupted run of "
+        "the period is resumed from its last completed shard."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("period_id", type=int, help="Payroll period ID.")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Worker processes; 1 computes in this process (default: CPU count).",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help=(
+                "Start a new run instead of resuming an interrupted one; a run "
+                "still marked running, as after a killed process, is failed."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        try:
+            period = PayrollPeriod.objects.get(id=options["period_id"])
+        except PayrollPeriod.DoesNotExist:
+            raise CommandError(f"Payroll period {options['period_id']} does not exist.")
+
+        if period.is_locked:
+            raise CommandError(f"Payroll period {period} is locked.")
+
+        worker_count = max(options["workers"], 1)
+        run = None if options["restart"] else get_resumable_payroll_run(period)
+        if run:
+            completed_shards = run.shards.filter(completed__isnull=False).count()
+            self.stdout.write(
+                f"Resuming run {run.id} ({completed_shards} of "
+                f"{run.shards.count()} shards already completed)."
+            )
+        else:
+            try:
+                run = start_payroll_run(period, worker_count, options["restart"])
+            except ValueError as error:
+                raise CommandError(error)
+
+        started = time.perf_counter()
+        try:
+            run = execute_payroll_run(run, worker_count)
+        except ValueError as error:
+            raise CommandError(error)
+        elapsed = time.perf_counter() - started
+
+        payslip_count = sum(run.shards.values_list("payslip_count", flat=True))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Run {run.id} computed {payslip_count} payslips in "
+                f"{run.shards.count()} shards for {period} with {worker_count} "
+                f"workers in {elapsed:.2f}s."
+            )
+        )
@@ -0,0 +1,73 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from payroll.utils.export_utils import centavos_to_decimal
+from payroll.utils.year_end_utils import run_year_end
+
+# (header, result column) of the summary file.
+SUMMARY_COLUMNS = [
+    ("Earned Basic Pay", "earned_basic_pay"),
+    ("13th Month Pay", "thirteenth_month_pay"),
+    ("Taxable 13th Month Pay", "taxable_thirteenth_month_pay"),
+    ("Annual Taxable Income", "taxable_income"),
+    ("Annual Tax Due", "annual_tax"),
+    ("Tax Withheld", "withholding_tax"),
+    ("Tax Balance", "tax_balance"),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute every employee's 13th-month pay and annual withholding tax "
+        "reconciliation for a year from the payslips paid in it, and "
+        "optionally write the summary to a CSV file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("year", type=int, help="Calendar year of the pay dates.")
+        parser.add_argument(
+            "--output", default=None, help="CSV file to write the summary to."
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            inputs, results = run_year_end(options["year"])
+        except ValueError as error:
+            raise CommandError(error)
+        elapsed = time.perf_counter() - started
+
+        if options["output"]:
+            self.write_summary(options["output"], inputs, results)
+
+        employee_count = len(results["user_ids"])
+        self.stdout.write(f"{'Employees':<24}{employee_count:>20}")
+        self.stdout.write(f"{'Payslips':<24}{int(inputs['payslip_counts'].sum()):>20}")
+        for header, column in SUMMARY_COLUMNS:
+            total = centavos_to_decimal(int(results[column].sum()))
+            self.stdout.write(f"{header:<24}{total:>20,}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Computed the {options['year']} year-end summary of "
+                f"{employee_count} employees in {elapsed * 1000:.0f}ms."
+            )
+        )
+
+    def write_summary(self, output, inputs, results):
+        columns = {column: results[column].tolist() for _, column in SUMMARY_COLUMNS}
+        with open(output, "w", newline="") as summary_file:
+            writer = csv.writer(summary_file)
+            writer.writerow(
+                ["Employee No.", "Employee", "Payslips"]
+                + [header for header, _ in SUMMARY_COLUMNS]
+            )
+            for row, (employee_number, employee_name) in enumerate(inputs["employees"]):
+                writer.writerow(
+                    [employee_number, employee_name, inputs["payslip_counts"][row]]
+                    + [
+                        centavos_to_decimal(columns[column][row])
+                        for _, column in SUMMARY_COLUMNS
+                    ]
+                )
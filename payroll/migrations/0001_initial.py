@@ -0,0 +1,388 @@
+# Generated by Django 5.0.5 on 2026-10-19 03:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("core", "0027_alter_userdetails_profile_picture_storage"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PayrollPeriod",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "start_date",
+                    models.DateField(verbose_name="Payroll Period Start Date"),
+                ),
+                ("end_date", models.DateField(verbose_name="Payroll Period End Date")),
+                (
+                    "pay_date",
+                    models.DateField(
+                        blank=True, null=True, verbose_name="Payroll Period Pay Date"
+                    ),
+                ),
+                (
+                    "frequency",
+                    models.CharField(
+                        choices=[
+                            ("SEMI_MONTHLY", "Semi-Monthly"),
+                            ("MONTHLY", "Monthly"),
+                        ],
+                        default="SEMI_MONTHLY",
+                        max_length=12,
+                        verbose_name="Payroll Period Frequency",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("DRAFT", "Draft"), ("COMPUTED", "Computed")],
+                        default="DRAFT",
+                        max_length=8,
+                        verbose_name="Payroll Period Status",
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True, null=True)),
+                ("updated", models.DateTimeField(auto_now=True, null=True)),
+            ],
+            options={
+                "verbose_name_plural": "Payroll Periods",
+            },
+        ),
+        migrations.CreateModel(
+            name="Payslip",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "days_worked",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Payslip Days Worked"
+                    ),
+                ),
+                (
+                    "late_minutes",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Payslip Late Minutes"
+                    ),
+                ),
+                (
+                    "undertime_minutes",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Payslip Undertime Minutes"
+                    ),
+                ),
+                (
+                    "overtime_minutes",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Payslip Overtime Minutes"
+                    ),
+                ),
+                (
+                    "gross_pay",
+                    models.BigIntegerField(default=0, verbose_name="Payslip Gross Pay"),
+                ),
+                (
+                    "taxable_income",
+                    models.BigIntegerField(
+                        default=0, verbose_name="Payslip Taxable Income"
+                    ),
+                ),
+                (
+                    "total_contributions",
+                    models.BigIntegerField(
+                        default=0, verbose_name="Payslip Total Contributions"
+                    ),
+                ),
+                (
+                    "withholding_tax",
+                    models.BigIntegerField(
+                        default=0, verbose_name="Payslip Withholding Tax"
+                    ),
+                ),
+                (
+                    "total_deductions",
+                    models.BigIntegerField(
+                        default=0, verbose_name="Payslip Total Deductions"
+                    ),
+                ),
+                (
+                    "net_pay",
+                    models.BigIntegerField(default=0, verbose_name="Payslip Net Pay"),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True, null=True)),
+                ("updated", models.DateTimeField(auto_now=True, null=True)),
+            ],
+            options={
+                "verbose_name_plural": "Payslips",
+            },
+        ),
+        migrations.CreateModel(
+            name="PayslipLine",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "code",
+                    models.CharField(
+                        choices=[
+                            ("BASIC", "Basic Pay"),
+                            ("OVERTIME", "Overtime Pay"),
+                            ("ALLOWANCE", "Allowance"),
+                            ("ABSENCES", "Absences"),
+                            ("LATE", "Tardiness"),
+                            ("UNDERTIME", "Undertime"),
+                            ("ADJUSTMENT", "Adjustment"),
+                            ("SSS", "SSS Contribution"),
+                            ("PHILHEALTH", "PhilHealth Contribution"),
+                            ("PAGIBIG", "Pag-IBIG Contribution"),
+                            ("TAX", "Withholding Tax"),
+                        ],
+                        max_length=10,
+                        verbose_name="Payslip Line Code",
+                    ),
+                ),
+                (
+                    "category",
+                    models.CharField(
+                        choices=[
+                            ("EARNING", "Earning"),
+                            ("DEDUCTION", "Deduction"),
+                            ("CONTRIBUTION", "Contribution"),
+                            ("TAX", "Tax"),
+                        ],
+                        max_length=12,
+                        verbose_name="Payslip Line Category",
+                    ),
+                ),
+                (
+                    "description",
+                    models.CharField(
+                        blank=True,
+                        max_length=500,
+                        null=True,
+                        verbose_name="Payslip Line Description",
+                    ),
+                ),
+                (
+                    "amount",
+                    models.BigIntegerField(
+                        default=0, verbose_name="Payslip Line Amount"
+                    ),
+                ),
+                (
+                    "is_taxable",
+                    models.BooleanField(
+                        default=True, verbose_name="Is Payslip Line Taxable"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Payslip Lines",
+            },
+        ),
+        migrations.CreateModel(
+            name="Compensation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "rate_type",
+                    models.CharField(
+                        choices=[("MONTHLY", "Monthly"), ("DAILY", "Daily")],
+                        default="MONTHLY",
+                        max_length=7,
+                        verbose_name="Compensation Rate Type",
+                    ),
+                ),
+                (
+                    "rate",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="Compensation Rate",
+                    ),
+                ),
+                (
+                    "allowance",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="Monthly Allowance",
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True, null=True)),
+                ("updated", models.DateTimeField(auto_now=True, null=True)),
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.RESTRICT,
+                        related_name="compensation",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Compensations",
+            },
+        ),
+        migrations.CreateModel(
+            name="PayrollAdjustment",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "category",
+                    models.CharField(
+                        choices=[("EARNING", "Earning"), ("DEDUCTION", "Deduction")],
+                        default="EARNING",
+                        max_length=9,
+                        verbose_name="Payroll Adjustment Category",
+                    ),
+                ),
+                (
+                    "description",
+                    models.CharField(
+                        blank=True,
+                        max_length=500,
+                        null=True,
+                        verbose_name="Payroll Adjustment Description",
+                    ),
+                ),
+                (
+                    "amount",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=12,
+                        verbose_name="Payroll Adjustment Amount",
+                    ),
+                ),
+                (
+                    "is_taxable",
+                    models.BooleanField(
+                        default=True, verbose_name="Is Payroll Adjustment Taxable"
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True, null=True)),
+                ("updated", models.DateTimeField(auto_now=True, null=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.RESTRICT,
+                        related_name="payroll_adjustments",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Payroll Adjustments",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="payrollperiod",
+            constraint=models.UniqueConstraint(
+                fields=("start_date", "end_date"), name="payroll_period_dates"
+            ),
+        ),
+        migrations.AddField(
+            model_name="payrolladjustment",
+            name="period",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.RESTRICT,
+                related_name="adjustments",
+                to="payroll.payrollperiod",
+            ),
+        ),
+        migrations.AddField(
+            model_name="payslip",
+            name="department",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.RESTRICT,
+                related_name="payslips",
+                to="core.department",
+            ),
+        ),
+        migrations.AddField(
+            model_name="payslip",
+            name="period",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.RESTRICT,
+                related_name="payslips",
+                to="payroll.payrollperiod",
+            ),
+        ),
+        migrations.AddField(
+            model_name="payslip",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.RESTRICT,
+                related_name="payslips",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="payslipline",
+            name="payslip",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.RESTRICT,
+                related_name="lines",
+                to="payroll.payslip",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="payslip",
+            constraint=models.UniqueConstraint(
+                fields=("period", "user"), name="payroll_payslip_period_user"
+            ),
+        ),
+    ]
@@ -0,0 +1,124 @@
+# Generated by Django 5.0.5 on 2026-10-19 04:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payroll", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StatutoryBracket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "lower_bound",
+                    models.DecimalField(
+                        decimal_places=2,
+                        max_digits=14,
+                        verbose_name="Statutory Bracket Lower Bound",
+                    ),
+                ),
+                (
+                    "base_amount",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=14,
+                        verbose_name="Statutory Bracket Base Amount",
+                    ),
+                ),
+                (
+                    "rate",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=6,
+                        verbose_name="Statutory Bracket Rate (%)",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Statutory Brackets",
+            },
+        ),
+        migrations.CreateModel(
+            name="StatutoryTable",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("SSS", "SSS Contribution"),
+                            ("PHILHEALTH", "PhilHealth Contribution"),
+                            ("PAGIBIG", "Pag-IBIG Contribution"),
+                            ("WTAX_SEMI", "Semi-Monthly Withholding Tax"),
+                            ("WTAX_MONTH", "Monthly Withholding Tax"),
+                        ],
+                        max_length=10,
+                        verbose_name="Statutory Table Kind",
+                    ),
+                ),
+                (
+                    "effective_date",
+                    models.DateField(verbose_name="Statutory Table Effective Date"),
+                ),
+                (
+                    "description",
+                    models.CharField(
+                        blank=True,
+                        max_length=500,
+                        null=True,
+                        verbose_name="Statutory Table Description",
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True, null=True)),
+                ("updated", models.DateTimeField(auto_now=True, null=True)),
+            ],
+            options={
+                "verbose_name_plural": "Statutory Tables",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="statutorytable",
+            constraint=models.UniqueConstraint(
+                fields=("kind", "effective_date"), name="payroll_statutory_table_date"
+            ),
+        ),
+        migrations.AddField(
+            model_name="statutorybracket",
+            name="table",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.RESTRICT,
+                related_name="brackets",
+                to="payroll.statutorytable",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="statutorybracket",
+            constraint=models.UniqueConstraint(
+                fields=("table", "lower_bound"), name="payroll_statutory_bracket_bound"
+            ),
+        ),
+    ]
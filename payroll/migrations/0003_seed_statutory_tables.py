@@ -0,0 +1,103 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db import migrations
+
+
+def get_sss_brackets(minimum_credit, maximum_credit, employee_rate):
+    # Compensation within 250 of a salary credit pays the share of that credit.
+    brackets = [("0", minimum_credit * employee_rate, "0")]
+    for credit in range(minimum_credit + 500, maximum_credit + 1, 500):
+        brackets.append((credit - 250, credit * employee_rate, "0"))
+    return brackets
+
+
+# (kind, effective date, description, [(lower bound, base amount, rate %)])
+STATUTORY_TABLES = [
+    (
+        "SSS",
+        date(2023, 1, 1),
+        "SSS Circular 2022-033, employee share 4.5%",
+        get_sss_brackets(4000, 30000, Decimal("0.045")),
+    ),
+    (
+        "SSS",
+        date(2025, 1, 1),
+        "SSS Circular 2024-006, employee share 5%",
+        get_sss_brackets(5000, 35000, Decimal("0.05")),
+    ),
+    (
+        "PHILHEALTH",
+        date(2024, 1, 1),
+        "PhilHealth premium 5%, employee share half",
+        [("0", "250", "0"), ("10000", "250", "2.5"), ("100000", "2500", "0")],
+    ),
+    (
+        "PAGIBIG",
+        date(2024, 2, 1),
+        "Pag-IBIG Circular 460, maximum fund salary 10,000",
+        [("0", "0", "1"), ("1500.01", "30", "2"), ("10000", "200", "0")],
+    ),
+    (
+        "WTAX_SEMI",
+        date(2023, 1, 1),
+        "BIR withholding tax on compensation (TRAIN), semi-monthly",
+        [
+            ("0", "0", "0"),
+            ("10417", "0", "15"),
+            ("16667", "937.50", "20"),
+            ("33333", "4270.70", "25"),
+            ("83333", "16770.70", "30"),
+            ("333333", "91770.70", "35"),
+        ],
+    ),
+    (
+        "WTAX_MONTH",
+        date(2023, 1, 1),
+        "BIR withholding tax on compensation (TRAIN), monthly",
+        [
+            ("0", "0", "0"),
+            ("20833", "0", "15"),
+            ("33333", "1875", "20"),
+            ("66667", "8541.80", "25"),
+            ("166667", "33541.80", "30"),
+            ("666667", "183541.80", "35"),
+        ],
+    ),
+]
+
+
+def seed_statutory_tables(apps, schema_editor):
+    statutory_table_model = apps.get_model("payroll", "StatutoryTable")
+    statutory_bracket_model = apps.get_model("payroll", "StatutoryBracket")
+
+    for kind, effective_date, description, brackets in STATUTORY_TABLES:
+        table, created = statutory_table_model.objects.get_or_create(
+            kind=kind,
+            effective_date=effective_date,
+            defaults={"description": description},
+        )
+        if not created:
+            continue
+        statutory_bracket_model.objects.bulk_create(
+            [
+                statutory_bracket_model(
+                    table=table,
+                    lower_bound=Decimal(lower_bound),
+                    base_amount=Decimal(base_amount),
+                    rate=Decimal(rate),
+                )
+                for lower_bound, base_amount, rate in brackets
+            ]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payroll", "0002_statutorytable"),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_statutory_tables, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,121 @@
+# Generated by Django 5.0.5 on 2026-10-19 04:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0027_alter_userdetails_profile_picture_storage"),
+        ("payroll", "0003_seed_statutory_tables"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PayrollRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("RUNNING", "Running"),
+                            ("COMPLETED", "Completed"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="RUNNING",
+                        max_length=9,
+                        verbose_name="Payroll Run Status",
+                    ),
+                ),
+                (
+                    "worker_count",
+                    models.PositiveIntegerField(
+                        default=1, verbose_name="Payroll Run Workers"
+                    ),
+                ),
+                ("started", models.DateTimeField(auto_now_add=True, null=True)),
+                (
+                    "completed",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Payroll Run Completed"
+                    ),
+                ),
+                (
+                    "period",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.RESTRICT,
+                        related_name="runs",
+                        to="payroll.payrollperiod",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Payroll Runs",
+            },
+        ),
+        migrations.CreateModel(
+            name="PayrollRunShard",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "user_ids",
+                    models.JSONField(
+                        default=list, verbose_name="Payroll Run Shard User IDs"
+                    ),
+                ),
+                (
+                    "payslip_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Payroll Run Shard Payslip Count"
+                    ),
+                ),
+                (
+                    "completed",
+                    models.DateTimeField(
+                        blank=True,
+                        null=True,
+                        verbose_name="Payroll Run Shard Completed",
+                    ),
+                ),
+                (
+                    "department",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.RESTRICT,
+                        related_name="+",
+                        to="core.department",
+                    ),
+                ),
+                (
+                    "run",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.RESTRICT,
+                        related_name="shards",
+                        to="payroll.payrollrun",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Payroll Run Shards",
+            },
+        ),
+    ]
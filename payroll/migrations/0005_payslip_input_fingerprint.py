@@ -0,0 +1,23 @@
+# Generated by Django 5.0.5 on 2026-10-19 04:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payroll", "0004_payrollrun"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="payslip",
+            name="input_fingerprint",
+            field=models.CharField(
+                blank=True,
+                max_length=64,
+                null=True,
+                verbose_name="Payslip Input Fingerprint",
+            ),
+        ),
+    ]
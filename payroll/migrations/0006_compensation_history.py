@@ -0,0 +1,47 @@
+# Generated by Django 5.0.5 on 2026-10-19 04:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payroll", "0005_payslip_input_fingerprint"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="compensation",
+            name="rank",
+            field=models.CharField(
+                blank=True,
+                max_length=500,
+                null=True,
+                verbose_name="Compensation Rank",
+            ),
+        ),
+        migrations.AddField(
+            model_name="compensation",
+            name="valid_from",
+            field=models.DateField(null=True, verbose_name="Compensation Valid From"),
+        ),
+        migrations.AddField(
+            model_name="compensation",
+            name="valid_to",
+            field=models.DateField(
+                blank=True, null=True, verbose_name="Compensation Valid To"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="compensation",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.RESTRICT,
+                related_name="compensations",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
@@ -0,0 +1,39 @@
+import datetime
+
+from django.db import migrations
+
+
+def backfill_compensation_history(apps, schema_editor):
+    compensation_model = apps.get_model("payroll", "Compensation")
+    user_details_model = apps.get_model("core", "UserDetails")
+
+    user_details = {
+        details.user_id: details
+        for details in user_details_model.objects.only(
+            "user_id", "date_of_hiring", "rank"
+        )
+    }
+    compensations = list(compensation_model.objects.all())
+    # Until now an employee's compensation applied to every period, so it
+    # stays valid from hiring, or from the start when that is unknown.
+    for compensation in compensations:
+        details = user_details.get(compensation.user_id)
+        compensation.rank = details.rank if details else None
+        compensation.valid_from = (
+            details and details.date_of_hiring
+        ) or datetime.date.min
+    compensation_model.objects.bulk_update(
+        compensations, ["rank", "valid_from"], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0028_userdetails_bank_account_number"),
+        ("payroll", "0006_compensation_history"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_compensation_history, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.0.5 on 2026-10-19 04:20
+
+from django.db import migrations, models
+
+# Overlapping validities of one employee are rejected by the database where it
+# can: PostgreSQL's btree_gist lets a GiST exclusion constraint combine the
+# user equality with the date range overlap.
+CREATE_EXCLUSION_CONSTRAINT = """
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+ALTER TABLE payroll_compensation
+    ADD CONSTRAINT payroll_compensation_no_overlap
+    EXCLUDE USING gist (
+        user_id WITH =,
+        daterange(valid_from, valid_to, '[]') WITH &&
+    );
+"""
+DROP_EXCLUSION_CONSTRAINT = """
+ALTER TABLE payroll_compensation
+    DROP CONSTRAINT IF EXISTS payroll_compensation_no_overlap;
+"""
+
+
+def add_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(CREATE_EXCLUSION_CONSTRAINT)
+
+
+def remove_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(DROP_EXCLUSION_CONSTRAINT)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payroll", "0007_backfill_compensation_history"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="compensation",
+            name="valid_from",
+            field=models.DateField(verbose_name="Compensation Valid From"),
+        ),
+        migrations.AddIndex(
+            model_name="compensation",
+            index=models.Index(
+                fields=["user", "valid_from"], name="payroll_compensation_from"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="compensation",
+            constraint=models.CheckConstraint(
+                check=models.Q(
+                    ("valid_to__isnull", True),
+                    ("valid_to__gte", models.F("valid_from")),
+                    _connector="OR",
+                ),
+                name="payroll_compensation_validity",
+            ),
+        ),
+        migrations.RunPython(add_exclusion_constraint, remove_exclusion_constraint),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.0.5 on 2026-10-19 04:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payroll", "0008_compensation_validity"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="payrollperiod",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("DRAFT", "Draft"),
+                    ("COMPUTED", "Computed"),
+                    ("LOCKED", "Locked"),
+                ],
+                default="DRAFT",
+                max_length=8,
+                verbose_name="Payroll Period Status",
+            ),
+        ),
+        migrations.CreateModel(
+            name="PayrollSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("data", models.BinaryField(verbose_name="Payroll Snapshot Data")),
+                (
+                    "content_hash",
+                    models.CharField(
+                        max_length=64, verbose_name="Payroll Snapshot Content Hash"
+                    ),
+                ),
+                (
+                    "payslip_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Payroll Snapshot Payslip Count"
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True, null=True)),
+                (
+                    "period",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.RESTRICT,
+                        related_name="snapshots",
+                        to="payroll.payrollperiod",
+                    ),
+                ),
+                (
+                    "run",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.RESTRICT,
+                        related_name="snapshots",
+                        to="payroll.payrollrun",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Payroll Snapshots",
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.5 on 2026-10-19 04:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payroll", "0009_payrollsnapshot"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="statutorytable",
+            name="kind",
+            field=models.CharField(
+                choices=[
+                    ("SSS", "SSS Contribution"),
+                    ("PHILHEALTH", "PhilHealth Contribution"),
+                    ("PAGIBIG", "Pag-IBIG Contribution"),
+                    ("WTAX_SEMI", "Semi-Monthly Withholding Tax"),
+                    ("WTAX_MONTH", "Monthly Withholding Tax"),
+                    ("WTAX_YEAR", "Annual Income Tax"),
+                ],
+                max_length=10,
+                verbose_name="Statutory Table Kind",
+            ),
+        ),
+    ]
@@ -0,0 +1,57 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db import migrations
+
+# (kind, effective date, description, [(lower bound, base amount, rate %)])
+STATUTORY_TABLES = [
+    (
+        "WTAX_YEAR",
+        date(2023, 1, 1),
+        "BIR income tax on compensation (TRAIN), annual",
+        [
+            ("0", "0", "0"),
+            ("250000", "0", "15"),
+            ("400000", "22500", "20"),
+            ("800000", "102500", "25"),
+            ("2000000", "402500", "30"),
+            ("8000000", "2202500", "35"),
+        ],
+    ),
+]
+
+
+def seed_annual_income_tax_table(apps, schema_editor):
+    statutory_table_model = apps.get_model("payroll", "StatutoryTable")
+    statutory_bracket_model = apps.get_model("payroll", "StatutoryBracket")
+
+    for kind, effective_date, description, brackets in STATUTORY_TABLES:
+        table, created = statutory_table_model.objects.get_or_create(
+            kind=kind,
+            effective_date=effective_date,
+            defaults={"description": description},
+        )
+        if not created:
+            continue
+        statutory_bracket_model.objects.bulk_create(
+            [
+                statutory_bracket_model(
+                    table=table,
+                    lower_bound=Decimal(lower_bound),
+                    base_amount=Decimal(base_amount),
+                    rate=Decimal(rate),
+                )
+                for lower_bound, base_amount, rate in brackets
+            ]
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payroll", "0010_alter_statutorytable_kind"),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_annual_income_tax_table, migrations.RunPython.noop),
+    ]
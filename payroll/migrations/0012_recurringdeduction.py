@@ -0,0 +1,219 @@
+# Generated by Django 5.0.5 on 2026-10-19 04:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payroll", "0011_seed_annual_income_tax_table"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="payslipline",
+            name="code",
+            field=models.CharField(
+                choices=[
+                    ("BASIC", "Basic Pay"),
+                    ("OVERTIME", "Overtime Pay"),
+                    ("ALLOWANCE", "Allowance"),
+                    ("ABSENCES", "Absences"),
+                    ("LATE", "Tardiness"),
+                    ("UNDERTIME", "Undertime"),
+                    ("ADJUSTMENT", "Adjustment"),
+                    ("SSS", "SSS Contribution"),
+                    ("PHILHEALTH", "PhilHealth Contribution"),
+                    ("PAGIBIG", "Pag-IBIG Contribution"),
+                    ("TAX", "Withholding Tax"),
+                    ("LOAN", "Loan / Recurring Deduction"),
+                ],
+                max_length=10,
+                verbose_name="Payslip Line Code",
+            ),
+        ),
+        migrations.CreateModel(
+            name="RecurringDeduction",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("SSS_LOAN", "SSS Salary Loan"),
+                            ("PAGIBIG_LOAN", "Pag-IBIG Multi-Purpose Loan"),
+                            ("COMPANY_LOAN", "Company Loan"),
+                            ("OTHER", "Other Recurring Deduction"),
+                        ],
+                        default="COMPANY_LOAN",
+                        max_length=12,
+                        verbose_name="Recurring Deduction Kind",
+                    ),
+                ),
+                (
+                    "description",
+                    models.CharField(
+                        blank=True,
+                        max_length=500,
+                        null=True,
+                        verbose_name="Recurring Deduction Description",
+                    ),
+                ),
+                (
+                    "principal",
+                    models.DecimalField(
+                        decimal_places=2,
+                        max_digits=12,
+                        verbose_name="Recurring Deduction Principal",
+                    ),
+                ),
+                (
+                    "interest_rate",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=6,
+                        verbose_name="Recurring Deduction Annual Interest Rate (%)",
+                    ),
+                ),
+                (
+                    "frequency",
+                    models.CharField(
+                        choices=[
+                            ("SEMI_MONTHLY", "Semi-Monthly"),
+                            ("MONTHLY", "Monthly"),
+                        ],
+                        default="SEMI_MONTHLY",
+                        max_length=12,
+                        verbose_name="Recurring Deduction Frequency",
+                    ),
+                ),
+                (
+                    "installment_count",
+                    models.PositiveIntegerField(
+                        verbose_name="Recurring Deduction Installments"
+                    ),
+                ),
+                (
+                    "start_date",
+                    models.DateField(verbose_name="Recurring Deduction Start Date"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("APPROVED", "Approved"),
+                            ("CANCELLED", "Cancelled"),
+                        ],
+                        default="PENDING",
+                        max_length=9,
+                        verbose_name="Recurring Deduction Status",
+                    ),
+                ),
+                (
+                    "approved",
+                    models.DateTimeField(
+                        blank=True,
+                        null=True,
+                        verbose_name="Recurring Deduction Approved",
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True, null=True)),
+                ("updated", models.DateTimeField(auto_now=True, null=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.RESTRICT,
+                        related_name="recurring_deductions",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Recurring Deductions",
+            },
+        ),
+        migrations.CreateModel(
+            name="DeductionInstallment",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "sequence",
+                    models.PositiveIntegerField(
+                        verbose_name="Deduction Installment Sequence"
+                    ),
+                ),
+                (
+                    "due_date",
+                    models.DateField(verbose_name="Deduction Installment Due Date"),
+                ),
+                (
+                    "amount",
+                    models.BigIntegerField(
+                        default=0, verbose_name="Deduction Installment Amount"
+                    ),
+                ),
+                (
+                    "principal_amount",
+                    models.BigIntegerField(
+                        default=0, verbose_name="Deduction Installment Principal"
+                    ),
+                ),
+                (
+                    "interest_amount",
+                    models.BigIntegerField(
+                        default=0, verbose_name="Deduction Installment Interest"
+                    ),
+                ),
+                (
+                    "remaining_balance",
+                    models.BigIntegerField(
+                        default=0,
+                        verbose_name="Deduction Installment Remaining Balance",
+                    ),
+                ),
+                (
+                    "deduction",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.RESTRICT,
+                        related_name="installments",
+                        to="payroll.recurringdeduction",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Deduction Installments",
+                "indexes": [
+                    models.Index(
+                        fields=["due_date"], name="payroll_installment_due_date"
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="deductioninstallment",
+            constraint=models.UniqueConstraint(
+                fields=("deduction", "sequence"), name="payroll_installment_sequence"
+            ),
+        ),
+    ]
@@ -1,3 +1,550 @@
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import F, Q
+from django.utils.translation import gettext_lazy as _
+
+from core.models import Department
+
 
 # Create your models here.
+class Compensation(models.Model):
+
+    class RateType(models.TextChoices):
+        MONTHLY = "MONTHLY", _("Monthly")
+        DAILY = "DAILY", _("Daily")
+
+    # Each employee has a history of compensations; the one in effect on a
+    # date is the one whose validity covers it. Validities never overlap.
+    user = models.ForeignKey(
+        User, on_delete=models.RESTRICT, related_name="compensations"
+    )
+    rank = models.CharField(
+        _("Compensation Rank"), max_length=500, null=True, blank=True
+    )
+    rate_type = models.CharField(
+        _("Compensation Rate Type"),
+        choices=RateType.choices,
+        max_length=7,
+        default=RateType.MONTHLY,
+    )
+    rate = models.DecimalField(
+        _("Compensation Rate"), max_digits=12, decimal_places=2, default=0
+    )
+    # Non-taxable (de minimis) allowance, spread evenly over the month's periods.
+    allowance = models.DecimalField(
+        _("Monthly Allowance"), max_digits=12, decimal_places=2, default=0
+    )
+    valid_from = models.DateField(_("Compensation Valid From"))
+    # Inclusive; empty while the compensation is the current one.
+    valid_to = models.DateField(_("Compensation Valid To"), null=True, blank=True)
+    created = models.DateTimeField(auto_now_add=True, null=True, blank=True)
+    updated = models.DateTimeField(auto_now=True, null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Compensations"
+        indexes = [
+            models.Index(
+                fields=["user", "valid_from"], name="payroll_compensation_from"
+            ),
+        ]
+        # On PostgreSQL an exclusion constraint (see migration 0008_compensation_validity) also
+        # rejects overlapping validities of the same employee.
+        constraints = [
+            models.CheckConstraint(
+                check=Q(valid_to__isnull=True) | Q(valid_to__gte=F("valid_from")),
+                name="payroll_compensation_validity",
+            ),
+        ]
+
+    def __str__(self):
+        return (
+            f"{self.user.get_full_name()} - {self.rate} "
+            f"({self.get_rate_type_display()}) from {self.valid_from}"
+        )
+
+    def clean(self):
+        if not self.user_id or not self.valid_from:
+            return
+        overlapping_compensations = Compensation.objects.filter(
+            Q(valid_to__isnull=True) | Q(valid_to__gte=self.valid_from),
+            user_id=self.user_id,
+        ).exclude(id=self.id)
+        if self.valid_to:
+            overlapping_compensations = overlapping_compensations.filter(
+                valid_from__lte=self.valid_to
+            )
+        if overlapping_compensations.exists():
+            raise ValidationError(
+                _("The validity overlaps another compensation of this employee.")
+            )
+
+
+class PayrollPeriod(models.Model):
+
+    class Frequency(models.TextChoices):
+        SEMI_MONTHLY = "SEMI_MONTHLY", _("Semi-Monthly")
+        MONTHLY = "MONTHLY", _("Monthly")
+
+    class Status(models.TextChoices):
+        DRAFT = "DRAFT", _("Draft")
+        COMPUTED = "COMPUTED", _("Computed")
+        # Approved: payslips can no longer be recomputed, and reports read the
+        # period's latest snapshot instead of the live tables.
+        LOCKED = "LOCKED", _("Locked")
+
+    start_date = models.DateField(_("Payroll Period Start Date"))
+    end_date = models.DateField(_("Payroll Period End Date"))
+    pay_date = models.DateField(_("Payroll Period Pay Date"), null=True, blank=True)
+    frequency = models.CharField(
+        _("Payroll Period Frequency"),
+        choices=Frequency.choices,
+        max_length=12,
+        default=Frequency.SEMI_MONTHLY,
+    )
+    status = models.CharField(
+        _("Payroll Period Status"),
+        choices=Status.choices,
+        max_length=8,
+        default=Status.DRAFT,
+    )
+    created = models.DateTimeField(auto_now_add=True, null=True, blank=True)
+    updated = models.DateTimeField(auto_now=True, null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Payroll Periods"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["start_date", "end_date"], name="payroll_period_dates"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.start_date} - {self.end_date} ({self.get_status_display()})"
+
+    @property
+    def periods_per_month(self):
+        return 2 if self.frequency == self.Frequency.SEMI_MONTHLY else 1
+
+    @property
+    def is_locked(self):
+        return self.status == self.Status.LOCKED
+
+
+class PayrollAdjustment(models.Model):
+
+    class Category(models.TextChoices):
+        EARNING = "EARNING", _("Earning")
+        DEDUCTION = "DEDUCTION", _("Deduction")
+
+    period = models.ForeignKey(
+        PayrollPeriod, on_delete=models.RESTRICT, related_name="adjustments"
+    )
+    user = models.ForeignKey(
+        User, on_delete=models.RESTRICT, related_name="payroll_adjustments"
+    )
+    category = models.CharField(
+        _("Payroll Adjustment Category"),
+        choices=Category.choices,
+        max_length=9,
+        default=Category.EARNING,
+    )
+    description = models.CharField(
+        _("Payroll Adjustment Description"), max_length=500, null=True, blank=True
+    )
+    amount = models.DecimalField(
+        _("Payroll Adjustment Amount"), max_digits=12, decimal_places=2, default=0
+    )
+    is_taxable = models.BooleanField(_("Is Payroll Adjustment Taxable"), default=True)
+    created = models.DateTimeField(auto_now_add=True, null=True, blank=True)
+    updated = models.DateTimeField(auto_now=True, null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Payroll Adjustments"
+
+    def __str__(self):
+        return f"{self.user.get_full_name()} - {self.description} ({self.amount})"
+
+    def clean(self):
+        if self.period_id and self.period.is_locked:
+            raise ValidationError(_("The payroll period is locked."))
+
+
+class RecurringDeduction(models.Model):
+
+    class Kind(models.TextChoices):
+        SSS_LOAN = "SSS_LOAN", _("SSS Salary Loan")
+        PAGIBIG_LOAN = "PAGIBIG_LOAN", _("Pag-IBIG Multi-Purpose Loan")
+        COMPANY_LOAN = "COMPANY_LOAN", _("Company Loan")
+        OTHER = "OTHER", _("Other Recurring Deduction")
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", _("Pending")
+        APPROVED = "APPROVED", _("Approved")
+        CANCELLED = "CANCELLED", _("Cancelled")
+
+    user = models.ForeignKey(
+        User, on_delete=models.RESTRICT, related_name="recurring_deductions"
+    )
+    kind = models.CharField(
+        _("Recurring Deduction Kind"),
+        choices=Kind.choices,
+        max_length=12,
+        default=Kind.COMPANY_LOAN,
+    )
+    description = models.CharField(
+        _("Recurring Deduction Description"), max_length=500, null=True, blank=True
+    )
+    # For deductions that are not loans, the total to deduct, without interest.
+    principal = models.DecimalField(
+        _("Recurring Deduction Principal"), max_digits=12, decimal_places=2
+    )
+    interest_rate = models.DecimalField(
+        _("Recurring Deduction Annual Interest Rate (%)"),
+        max_digits=6,
+        decimal_places=2,
+        default=0,
+    )
+    frequency = models.CharField(
+        _("Recurring Deduction Frequency"),
+        choices=PayrollPeriod.Frequency.choices,
+        max_length=12,
+        default=PayrollPeriod.Frequency.SEMI_MONTHLY,
+    )
+    installment_count = models.PositiveIntegerField(
+        _("Recurring Deduction Installments")
+    )
+    # Installments fall due on payroll period end dates from this date on.
+    start_date = models.DateField(_("Recurring Deduction Start Date"))
+    status = models.CharField(
+        _("Recurring Deduction Status"),
+        choices=Status.choices,
+        max_length=9,
+        default=Status.PENDING,
+    )
+    approved = models.DateTimeField(
+        _("Recurring Deduction Approved"), null=True, blank=True
+    )
+    created = models.DateTimeField(auto_now_add=True, null=True, blank=True)
+    updated = models.DateTimeField(auto_now=True, null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Recurring Deductions"
+
+    def __str__(self):
+        return (
+            f"{self.user.get_full_name()} - {self.get_kind_display()} "
+            f"{self.principal} ({self.get_status_display()})"
+        )
+
+    def clean(self):
+        if self.installment_count is not None and self.installment_count < 1:
+            raise ValidationError(
+                {"installment_count": _("There must be at least one installment.")}
+            )
+
+
+class DeductionInstallment(models.Model):
+    # Materialized when the deduction is approved; a payroll run only reads
+    # the installments that fall due in its period.
+    deduction = models.ForeignKey(
+        RecurringDeduction, on_delete=models.RESTRICT, related_name="installments"
+    )
+    sequence = models.PositiveIntegerField(_("Deduction Installment Sequence"))
+    due_date = models.DateField(_("Deduction Installment Due Date"))
+    # Amounts are integer centavos; the amount is principal plus interest.
+    amount = models.BigIntegerField(_("Deduction Installment Amount"), default=0)
+    principal_amount = models.BigIntegerField(
+        _("Deduction Installment Principal"), default=0
+    )
+    interest_amount = models.BigIntegerField(
+        _("Deduction Installment Interest"), default=0
+    )
+    # Principal still owed once this installment is deducted.
+    remaining_balance = models.BigIntegerField(
+        _("Deduction Installment Remaining Balance"), default=0
+    )
+
+    class Meta:
+        verbose_name_plural = "Deduction Installments"
+        indexes = [
+            models.Index(fields=["due_date"], name="payroll_installment_due_date"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["deduction", "sequence"], name="payroll_installment_sequence"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.deduction} - {self.sequence} ({self.due_date})"
+
+
+def check_payroll_period_unlocked(period_id):
+    # Read from the database rather than from a loaded period, whose status
+    # may be out of date.
+    locked_period = PayrollPeriod.objects.filter(
+        id=period_id, status=PayrollPeriod.Status.LOCKED
+    ).first()
+    if locked_period is not None:
+        raise ValueError(f"Payroll period {locked_period} is locked.")
+
+
+class Payslip(models.Model):
+    period = models.ForeignKey(
+        PayrollPeriod, on_delete=models.RESTRICT, related_name="payslips"
+    )
+    user = models.ForeignKey(User, on_delete=models.RESTRICT, related_name="payslips")
+    department = models.ForeignKey(
+        Department,
+        on_delete=models.RESTRICT,
+        null=True,
+        blank=True,
+        related_name="payslips",
+    )
+    days_worked = models.PositiveIntegerField(_("Payslip Days Worked"), default=0)
+    late_minutes = models.PositiveIntegerField(_("Payslip Late Minutes"), default=0)
+    undertime_minutes = models.PositiveIntegerField(
+        _("Payslip Undertime Minutes"), default=0
+    )
+    overtime_minutes = models.PositiveIntegerField(
+        _("Payslip Overtime Minutes"), default=0
+    )
+    # Amounts are integer centavos.
+    gross_pay = models.BigIntegerField(_("Payslip Gross Pay"), default=0)
+    taxable_income = models.BigIntegerField(_("Payslip Taxable Income"), default=0)
+    total_contributions = models.BigIntegerField(
+        _("Payslip Total Contributions"), default=0
+    )
+    withholding_tax = models.BigIntegerField(_("Payslip Withholding Tax"), default=0)
+    total_deductions = models.BigIntegerField(_("Payslip Total Deductions"), default=0)
+    net_pay = models.BigIntegerField(_("Payslip Net Pay"), default=0)
+    # Hash of the versions of every input the payslip was computed from; a
+    # recompute only recalculates payslips whose inputs hash differently now.
+    input_fingerprint = models.CharField(
+        _("Payslip Input Fingerprint"), max_length=64, null=True, blank=True
+    )
+    created = models.DateTimeField(auto_now_add=True, null=True, blank=True)
+    updated = models.DateTimeField(auto_now=True, null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Payslips"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["period", "user"], name="payroll_payslip_period_user"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user.get_full_name()} - {self.period} ({self.net_pay})"
+
+    # Payslips of a locked period are frozen: its snapshot must keep matching
+    # them. The payroll engine writes in bulk and checks the lock itself.
+    def clean(self):
+        if self.period_id and self.period.is_locked:
+            raise ValidationError(_("The payroll period is locked."))
+
+    def save(self, *args, **kwargs):
+        check_payroll_period_unlocked(self.period_id)
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        check_payroll_period_unlocked(self.period_id)
+        return super().delete(*args, **kwargs)
+
+
+class PayslipLine(models.Model):
+
+    class Code(models.TextChoices):
+        BASIC = "BASIC", _("Basic Pay")
+        OVERTIME = "OVERTIME", _("Overtime Pay")
+        ALLOWANCE = "ALLOWANCE", _("Allowance")
+        ABSENCES = "ABSENCES", _("Absences")
+        LATE = "LATE", _("Tardiness")
+        UNDERTIME = "UNDERTIME", _("Undertime")
+        ADJUSTMENT = "ADJUSTMENT", _("Adjustment")
+        SSS = "SSS", _("SSS Contribution")
+        PHILHEALTH = "PHILHEALTH", _("PhilHealth Contribution")
+        PAGIBIG = "PAGIBIG", _("Pag-IBIG Contribution")
+        WITHHOLDING_TAX = "TAX", _("Withholding Tax")
+        LOAN = "LOAN", _("Loan / Recurring Deduction")
+
+    class Category(models.TextChoices):
+        EARNING = "EARNING", _("Earning")
+        DEDUCTION = "DEDUCTION", _("Deduction")
+        CONTRIBUTION = "CONTRIBUTION", _("Contribution")
+        TAX = "TAX", _("Tax")
+
+    payslip = models.ForeignKey(
+        Payslip, on_delete=models.RESTRICT, related_name="lines"
+    )
+    code = models.CharField(_("Payslip Line Code"), choices=Code.choices, max_length=10)
+    category = models.CharField(
+        _("Payslip Line Category"), choices=Category.choices, max_length=12
+    )
+    description = models.CharField(
+        _("Payslip Line Description"), max_length=500, null=True, blank=True
+    )
+    # Integer centavos, always positive; the category gives the direction.
+    amount = models.BigIntegerField(_("Payslip Line Amount"), default=0)
+    # Taxable lines count toward taxable income: earnings add to it, deductions
+    # and contributions subtract from it.
+    is_taxable = models.BooleanField(_("Is Payslip Line Taxable"), default=True)
+
+    class Meta:
+        verbose_name_plural = "Payslip Lines"
+
+    def __str__(self):
+        return f"{self.payslip} - {self.get_code_display()} ({self.amount})"
+
+    def clean(self):
+        if self.payslip_id and self.payslip.period.is_locked:
+            raise ValidationError(_("The payroll period is locked."))
+
+    def save(self, *args, **kwargs):
+        check_payroll_period_unlocked(self.payslip.period_id)
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        check_payroll_period_unlocked(self.payslip.period_id)
+        return super().delete(*args, **kwargs)
+
+
+class PayrollRun(models.Model):
+
+    class Status(models.TextChoices):
+        RUNNING = "RUNNING", _("Running")
+        COMPLETED = "COMPLETED", _("Completed")
+        FAILED = "FAILED", _("Failed")
+
+    period = models.ForeignKey(
+        PayrollPeriod, on_delete=models.RESTRICT, related_name="runs"
+    )
+    status = models.CharField(
+        _("Payroll Run Status"),
+        choices=Status.choices,
+        max_length=9,
+        default=Status.RUNNING,
+    )
+    worker_count = models.PositiveIntegerField(_("Payroll Run Workers"), default=1)
+    started = models.DateTimeField(auto_now_add=True, null=True, blank=True)
+    completed = models.DateTimeField(_("Payroll Run Completed"), null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Payroll Runs"
+
+    def __str__(self):
+        return f"{self.period} - {self.get_status_display()} ({self.started})"
+
+
+class PayrollRunShard(models.Model):
+    run = models.ForeignKey(
+        PayrollRun, on_delete=models.RESTRICT, related_name="shards"
+    )
+    department = models.ForeignKey(
+        Department, on_delete=models.RESTRICT, null=True, blank=True, related_name="+"
+    )
+    # Employees are fixed when the run starts, so a resumed run computes the
+    # same people even if someone changed department in between.
+    user_ids = models.JSONField(_("Payroll Run Shard User IDs"), default=list)
+    payslip_count = models.PositiveIntegerField(
+        _("Payroll Run Shard Payslip Count"), default=0
+    )
+    # Checkpoint: set in the same transaction that saves the shard's payslips.
+    completed = models.DateTimeField(
+        _("Payroll Run Shard Completed"), null=True, blank=True
+    )
+
+    class Meta:
+        verbose_name_plural = "Payroll Run Shards"
+
+    def __str__(self):
+        return f"{self.run} - {self.department} ({self.completed})"
+
+
+class PayrollSnapshot(models.Model):
+    period = models.ForeignKey(
+        PayrollPeriod, on_delete=models.RESTRICT, related_name="snapshots"
+    )
+    # The run that last computed the period when it was locked, if any.
+    run = models.ForeignKey(
+        PayrollRun,
+        on_delete=models.RESTRICT,
+        null=True,
+        blank=True,
+        related_name="snapshots",
+    )
+    # zlib-compressed canonical JSON of the period's inputs and payslips.
+    data = models.BinaryField(_("Payroll Snapshot Data"))
+    # SHA-256 of the uncompressed JSON, checked whenever the data is read.
+    content_hash = models.CharField(_("Payroll Snapshot Content Hash"), max_length=64)
+    payslip_count = models.PositiveIntegerField(
+        _("Payroll Snapshot Payslip Count"), default=0
+    )
+    created = models.DateTimeField(auto_now_add=True, null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Payroll Snapshots"
+
+    def __str__(self):
+        return f"{self.period} - {self.content_hash[:12]} ({self.created})"
+
+
+class StatutoryTable(models.Model):
+
+    class Kind(models.TextChoices):
+        SSS = "SSS", _("SSS Contribution")
+        PHILHEALTH = "PHILHEALTH", _("PhilHealth Contribution")
+        PAGIBIG = "PAGIBIG", _("Pag-IBIG Contribution")
+        SEMI_MONTHLY_WITHHOLDING_TAX = "WTAX_SEMI", _("Semi-Monthly Withholding Tax")
+        MONTHLY_WITHHOLDING_TAX = "WTAX_MONTH", _("Monthly Withholding Tax")
+        ANNUAL_INCOME_TAX = "WTAX_YEAR", _("Annual Income Tax")
+
+    kind = models.CharField(
+        _("Statutory Table Kind"), choices=Kind.choices, max_length=10
+    )
+    effective_date = models.DateField(_("Statutory Table Effective Date"))
+    description = models.CharField(
+        _("Statutory Table Description"), max_length=500, null=True, blank=True
+    )
+    created = models.DateTimeField(auto_now_add=True, null=True, blank=True)
+    updated = models.DateTimeField(auto_now=True, null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Statutory Tables"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "effective_date"], name="payroll_statutory_table_date"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} ({self.effective_date})"
+
+
+class StatutoryBracket(models.Model):
+    table = models.ForeignKey(
+        StatutoryTable, on_delete=models.RESTRICT, related_name="brackets"
+    )
+    # A value from this lower bound up to the next bracket's owes the base
+    # amount plus the rate applied to the excess over the lower bound.
+    lower_bound = models.DecimalField(
+        _("Statutory Bracket Lower Bound"), max_digits=14, decimal_places=2
+    )
+    base_amount = models.DecimalField(
+        _("Statutory Bracket Base Amount"), max_digits=14, decimal_places=2, default=0
+    )
+    rate = models.DecimalField(
+        _("Statutory Bracket Rate (%)"), max_digits=6, decimal_places=2, default=0
+    )
+
+    class Meta:
+        verbose_name_plural = "Statutory Brackets"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["table", "lower_bound"], name="payroll_statutory_bracket_bound"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.table} - {self.lower_bound}"
@@ -0,0 +1,16 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.utils import bump_reference_data_version
+from payroll.models import StatutoryBracket, StatutoryTable
+
+
+@receiver(post_save, sender=StatutoryTable)
+@receiver(post_delete, sender=StatutoryTable)
+@receiver(post_save, sender=StatutoryBracket)
+@receiver(post_delete, sender=StatutoryBracket)
+def invalidate_statutory_tables(sender, **kwargs):
+    # After the commit: bumped earlier, a reader could load the old brackets
+    # and cache them under the new version.
+    transaction.on_commit(lambda: bump_reference_data_version("statutory_tables"))
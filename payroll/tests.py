@@ -1,3 +1,748 @@
-from django.test import TestCase
+import datetime
+import io
+import re
+import zipfile
+import zlib
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from attendance.models import Attendance
+from core.models import Department
+from payroll.models import (
+    Compensation,
+    PayrollAdjustment,
+    PayrollPeriod,
+    PayrollRun,
+    Payslip,
+    PayslipLine,
+    RecurringDeduction,
+    StatutoryTable,
+)
+from payroll.utils.attendance_utils import summarize_attendance
+from payroll.utils.computation_utils import (
+    compute_payroll,
+    get_changed_payslip_user_ids,
+    run_payroll,
+)
+from payroll.utils.deduction_utils import (
+    approve_recurring_deduction,
+    get_amortization_schedule,
+    get_installment_due_dates,
+    round_centavos,
+)
+from payroll.utils.export_utils import get_bank_credit_file_records
+from payroll.utils.payslip_pdf_utils import (
+    LINES_BOTTOM,
+    LINES_PER_COLUMN,
+    iter_payslip_zip,
+    render_payslip_pdf,
+)
+from payroll.utils.run_utils import (
+    compute_payroll_shard,
+    execute_payroll_run,
+    start_payroll_run,
+)
+from payroll.utils.snapshot_utils import iter_payslip_report_rows, lock_payroll_period
+from payroll.utils.statutory_utils import (
+    evaluate_bracket_table,
+    get_statutory_table,
+    get_statutory_tables,
+)
+from payroll.utils.year_end_utils import (
+    compute_year_end,
+    get_annual_income_tax_table,
+    load_year_end_inputs,
+    run_year_end,
+)
+
+
+class PayrollTestCase(TestCase):
+    def setUp(self):
+        self.period = PayrollPeriod.objects.create(
+            start_date=datetime.date(2025, 3, 1),
+            end_date=datetime.date(2025, 3, 15),
+            pay_date=datetime.date(2025, 3, 15),
+        )
+        self.users = [
+            User.objects.create_user(
+                username=f"employee{index}",
+                first_name="Employee",
+                last_name=str(index),
+            )
+            for index in range(3)
+        ]
+        for user in self.users:
+            Compensation.objects.create(
+                user=user, rate=30000, valid_from=datetime.date(2024, 1, 1)
+            )
+
+
+class AttendanceSummaryTests(PayrollTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user_ids = [user.id for user in self.users]
+        self.biometric_details = [user.biometricdetail for user in self.users]
+
+    def punch(self, row, day, hour, minute, punch):
+        Attendance.objects.create(
+            user=self.biometric_details[row],
+            timestamp=timezone.make_aware(
+                datetime.datetime(2025, 3, day, hour, minute)
+            ),
+            punch=punch,
+        )
+
+    def test_day_shift_is_measured_against_the_default_schedule(self):
+        self.punch(0, 3, 8, 15, Attendance.Punch.TIME_IN)
+        self.punch(0, 3, 16, 30, Attendance.Punch.TIME_OUT)
+        summary = summarize_attendance(self.period, self.user_ids)
+
+        self.assertEqual(summary["days_worked"].tolist(), [1, 0, 0])
+        self.assertEqual(summary["late_minutes"].tolist(), [15, 0, 0])
+        self.assertEqual(summary["undertime_minutes"].tolist(), [30, 0, 0])
+
+    def test_night_shift_is_paired_across_midnight_and_not_charged(self):
+        self.punch(1, 3, 22, 0, Attendance.Punch.TIME_IN)
+        self.punch(1, 4, 6, 0, Attendance.Punch.TIME_OUT)
+        # Begun on the last day of the period, ended the morning after.
+        self.punch(1, 15, 22, 0, Attendance.Punch.TIME_IN)
+        self.punch(1, 16, 6, 0, Attendance.Punch.TIME_OUT)
+        self.punch(1, 15, 18, 0, Attendance.Punch.OVERTIME_IN)
+        self.punch(1, 15, 21, 0, Attendance.Punch.OVERTIME_OUT)
+        summary = summarize_attendance(self.period, self.user_ids)
+
+        self.assertEqual(summary["days_worked"].tolist(), [0, 2, 0])
+        self.assertEqual(summary["late_minutes"].tolist(), [0, 0, 0])
+        self.assertEqual(summary["undertime_minutes"].tolist(), [0, 0, 0])
+        self.assertEqual(summary["overtime_minutes"].tolist(), [0, 180, 0])
+
+    def test_overtime_ending_after_midnight_is_counted(self):
+        self.punch(2, 3, 8, 0, Attendance.Punch.TIME_IN)
+        self.punch(2, 3, 17, 0, Attendance.Punch.TIME_OUT)
+        self.punch(2, 3, 18, 0, Attendance.Punch.OVERTIME_IN)
+        self.punch(2, 4, 1, 0, Attendance.Punch.OVERTIME_OUT)
+        summary = summarize_attendance(self.period, self.user_ids)
+
+        self.assertEqual(summary["overtime_minutes"].tolist(), [0, 0, 420])
+        self.assertEqual(summary["late_minutes"].tolist(), [0, 0, 0])
+        self.assertEqual(summary["undertime_minutes"].tolist(), [0, 0, 0])
+
+
+class StatutoryAmountTests(TestCase):
+    # Employee shares in pesos under the tables effective in March 2025.
+    def setUp(self):
+        cache.clear()
+
+    def evaluate(self, kind, monthly_amounts):
+        table = get_statutory_table(kind, datetime.date(2025, 3, 15))
+        amounts = [round(amount * 100) for amount in monthly_amounts]
+        return (evaluate_bracket_table(table, amounts) / 100).tolist()
+
+    def test_sss(self):
+        self.assertEqual(
+            self.evaluate(StatutoryTable.Kind.SSS, [3000, 5249.99, 5250, 30000, 50000]),
+            [250, 250, 275, 1500, 1750],
+        )
+
+    def test_philhealth(self):
+        self.assertEqual(
+            self.evaluate(StatutoryTable.Kind.PHILHEALTH, [9000, 30000, 150000]),
+            [250, 750, 2500],
+        )
+
+    def test_pagibig(self):
+        self.assertEqual(
+            self.evaluate(StatutoryTable.Kind.PAGIBIG, [1500, 5000, 30000]),
+            [15, 100, 200],
+        )
+
+    def test_withholding_tax(self):
+        self.assertEqual(
+            self.evaluate(
+                StatutoryTable.Kind.SEMI_MONTHLY_WITHHOLDING_TAX,
+                [10417, 13775, 20000, 100000],
+            ),
+            [0, 503.70, 1604.10, 21770.80],
+        )
+        self.assertEqual(
+            self.evaluate(StatutoryTable.Kind.MONTHLY_WITHHOLDING_TAX, [20833, 40000]),
+            [0, 3208.40],
+        )
+
+
+class ComputePayrollTests(PayrollTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def get_inputs(self, **values):
+        inputs = {
+            "user_ids": np.array([self.users[0].id]),
+            "department_ids": np.array([0]),
+            "input_fingerprints": [None],
+            "periods_per_month": 2,
+            "working_days": 10,
+            "is_monthly_rate": np.array([True]),
+            "rates": np.array([3000000]),
+            "allowances": np.array([0]),
+            "days_worked": np.array([10]),
+            "late_minutes": np.array([0]),
+            "undertime_minutes": np.array([0]),
+            "overtime_minutes": np.array([0]),
+            "adjustments": [],
+            "installments": [],
+        }
+        inputs.update({key: np.array([value]) for key, value in values.items()})
+        return inputs
+
+    def test_monthly_rate_of_30000(self):
+        results = compute_payroll(self.get_inputs(), get_statutory_tables(self.period))
+
+        self.assertEqual(results["basic_pay"].tolist(), [1500000])
+        self.assertEqual(results["sss"].tolist(), [75000])
+        self.assertEqual(results["philhealth"].tolist(), [37500])
+        self.assertEqual(results["pagibig"].tolist(), [10000])
+        self.assertEqual(results["taxable_income"].tolist(), [1377500])
+        self.assertEqual(results["withholding_tax"].tolist(), [50370])
+        self.assertEqual(results["net_pay"].tolist(), [1327130])
+
+    def test_absence_and_late_minutes_reduce_basic_pay(self):
+        results = compute_payroll(
+            self.get_inputs(days_worked=9, late_minutes=30),
+            get_statutory_tables(self.period),
+        )
+
+        # Daily rate 30,000 x 12 / 261 = 1,379.31; per minute, 2.8736.
+        self.assertEqual(results["absences"].tolist(), [137931])
+        self.assertEqual(results["late"].tolist(), [8621])
+        self.assertEqual(results["gross_pay"].tolist(), [1500000 - 137931 - 8621])
+
+    def test_full_run_removes_payslips_of_employees_no_longer_paid(self):
+        run_payroll(self.period)
+        self.assertEqual(self.period.payslips.count(), 3)
+
+        self.users[0].is_active = False
+        self.users[0].save()
+        run_payroll(self.period)
+
+        self.assertFalse(
+            Payslip.objects.filter(period=self.period, user=self.users[0]).exists()
+        )
+        self.assertEqual(self.period.payslips.count(), 2)
+
+    def test_partial_run_keeps_other_payslips(self):
+        run_payroll(self.period)
+        run_payroll(self.period, [self.users[1].id])
+
+        self.assertEqual(self.period.payslips.count(), 3)
+
+
+class PayrollRunTests(PayrollTestCase):
+    def test_completed_run_removes_payslips_of_employees_no_longer_paid(self):
+        execute_payroll_run(start_payroll_run(self.period))
+
+        self.users[0].is_active = False
+        self.users[0].save()
+        execute_payroll_run(start_payroll_run(self.period))
+
+        self.assertEqual(
+            sorted(self.period.payslips.values_list("user_id", flat=True)),
+            [self.users[1].id, self.users[2].id],
+        )
+
+    def test_run_is_refused_while_another_is_in_progress(self):
+        start_payroll_run(self.period)
+
+        with self.assertRaises(ValueError):
+            start_payroll_run(self.period)
+
+    def test_restart_fails_the_run_left_running(self):
+        stale_run = start_payroll_run(self.period)
+        restarted_runs = []
+
+        # The stale run's process is still alive when the period is restarted.
+        def restart_while_computing(period_id, shard_id, user_ids):
+            restarted_runs.append(start_payroll_run(self.period, restart=True))
+            return compute_payroll_shard(period_id, shard_id, user_ids)
+
+        with mock.patch(
+            "payroll.utils.run_utils.compute_payroll_shard",
+            side_effect=restart_while_computing,
+        ):
+            with self.assertRaisesMessage(ValueError, "no longer running"):
+                execute_payroll_run(stale_run)
+        stale_run.refresh_from_db()
+
+        self.assertEqual(stale_run.status, PayrollRun.Status.FAILED)
+        self.assertFalse(self.period.payslips.exists())
+        execute_payroll_run(restarted_runs[0])
+        self.assertEqual(self.period.payslips.count(), 3)
+
+    def test_run_resumes_after_a_failed_shard(self):
+        department = Department.objects.create(name="Nursing", code="NUR")
+        self.users[0].userdetails.department = department
+        self.users[0].userdetails.save()
+        run = start_payroll_run(self.period)
+        self.assertEqual(run.shards.count(), 2)
+
+        def fail_second_shard(period_id, shard_id, user_ids):
+            if compute_shard.call_count > 1:
+                raise RuntimeError("Worker killed")
+            return compute_payroll_shard(period_id, shard_id, user_ids)
+
+        with mock.patch(
+            "payroll.utils.run_utils.compute_payroll_shard",
+            side_effect=fail_second_shard,
+        ) as compute_shard:
+            with self.assertRaises(RuntimeError):
+                execute_payroll_run(run)
+        run.refresh_from_db()
+        self.assertEqual(run.status, PayrollRun.Status.FAILED)
+        self.assertEqual(run.shards.filter(completed__isnull=False).count(), 1)
+
+        with mock.patch(
+            "payroll.utils.run_utils.compute_payroll_shard",
+            side_effect=compute_payroll_shard,
+        ) as compute_shard:
+            run = execute_payroll_run(run)
+
+        self.assertEqual(compute_shard.call_count, 1)
+        self.assertEqual(run.status, PayrollRun.Status.COMPLETED)
+        self.assertEqual(self.period.payslips.count(), 3)
+
+
+class ProcessPoolPayrollRunTests(TransactionTestCase):
+    serialized_rollback = True
+
+    def setUp(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("Worker processes cannot open an in-memory database.")
+
+    def test_process_pool_matches_a_single_process(self):
+        period = PayrollPeriod.objects.create(
+            start_date=datetime.date(2025, 3, 1),
+            end_date=datetime.date(2025, 3, 15),
+            pay_date=datetime.date(2025, 3, 15),
+        )
+        departments = [
+            Department.objects.create(name=f"Department {index}", code=str(index))
+            for index in range(3)
+        ]
+        for index in range(9):
+            user = User.objects.create_user(username=f"employee{index}")
+            user.userdetails.department = departments[index % 3]
+            user.userdetails.save()
+            Compensation.objects.create(
+                user=user,
+                rate=20000 + 1000 * index,
+                valid_from=datetime.date(2024, 1, 1),
+            )
+
+        def get_payslips():
+            return list(
+                period.payslips.order_by("user_id").values_list(
+                    "user_id", "gross_pay", "withholding_tax", "net_pay"
+                )
+            )
+
+        execute_payroll_run(start_payroll_run(period))
+        single_process_payslips = get_payslips()
+        execute_payroll_run(start_payroll_run(period, 3), worker_count=3)
+
+        self.assertEqual(len(single_process_payslips), 9)
+        self.assertEqual(get_payslips(), single_process_payslips)
+
+
+class ChangedPayslipTests(PayrollTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.punch = Attendance.objects.create(
+            user=self.users[0].biometricdetail,
+            timestamp=timezone.make_aware(datetime.datetime(2025, 3, 3, 8, 0)),
+            punch=Attendance.Punch.TIME_IN,
+        )
+        run_payroll(self.period)
+
+    def test_unchanged_period_recomputes_nothing(self):
+        self.assertEqual(get_changed_payslip_user_ids(self.period), ([], []))
+
+    def test_edited_punch_changes_only_its_employee(self):
+        self.punch.timestamp += datetime.timedelta(minutes=5)
+        self.punch.save()
+
+        self.assertEqual(
+            get_changed_payslip_user_ids(self.period), ([self.users[0].id], [])
+        )
+
+    def test_edited_compensation_changes_only_its_employee(self):
+        compensation = self.users[1].compensations.get()
+        compensation.rate += 1000
+        compensation.save()
+
+        self.assertEqual(
+            get_changed_payslip_user_ids(self.period), ([self.users[1].id], [])
+        )
+
+    def test_new_adjustment_changes_only_its_employee(self):
+        PayrollAdjustment.objects.create(
+            period=self.period, user=self.users[2], description="Bonus", amount=500
+        )
+
+        self.assertEqual(
+            get_changed_payslip_user_ids(self.period), ([self.users[2].id], [])
+        )
+
+    def test_edited_statutory_bracket_changes_the_periods_using_it(self):
+        unused_table = StatutoryTable.objects.get(
+            kind=StatutoryTable.Kind.MONTHLY_WITHHOLDING_TAX
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            bracket = unused_table.brackets.order_by("lower_bound").last()
+            bracket.rate += 1
+            bracket.save()
+        self.assertEqual(get_changed_payslip_user_ids(self.period), ([], []))
+
+        table = StatutoryTable.objects.get(
+            kind=StatutoryTable.Kind.SEMI_MONTHLY_WITHHOLDING_TAX
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            bracket = table.brackets.order_by("lower_bound").last()
+            bracket.rate += 1
+            bracket.save()
+        self.assertEqual(
+            get_changed_payslip_user_ids(self.period),
+            (sorted(user.id for user in self.users), []),
+        )
+
+
+class BankCreditFileTests(PayrollTestCase):
+    def set_bank_account_numbers(self, *account_numbers):
+        for user, account_number in zip(self.users, account_numbers):
+            user.userdetails.bank_account_number = account_number
+            user.userdetails.save()
+        run_payroll(self.period)
+
+    def test_detail_records_carry_the_full_account_number(self):
+        self.set_bank_account_numbers("0012-3456-7890", "1234567890123456", "")
+        records = get_bank_credit_file_records(self.period)
+
+        self.assertEqual(len(records), 4)
+        self.assertEqual(records[1][1:17], "001234567890    ")
+        self.assertEqual(records[2][1:17], "1234567890123456")
+        self.assertEqual(
+            int(records[3][22:37]), (1234567890 + 1234567890123456) % 10**15
+        )
+
+    def test_account_number_too_long_is_refused(self):
+        self.set_bank_account_numbers("12345678901234567")
+
+        with self.assertRaises(ValueError):
+            get_bank_credit_file_records(self.period)
+
+    def test_download_with_a_bad_account_is_an_error_response(self):
+        self.set_bank_account_numbers("12345678901234567")
+        self.client.force_login(
+            User.objects.create_user(username="payroll_officer", is_staff=True)
+        )
+
+        response = self.client.get(
+            reverse("payroll:download_bank_credit_file", args=[self.period.id])
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(b"12345678901234567", response.content)
+
+    def test_account_number_without_digits_is_refused(self):
+        self.set_bank_account_numbers("N/A")
+
+        with self.assertRaises(ValueError):
+            get_bank_credit_file_records(self.period)
+
+
+class PayslipPdfTests(PayrollTestCase):
+    def get_page_content(self, pdf):
+        stream = re.search(rb"stream\n(.*)\nendstream", pdf, re.DOTALL).group(1)
+        return zlib.decompress(stream).decode("cp1252")
+
+    def test_lines_that_do_not_fit_are_summed_on_the_last_row(self):
+        pdf = render_payslip_pdf(
+            {
+                "employee_name": "Employee 0",
+                "employee_number": "",
+                "department": "",
+                "period": "Mar 01, 2025 - Mar 15, 2025",
+                "pay_date": "Mar 15, 2025",
+                "days_worked": 10,
+                "lines": [("Basic Pay", "EARNING", 1500000)]
+                + [(f"Loan {index}", "DEDUCTION", 100) for index in range(20)],
+                "gross_pay": 1500000,
+                "total_deductions": 2000,
+                "net_pay": 1498000,
+            }
+        )
+        content = self.get_page_content(pdf)
+
+        self.assertTrue(pdf.startswith(b"%PDF-1.4"))
+        self.assertIn(f"Loan {LINES_PER_COLUMN - 2}", content)
+        self.assertNotIn(f"Loan {LINES_PER_COLUMN - 1}", content)
+        self.assertIn(f"({20 - LINES_PER_COLUMN + 1} other items)", content)
+        self.assertIn(f"({(20 - LINES_PER_COLUMN + 1):d}.00)", content)
+        line_positions = [
+            int(y)
+            for y in re.findall(r"/F1 9 Tf \d+ (\d+) Td \((?:Loan|\d+ other)", content)
+        ]
+        self.assertEqual(len(line_positions), LINES_PER_COLUMN)
+        self.assertGreaterEqual(min(line_positions), LINES_BOTTOM)
+
+    def test_locked_period_archive_matches_the_live_one(self):
+        run_payroll(self.period)
+
+        def read_archive():
+            archive = zipfile.ZipFile(
+                io.BytesIO(b"".join(iter_payslip_zip(self.period)))
+            )
+            return {name: archive.read(name) for name in archive.namelist()}
+
+        live_archive = read_archive()
+        lock_payroll_period(self.period)
+        self.period.refresh_from_db()
+
+        self.assertEqual(
+            sorted(live_archive),
+            [
+                f"employee-{index}-{user.id}.pdf"
+                for index, user in enumerate(self.users)
+            ],
+        )
+        self.assertTrue(all(pdf.startswith(b"%PDF") for pdf in live_archive.values()))
+        self.assertEqual(read_archive(), live_archive)
+
+
+class LockedPayrollPeriodTests(PayrollTestCase):
+    def setUp(self):
+        super().setUp()
+        run_payroll(self.period)
+        lock_payroll_period(self.period)
+        self.payslip = self.period.payslips.first()
+
+    def test_payslip_cannot_be_changed(self):
+        self.payslip.net_pay += 100
+
+        with self.assertRaises(ValueError):
+            self.payslip.save()
+        with self.assertRaises(ValueError):
+            self.payslip.delete()
+
+    def test_payslip_line_cannot_be_added_or_changed(self):
+        with self.assertRaises(ValueError):
+            PayslipLine.objects.create(
+                payslip=self.payslip,
+                code=PayslipLine.Code.ADJUSTMENT,
+                category=PayslipLine.Category.EARNING,
+                amount=100,
+            )
+
+        line = self.payslip.lines.first()
+        line.amount += 100
+        with self.assertRaises(ValueError):
+            line.save()
+
+    def test_year_end_reads_the_snapshot(self):
+        basic_pay = load_year_end_inputs(2025)["basic_pay"].tolist()
+        # Written around the lock, as a direct database edit would be.
+        PayslipLine.objects.filter(payslip__period=self.period).update(amount=1)
+
+        self.assertEqual(load_year_end_inputs(2025)["basic_pay"].tolist(), basic_pay)
+        self.assertNotEqual(basic_pay, [1, 1, 1])
+
+    def test_run_is_refused(self):
+        with self.assertRaises(ValueError):
+            run_payroll(self.period)
+
+
+class YearEndTests(PayrollTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_thirteenth_month_pay_exemption_and_tax_balance(self):
+        # Pesos: basic pay, time deductions, taxable earnings, taxable
+        # deductions (time deductions and contributions) and tax withheld.
+        employees = [
+            (360000, 0, 360000, 30000, 11000),
+            (1440000, 0, 1440000, 60000, 260000),
+            (240000, 12000, 240000, 32000, 0),
+        ]
+        columns = [
+            np.array([employee[index] * 100 for employee in employees])
+            for index in range(5)
+        ]
+        inputs = dict(
+            zip(
+                [
+                    "basic_pay",
+                    "time_deductions",
+                    "taxable_earnings",
+                    "taxable_deductions",
+                    "withholding_tax",
+                ],
+                columns,
+            ),
+            user_ids=np.array([1, 2, 3]),
+        )
+        results = compute_year_end(inputs, get_annual_income_tax_table(2025))
+
+        self.assertEqual(
+            results["thirteenth_month_pay"].tolist(), [3000000, 12000000, 1900000]
+        )
+        # Only the 120,000 past the 90,000 exemption is taxed.
+        self.assertEqual(
+            results["taxable_thirteenth_month_pay"].tolist(), [0, 3000000, 0]
+        )
+        self.assertEqual(
+            results["taxable_income"].tolist(), [33000000, 141000000, 20800000]
+        )
+        # 15% over 250,000; 102,500 plus 25% over 800,000; nothing under 250,000.
+        self.assertEqual(results["annual_tax"].tolist(), [1200000, 25500000, 0])
+        self.assertEqual(results["tax_balance"].tolist(), [100000, -500000, 0])
+
+    def test_thirteenth_month_pay_is_a_twelfth_of_earned_basic_pay(self):
+        run_payroll(self.period)
+        _, results = run_year_end(2025)
+
+        # 15,000 basic pay less 10 absent days of 1,379.31, over 12.
+        self.assertEqual(results["earned_basic_pay"].tolist(), [120690, 120690, 120690])
+        self.assertEqual(
+            results["thirteenth_month_pay"].tolist(), [10058, 10058, 10058]
+        )
+
+
+class RecurringDeductionTests(PayrollTestCase):
+    def test_principal_amounts_add_up_to_the_principal(self):
+        schedule = get_amortization_schedule(10000, 12, 24, 6)
+        principal_amounts = [row[2] for row in schedule]
+
+        self.assertEqual(sum(principal_amounts), 1000000)
+        self.assertEqual(schedule[-1][4], 0)
+        # 0.5% a period on the balance still owed.
+        balances = [1000000] + [row[4] for row in schedule[:-1]]
+        self.assertEqual(
+            [row[3] for row in schedule],
+            [round_centavos(balance * Decimal("0.005")) for balance in balances],
+        )
+        self.assertEqual(len({row[1] for row in schedule[:-1]}), 1)
+
+    def test_last_installment_takes_the_rounding_difference(self):
+        self.assertEqual(
+            [row[1] for row in get_amortization_schedule(1000, 0, 24, 3)],
+            [33333, 33333, 33334],
+        )
+
+    def test_due_dates_run_across_month_and_year_ends(self):
+        self.assertEqual(
+            get_installment_due_dates(
+                datetime.date(2025, 12, 20), PayrollPeriod.Frequency.SEMI_MONTHLY, 4
+            ),
+            [
+                datetime.date(2025, 12, 31),
+                datetime.date(2026, 1, 15),
+                datetime.date(2026, 1, 31),
+                datetime.date(2026, 2, 15),
+            ],
+        )
+        self.assertEqual(
+            get_installment_due_dates(
+                datetime.date(2025, 2, 16), PayrollPeriod.Frequency.SEMI_MONTHLY, 2
+            ),
+            [datetime.date(2025, 2, 28), datetime.date(2025, 3, 15)],
+        )
+        self.assertEqual(
+            get_installment_due_dates(
+                datetime.date(2023, 12, 31), PayrollPeriod.Frequency.MONTHLY, 3
+            ),
+            [
+                datetime.date(2023, 12, 31),
+                datetime.date(2024, 1, 31),
+                datetime.date(2024, 2, 29),
+            ],
+        )
+
+    def test_deduction_without_installments_is_refused(self):
+        deduction = RecurringDeduction.objects.create(
+            user=self.users[0],
+            principal=1000,
+            installment_count=0,
+            start_date=datetime.date(2025, 3, 1),
+        )
+
+        with self.assertRaises(ValidationError):
+            deduction.full_clean()
+        with self.assertRaises(ValueError):
+            approve_recurring_deduction(deduction)
+        deduction.refresh_from_db()
+        self.assertEqual(deduction.status, RecurringDeduction.Status.PENDING)
+        self.assertFalse(deduction.installments.exists())
+
+
+class PayrollPeriodAdminTests(PayrollTestCase):
+    def setUp(self):
+        super().setUp()
+        run_payroll(self.period)
+        self.client.force_login(
+            User.objects.create_superuser(username="admin", password="secret")
+        )
+
+    def test_status_cannot_be_edited(self):
+        response = self.client.post(
+            reverse("admin:payroll_payrollperiod_change", args=[self.period.id]),
+            {
+                "start_date": self.period.start_date,
+                "end_date": self.period.end_date,
+                "pay_date": self.period.pay_date,
+                "frequency": self.period.frequency,
+                "status": PayrollPeriod.Status.LOCKED,
+            },
+        )
+
+        self.assertEqual(response.status_code, 302)
+        self.period.refresh_from_db()
+        self.assertEqual(self.period.status, PayrollPeriod.Status.COMPUTED)
+
+    def test_locked_period_without_snapshot_is_reported(self):
+        PayrollPeriod.objects.filter(id=self.period.id).update(
+            status=PayrollPeriod.Status.LOCKED
+        )
+        self.period.refresh_from_db()
+
+        with self.assertRaisesMessage(ValueError, "has no snapshot"):
+            list(iter_payslip_report_rows(self.period))
+
+
+class StatutoryTableCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_tables_are_reloaded_only_once_the_change_is_committed(self):
+        as_of = datetime.date(2025, 3, 15)
+        table = StatutoryTable.objects.filter(
+            kind=StatutoryTable.Kind.PAGIBIG, effective_date__lte=as_of
+        ).latest("effective_date")
+        bracket = table.brackets.order_by("lower_bound").last()
+        rates = get_statutory_table(table.kind, as_of)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bracket.rate += 1
+            bracket.save()
+            self.assertIs(get_statutory_table(table.kind, as_of), rates)
+
+        self.assertIsNot(get_statutory_table(table.kind, as_of), rates)
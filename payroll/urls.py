@@ -0,0 +1,23 @@
+from django.urls import path
+
+from payroll import views as payroll_views
+
+app_name = "payroll"
+
+urlpatterns = [
+    path(
+        "periods/<int:period_id>/payslips.zip",
+        payroll_views.download_payslips,
+        name="download_payslips",
+    ),
+    path(
+        "periods/<int:period_id>/register.xlsx",
+        payroll_views.download_payroll_register,
+        name="download_payroll_register",
+    ),
+    path(
+        "periods/<int:period_id>/bank-credit.txt",
+        payroll_views.download_bank_credit_file,
+        name="download_bank_credit_file",
+    ),
+]
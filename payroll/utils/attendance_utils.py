@@ -0,0 +1,134 @@
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.utils import timezone
+
+from attendance.models import Attendance
+
+# Schedule used to measure lateness and undertime, in minutes after midnight.
+DEFAULT_SHIFT_START = 8 * 60
+DEFAULT_SHIFT_END = 17 * 60
+# Employees have no assigned shift, so lateness and undertime are only
+# counted for shifts whose time-in falls within this many minutes of the
+# default start; night and other off-schedule shifts are paid as punched.
+DEFAULT_SHIFT_TIME_IN_WINDOW = 4 * 60
+# A time-out closes the latest time-in at most this long before it, so a
+# shift may end after midnight.
+MAX_SHIFT_MINUTES = 16 * 60
+
+MINUTES_PER_DAY = 24 * 60
+
+_NO_PUNCH = np.iinfo(np.int64).max
+
+
+def get_attendance_datetime_range(period):
+    # The period's days, plus the morning after for a shift begun on its last
+    # day that ends past midnight.
+    start = timezone.make_aware(datetime.combine(period.start_date, time.min))
+    end = timezone.make_aware(
+        datetime.combine(period.end_date + timedelta(days=1), time.min)
+    )
+    return start, end + timedelta(minutes=MAX_SHIFT_MINUTES)
+
+
+def get_shift_ends(start_keys, end_keys):
+    # Last end punch after each start, before the next start and at most
+    # MAX_SHIFT_MINUTES after it, or -1 when there is none. Start keys are
+    # sorted; employees' keys are far enough apart never to pair across.
+    if not len(end_keys):
+        return np.full(len(start_keys), -1, dtype=np.int64)
+    end_keys = np.sort(end_keys)
+    next_start_keys = np.append(start_keys[1:], _NO_PUNCH)
+    limits = np.minimum(start_keys + MAX_SHIFT_MINUTES, next_start_keys - 1)
+    indexes = np.searchsorted(end_keys, limits, side="right") - 1
+    ends = end_keys[np.maximum(indexes, 0)]
+    return np.where((indexes >= 0) & (ends > start_keys), ends, -1)
+
+
+# Days worked and late, undertime and overtime minutes in the period, as
+# arrays aligned with the sorted user_ids array.
+def summarize_attendance(period, user_ids):
+    user_ids = np.asarray(user_ids, dtype=np.int64)
+    day_count = (period.end_date - period.start_date).days + 1
+    summary = {
+        "days_worked": np.zeros(len(user_ids), dtype=np.int64),
+        "late_minutes": np.zeros(len(user_ids), dtype=np.int64),
+        "undertime_minutes": np.zeros(len(user_ids), dtype=np.int64),
+        "overtime_minutes": np.zeros(len(user_ids), dtype=np.int64),
+    }
+    if not len(user_ids):
+        return summary
+
+    start, end = get_attendance_datetime_range(period)
+    punches = Attendance.objects.filter(
+        timestamp__gte=start,
+        timestamp__lt=end,
+        user__user_id__in=user_ids.tolist(),
+    ).values_list("user__user_id", "timestamp", "punch")
+
+    punch_user_ids, punch_minutes, punch_types = [], [], []
+    for user_id, timestamp, punch in punches.iterator(chunk_size=5000):
+        local_timestamp = timezone.localtime(timestamp)
+        punch_user_ids.append(user_id)
+        punch_minutes.append(
+            (local_timestamp.date() - period.start_date).days * MINUTES_PER_DAY
+            + local_timestamp.hour * 60
+            + local_timestamp.minute
+        )
+        punch_types.append(punch)
+    if not punch_user_ids:
+        return summary
+
+    rows = np.searchsorted(user_ids, np.array(punch_user_ids, dtype=np.int64))
+    # Minutes since the start of the period, offset by whole days per
+    # employee so that sorted keys run through each employee's punches in turn.
+    minutes = np.array(punch_minutes, dtype=np.int64)
+    keys = rows * (day_count + 1) * MINUTES_PER_DAY + minutes
+    days = minutes // MINUTES_PER_DAY
+    punch_types = np.array(punch_types, dtype=object)
+
+    def get_shifts(start_punch, end_punch):
+        # A shift starts at the first start punch of an employee's day in the
+        # period, and belongs to that day wherever it ends.
+        start_keys = np.full(len(user_ids) * day_count, _NO_PUNCH, dtype=np.int64)
+        selected = (punch_types == start_punch) & (days < day_count)
+        np.minimum.at(
+            start_keys, rows[selected] * day_count + days[selected], keys[selected]
+        )
+        cells = np.flatnonzero(start_keys != _NO_PUNCH)
+        start_keys = start_keys[cells]
+        end_keys = get_shift_ends(start_keys, keys[punch_types == end_punch])
+        return cells // day_count, start_keys, end_keys
+
+    shift_rows, time_in_keys, time_out_keys = get_shifts(
+        Attendance.Punch.TIME_IN, Attendance.Punch.TIME_OUT
+    )
+    time_in = time_in_keys % MINUTES_PER_DAY
+    on_default_shift = (
+        np.abs(time_in - DEFAULT_SHIFT_START) <= DEFAULT_SHIFT_TIME_IN_WINDOW
+    )
+    late = np.where(on_default_shift, np.maximum(time_in - DEFAULT_SHIFT_START, 0), 0)
+    # Time-out in minutes after midnight of the shift's day.
+    time_out = time_out_keys - (time_in_keys - time_in)
+    undertime = np.where(
+        on_default_shift & (time_out_keys >= 0),
+        np.maximum(DEFAULT_SHIFT_END - time_out, 0),
+        0,
+    )
+
+    overtime_rows, overtime_in_keys, overtime_out_keys = get_shifts(
+        Attendance.Punch.OVERTIME_IN, Attendance.Punch.OVERTIME_OUT
+    )
+    overtime = np.where(overtime_out_keys >= 0, overtime_out_keys - overtime_in_keys, 0)
+
+    employee_count = len(user_ids)
+    summary["days_worked"] = np.bincount(shift_rows, minlength=employee_count)
+    for column, column_rows, values in (
+        ("late_minutes", shift_rows, late),
+        ("undertime_minutes", shift_rows, undertime),
+        ("overtime_minutes", overtime_rows, overtime),
+    ):
+        summary[column] = np.bincount(
+            column_rows, weights=values, minlength=employee_count
+        ).astype(np.int64)
+    return summary
@@ -0,0 +1,19 @@
+from django.db.models import Q
+
+from payroll.models import Compensation
+
+
+def get_compensations_as_of(as_of, user_ids=None):
+    # A single range lookup resolves everyone at once; validities never
+    # overlap, so each employee matches at most one compensation.
+    compensations = Compensation.objects.filter(
+        Q(valid_to__isnull=True) | Q(valid_to__gte=as_of),
+        valid_from__lte=as_of,
+    )
+    if user_ids is not None:
+        compensations = compensations.filter(user_id__in=list(user_ids))
+    return compensations
+
+
+def get_compensation_as_of(user, as_of):
+    return get_compensations_as_of(as_of, [user.id]).first()
@@ -0,0 +1,470 @@
+import hashlib
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Max
+
+from attendance.models import Attendance
+from payroll.models import (
+    Compensation,
+    PayrollAdjustment,
+    PayrollPeriod,
+    Payslip,
+    PayslipLine,
+)
+from payroll.utils.attendance_utils import (
+    get_attendance_datetime_range,
+    summarize_attendance,
+)
+from payroll.utils.compensation_utils import get_compensations_as_of
+from payroll.utils.deduction_utils import (
+    get_installment_description,
+    get_period_installments,
+)
+from payroll.utils.statutory_utils import (
+    divide_round,
+    evaluate_bracket_table,
+    get_statutory_tables,
+    get_statutory_tables_fingerprint,
+)
+
+# Monthly rates are converted to daily rates over a five-day work week.
+WORKING_DAYS_PER_YEAR = 261
+WORKING_MINUTES_PER_DAY = 8 * 60
+OVERTIME_RATE_PERCENT = 125
+
+BULK_CREATE_BATCH_SIZE = 1000
+
+# Payslip lines written from result columns: (code, category, column, is_taxable).
+PAYSLIP_LINE_COLUMNS = (
+    (PayslipLine.Code.BASIC, PayslipLine.Category.EARNING, "basic_pay", True),
+    (PayslipLine.Code.OVERTIME, PayslipLine.Category.EARNING, "overtime_pay", True),
+    (PayslipLine.Code.ALLOWANCE, PayslipLine.Category.EARNING, "allowance", False),
+    (PayslipLine.Code.ABSENCES, PayslipLine.Category.DEDUCTION, "absences", True),
+    (PayslipLine.Code.LATE, PayslipLine.Category.DEDUCTION, "late", True),
+    (PayslipLine.Code.UNDERTIME, PayslipLine.Category.DEDUCTION, "undertime", True),
+    (PayslipLine.Code.SSS, PayslipLine.Category.CONTRIBUTION, "sss", True),
+    (
+        PayslipLine.Code.PHILHEALTH,
+        PayslipLine.Category.CONTRIBUTION,
+        "philhealth",
+        True,
+    ),
+    (PayslipLine.Code.PAGIBIG, PayslipLine.Category.CONTRIBUTION, "pagibig", True),
+    (
+        PayslipLine.Code.WITHHOLDING_TAX,
+        PayslipLine.Category.TAX,
+        "withholding_tax",
+        False,
+    ),
+)
+
+
+def to_centavos(amount):
+    return int(amount * 100)
+
+
+def get_payroll_compensations(period, user_ids=None):
+    # Pay follows the compensation in effect at the end of the period.
+    return get_compensations_as_of(period.end_date, user_ids).filter(
+        user__is_active=True
+    )
+
+
+def get_input_fingerprints(period, user_ids=None):
+    # Versions rather than values: counts, highest ids and last update times
+    # change whenever a row is added, removed or edited, and are read with a
+    # few grouped queries instead of loading the inputs themselves.
+    compensations = get_payroll_compensations(period, user_ids)
+    attendance = Attendance.objects.filter(
+        timestamp__range=get_attendance_datetime_range(period),
+        user__user__in=compensations.values("user"),
+    )
+    attendance_versions = {
+        user_id: version
+        for user_id, *version in attendance.order_by()
+        .values("user__user_id")
+        .annotate(Count("id"), Max("id"), Max("updated"))
+        .values_list("user__user_id", "id__count", "id__max", "updated__max")
+    }
+    adjustment_versions = {
+        user_id: version
+        for user_id, *version in PayrollAdjustment.objects.filter(
+            period=period, user__in=compensations.values("user")
+        )
+        .order_by()
+        .values("user_id")
+        .annotate(Count("id"), Max("id"), Max("updated"))
+        .values_list("user_id", "id__count", "id__max", "updated__max")
+    }
+    installment_versions = {
+        user_id: version
+        for user_id, *version in get_period_installments(period)
+        .filter(deduction__user__in=compensations.values("user"))
+        .order_by()
+        .values("deduction__user_id")
+        .annotate(Count("id"), Max("id"), Max("deduction__updated"))
+        .values_list(
+            "deduction__user_id", "id__count", "id__max", "deduction__updated__max"
+        )
+    }
+    period_version = (
+        f"{period.start_date}:{period.end_date}:{period.pay_date}:{period.frequency}:"
+        f"{get_statutory_tables_fingerprint(period)}"
+    )
+
+    input_fingerprints = {}
+    for (
+        user_id,
+        compensation_id,
+        compensation_updated,
+        department_id,
+    ) in compensations.values_list(
+        "user_id", "id", "updated", "user__userdetails__department_id"
+    ):
+        input_version = (
+            f"{period_version}|{department_id}|{compensation_id}:{compensation_updated}"
+            f"|{attendance_versions.get(user_id)}|{adjustment_versions.get(user_id)}"
+            f"|{installment_versions.get(user_id)}"
+        )
+        input_fingerprints[user_id] = hashlib.sha256(input_version.encode()).hexdigest()
+    return input_fingerprints
+
+
+def get_changed_payslip_user_ids(period):
+    # Employees whose payslip is out of date, and employees no longer paid
+    # (e.g. deactivated) who still have one.
+    input_fingerprints = get_input_fingerprints(period)
+    saved_fingerprints = dict(
+        Payslip.objects.filter(period=period).values_list(
+            "user_id", "input_fingerprint"
+        )
+    )
+    changed_user_ids = sorted(
+        user_id
+        for user_id, input_fingerprint in input_fingerprints.items()
+        if saved_fingerprints.get(user_id) != input_fingerprint
+    )
+    removed_user_ids = sorted(set(saved_fingerprints) - set(input_fingerprints))
+    return changed_user_ids, removed_user_ids
+
+
+def load_payroll_inputs(period, user_ids=None):
+    # Fingerprints are taken before the inputs are read, so an edit made in
+    # between leaves a stale fingerprint and is picked up by the next recompute.
+    input_fingerprints = get_input_fingerprints(period, user_ids)
+    compensations = get_payroll_compensations(period, user_ids)
+    rows = list(
+        compensations.order_by("user_id").values_list(
+            "user_id",
+            "user__userdetails__department_id",
+            "rate_type",
+            "rate",
+            "allowance",
+        )
+    )
+
+    employee_ids = np.array([row[0] for row in rows], dtype=np.int64)
+    inputs = {
+        "period_id": period.id,
+        "frequency": period.frequency,
+        "periods_per_month": period.periods_per_month,
+        "working_days": int(
+            np.busday_count(period.start_date, period.end_date + np.timedelta64(1, "D"))
+        ),
+        "user_ids": employee_ids,
+        "department_ids": np.array([row[1] or 0 for row in rows], dtype=np.int64),
+        "is_monthly_rate": np.array(
+            [row[2] == Compensation.RateType.MONTHLY for row in rows], dtype=bool
+        ),
+        "rates": np.array([to_centavos(row[3]) for row in rows], dtype=np.int64),
+        "allowances": np.array([to_centavos(row[4]) for row in rows], dtype=np.int64),
+        "input_fingerprints": [input_fingerprints.get(row[0]) for row in rows],
+        "adjustments": [],
+        "installments": [],
+    }
+    inputs.update(summarize_attendance(period, employee_ids))
+
+    adjustments = PayrollAdjustment.objects.filter(
+        period=period, user_id__in=employee_ids.tolist()
+    ).order_by("id")
+    for user_id, category, description, amount, is_taxable in adjustments.values_list(
+        "user_id", "category", "description", "amount", "is_taxable"
+    ):
+        inputs["adjustments"].append(
+            (
+                int(np.searchsorted(employee_ids, user_id)),
+                category,
+                description,
+                to_centavos(amount),
+                is_taxable,
+            )
+        )
+
+    # Installments are read as scheduled at approval; no balances are
+    # recomputed here.
+    installments = get_period_installments(period, employee_ids.tolist()).order_by(
+        "deduction_id", "sequence"
+    )
+    for (
+        user_id,
+        kind,
+        description,
+        sequence,
+        installment_count,
+        amount,
+        remaining_balance,
+    ) in installments.values_list(
+        "deduction__user_id",
+        "deduction__kind",
+        "deduction__description",
+        "sequence",
+        "deduction__installment_count",
+        "amount",
+        "remaining_balance",
+    ):
+        inputs["installments"].append(
+            (
+                int(np.searchsorted(employee_ids, user_id)),
+                get_installment_description(
+                    kind, description, sequence, installment_count, remaining_balance
+                ),
+                amount,
+            )
+        )
+    return inputs
+
+
+def compute_payroll(inputs, tables):
+    employee_count = len(inputs["user_ids"])
+    periods_per_month = inputs["periods_per_month"]
+    is_monthly_rate = inputs["is_monthly_rate"]
+    rates = inputs["rates"]
+
+    # Daily rate as an exact fraction, so minute deductions round only once.
+    daily_rate_numerators = np.where(is_monthly_rate, rates * 12, rates)
+    daily_rate_denominators = np.where(is_monthly_rate, WORKING_DAYS_PER_YEAR, 1)
+
+    def pay_for_minutes(minutes, percent=100):
+        return divide_round(
+            minutes * daily_rate_numerators * percent,
+            daily_rate_denominators * WORKING_MINUTES_PER_DAY * 100,
+        )
+
+    days_worked = inputs["days_worked"]
+    absent_days = np.where(
+        is_monthly_rate, np.maximum(inputs["working_days"] - days_worked, 0), 0
+    )
+    results = {
+        "user_ids": inputs["user_ids"],
+        "department_ids": inputs["department_ids"],
+        "input_fingerprints": inputs["input_fingerprints"],
+        "days_worked": days_worked,
+        "late_minutes": inputs["late_minutes"],
+        "undertime_minutes": inputs["undertime_minutes"],
+        "overtime_minutes": inputs["overtime_minutes"],
+        "basic_pay": np.where(
+            is_monthly_rate,
+            divide_round(rates, periods_per_month),
+            rates * days_worked,
+        ),
+        "overtime_pay": pay_for_minutes(
+            inputs["overtime_minutes"], OVERTIME_RATE_PERCENT
+        ),
+        "allowance": divide_round(inputs["allowances"], periods_per_month),
+        "absences": divide_round(
+            absent_days * daily_rate_numerators, daily_rate_denominators
+        ),
+        "late": pay_for_minutes(inputs["late_minutes"]),
+        "undertime": pay_for_minutes(inputs["undertime_minutes"]),
+    }
+
+    taxable_adjustments = np.zeros(employee_count, dtype=np.int64)
+    other_earnings = np.zeros(employee_count, dtype=np.int64)
+    other_deductions = np.zeros(employee_count, dtype=np.int64)
+    for row, category, _, amount, is_taxable in inputs["adjustments"]:
+        if category == PayrollAdjustment.Category.EARNING:
+            other_earnings[row] += amount
+            if is_taxable:
+                taxable_adjustments[row] += amount
+        else:
+            other_deductions[row] += amount
+            if is_taxable:
+                taxable_adjustments[row] -= amount
+    # Snapshots taken before installments existed have none.
+    installments = inputs.get("installments", ())
+    for row, _, amount in installments:
+        other_deductions[row] += amount
+
+    # Basic pay actually earned in the period, after time deductions.
+    earned_basic_pay = np.maximum(
+        results["basic_pay"]
+        - results["absences"]
+        - results["late"]
+        - results["undertime"],
+        0,
+    )
+
+    # Contributions are monthly amounts on the monthly equivalent of the
+    # period's basic pay, split evenly across the month's periods.
+    monthly_basic_pay = earned_basic_pay * periods_per_month
+    for column in ("sss", "philhealth", "pagibig"):
+        results[column] = np.where(
+            earned_basic_pay > 0,
+            divide_round(
+                evaluate_bracket_table(tables[column], monthly_basic_pay),
+                periods_per_month,
+            ),
+            0,
+        )
+    total_contributions = results["sss"] + results["philhealth"] + results["pagibig"]
+
+    gross_pay = (
+        earned_basic_pay
+        + results["overtime_pay"]
+        + results["allowance"]
+        + other_earnings
+    )
+    taxable_income = np.maximum(
+        earned_basic_pay
+        + results["overtime_pay"]
+        + taxable_adjustments
+        - total_contributions,
+        0,
+    )
+    results["withholding_tax"] = evaluate_bracket_table(
+        tables["withholding_tax"], taxable_income
+    )
+
+    results["gross_pay"] = gross_pay
+    results["taxable_income"] = taxable_income
+    results["total_contributions"] = total_contributions
+    results["total_deductions"] = other_deductions
+    results["net_pay"] = (
+        gross_pay - total_contributions - results["withholding_tax"] - other_deductions
+    )
+
+    lines = []
+    for code, category, column, is_taxable in PAYSLIP_LINE_COLUMNS:
+        amounts = results[column]
+        for row in np.flatnonzero(amounts).tolist():
+            lines.append(
+                (row, code, category, str(code.label), int(amounts[row]), is_taxable)
+            )
+    for row, category, description, amount, is_taxable in inputs["adjustments"]:
+        lines.append(
+            (
+                row,
+                PayslipLine.Code.ADJUSTMENT,
+                category,
+                description,
+                amount,
+                is_taxable,
+            )
+        )
+    for row, description, amount in installments:
+        lines.append(
+            (
+                row,
+                PayslipLine.Code.LOAN,
+                PayslipLine.Category.DEDUCTION,
+                description,
+                amount,
+                False,
+            )
+        )
+    results["lines"] = lines
+    return results
+
+
+def delete_payslips(period, user_ids=None):
+    # Runs inside the caller's transaction; locking the period row keeps it
+    # from being locked while its payslips change. Without user ids, every
+    # payslip of the period is deleted.
+    status = (
+        PayrollPeriod.objects.select_for_update()
+        .values_list("status", flat=True)
+        .get(id=period.id)
+    )
+    if status == PayrollPeriod.Status.LOCKED:
+        raise ValueError(f"Payroll period {period} is locked.")
+    existing_payslips = Payslip.objects.filter(period=period)
+    if user_ids is not None:
+        existing_payslips = existing_payslips.filter(user_id__in=user_ids)
+    PayslipLine.objects.filter(payslip__in=existing_payslips).delete()
+    existing_payslips.delete()
+
+
+def save_payroll_results(period, results, replace_period=False):
+    # A run over the whole period replaces all of its payslips, so employees
+    # no longer paid in it (deactivated, compensation ended) lose theirs.
+    user_ids = results["user_ids"].tolist()
+    # Plain ints for the database driver.
+    columns = {
+        column: results[column].tolist()
+        for column in (
+            "department_ids",
+            "days_worked",
+            "late_minutes",
+            "undertime_minutes",
+            "overtime_minutes",
+            "gross_pay",
+            "taxable_income",
+            "total_contributions",
+            "withholding_tax",
+            "total_deductions",
+            "net_pay",
+        )
+    }
+    with transaction.atomic():
+        delete_payslips(period, None if replace_period else user_ids)
+
+        payslips = Payslip.objects.bulk_create(
+            [
+                Payslip(
+                    period=period,
+                    user_id=user_id,
+                    department_id=columns["department_ids"][row] or None,
+                    days_worked=columns["days_worked"][row],
+                    late_minutes=columns["late_minutes"][row],
+                    undertime_minutes=columns["undertime_minutes"][row],
+                    overtime_minutes=columns["overtime_minutes"][row],
+                    gross_pay=columns["gross_pay"][row],
+                    taxable_income=columns["taxable_income"][row],
+                    total_contributions=columns["total_contributions"][row],
+                    withholding_tax=columns["withholding_tax"][row],
+                    total_deductions=columns["total_deductions"][row],
+                    net_pay=columns["net_pay"][row],
+                    input_fingerprint=results["input_fingerprints"][row],
+                )
+                for row, user_id in enumerate(user_ids)
+            ],
+            batch_size=BULK_CREATE_BATCH_SIZE,
+        )
+        PayslipLine.objects.bulk_create(
+            [
+                PayslipLine(
+                    payslip=payslips[row],
+                    code=code,
+                    category=category,
+                    description=description,
+                    amount=amount,
+                    is_taxable=is_taxable,
+                )
+                for row, code, category, description, amount, is_taxable in results[
+                    "lines"
+                ]
+            ],
+            batch_size=BULK_CREATE_BATCH_SIZE,
+        )
+    return payslips
+
+
+def run_payroll(period, user_ids=None):
+    inputs = load_payroll_inputs(period, user_ids)
+    results = compute_payroll(inputs, get_statutory_tables(period))
+    payslips = save_payroll_results(period, results, replace_period=user_ids is None)
+    PayrollPeriod.objects.filter(id=period.id).update(
+        status=PayrollPeriod.Status.COMPUTED
+    )
+    return payslips
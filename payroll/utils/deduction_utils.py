@@ -0,0 +1,134 @@
+import calendar
+import datetime
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from payroll.models import DeductionInstallment, PayrollPeriod, RecurringDeduction
+
+
+def round_centavos(amount):
+    return int(amount.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def get_installment_due_dates(start_date, frequency, installment_count):
+    # Payroll periods end on the 15th and on the last day of the month, or
+    # only on the last day for monthly payrolls.
+    due_dates = []
+    year, month = start_date.year, start_date.month
+    while len(due_dates) < installment_count:
+        month_end = datetime.date(year, month, calendar.monthrange(year, month)[1])
+        if frequency == PayrollPeriod.Frequency.SEMI_MONTHLY:
+            period_ends = [datetime.date(year, month, 15), month_end]
+        else:
+            period_ends = [month_end]
+        due_dates.extend(
+            period_end for period_end in period_ends if period_end >= start_date
+        )
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return due_dates[:installment_count]
+
+
+def get_amortization_schedule(principal, annual_interest_rate, periods_per_year, count):
+    # Equal installments of principal plus interest on the remaining balance;
+    # the last installment takes the rounding difference. Centavos.
+    if count < 1:
+        raise ValueError("A deduction needs at least one installment.")
+    rate = Decimal(annual_interest_rate) / 100 / periods_per_year
+    balance = round_centavos(Decimal(principal) * 100)
+    if rate:
+        payment = round_centavos(balance * rate / (1 - (1 + rate) ** -count))
+    else:
+        payment = round_centavos(Decimal(balance) / count)
+
+    schedule = []
+    for sequence in range(1, count + 1):
+        interest_amount = round_centavos(balance * rate)
+        if sequence == count:
+            principal_amount = balance
+        else:
+            principal_amount = min(max(payment - interest_amount, 0), balance)
+        balance -= principal_amount
+        schedule.append(
+            (
+                sequence,
+                principal_amount + interest_amount,
+                principal_amount,
+                interest_amount,
+                balance,
+            )
+        )
+    return schedule
+
+
+def approve_recurring_deduction(deduction):
+    with transaction.atomic():
+        deduction = RecurringDeduction.objects.select_for_update().get(id=deduction.id)
+        if deduction.status != RecurringDeduction.Status.PENDING:
+            raise ValueError(f"{deduction} is not pending approval.")
+
+        periods_per_year = (
+            24 if deduction.frequency == PayrollPeriod.Frequency.SEMI_MONTHLY else 12
+        )
+        due_dates = get_installment_due_dates(
+            deduction.start_date, deduction.frequency, deduction.installment_count
+        )
+        schedule = get_amortization_schedule(
+            deduction.principal,
+            deduction.interest_rate,
+            periods_per_year,
+            deduction.installment_count,
+        )
+        DeductionInstallment.objects.bulk_create(
+            [
+                DeductionInstallment(
+                    deduction=deduction,
+                    sequence=sequence,
+                    due_date=due_date,
+                    amount=amount,
+                    principal_amount=principal_amount,
+                    interest_amount=interest_amount,
+                    remaining_balance=remaining_balance,
+                )
+                for due_date, (
+                    sequence,
+                    amount,
+                    principal_amount,
+                    interest_amount,
+                    remaining_balance,
+                ) in zip(due_dates, schedule)
+            ]
+        )
+        deduction.status = RecurringDeduction.Status.APPROVED
+        deduction.approved = timezone.now()
+        deduction.save(update_fields=["status", "approved", "updated"])
+    return deduction
+
+
+def cancel_recurring_deduction(deduction):
+    # The schedule is kept; runs stop deducting its remaining installments.
+    deduction.status = RecurringDeduction.Status.CANCELLED
+    deduction.save(update_fields=["status", "updated"])
+    return deduction
+
+
+def get_period_installments(period, user_ids=None):
+    # Served by the due date index: only the period's installments are read.
+    installments = DeductionInstallment.objects.filter(
+        due_date__range=(period.start_date, period.end_date),
+        deduction__status=RecurringDeduction.Status.APPROVED,
+    )
+    if user_ids is not None:
+        installments = installments.filter(deduction__user_id__in=list(user_ids))
+    return installments
+
+
+def get_installment_description(
+    kind, description, sequence, installment_count, remaining_balance
+):
+    label = description or RecurringDeduction.Kind(kind).label
+    return (
+        f"{label} {sequence}/{installment_count} (balance "
+        f"{remaining_balance // 100:,}.{remaining_balance % 100:02d})"
+    )
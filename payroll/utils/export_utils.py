@@ -0,0 +1,297 @@
+import tempfile
+import unicodedata
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Coalesce
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+
+from payroll.utils.snapshot_utils import (
+    get_payslip_report_queryset,
+    iter_payslip_report_rows,
+)
+
+# Rows fetched per round trip; on PostgreSQL the iterator reads them through a
+# server-side cursor, so a period of any size is never held in memory.
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_STREAM_BLOCK_SIZE = 64 * 1024
+
+REGISTER_AMOUNT_FORMAT = "#,##0.00"
+
+# (header, payslip line code, line category) of the register's line columns;
+# adjustments are split by direction.
+REGISTER_LINE_COLUMNS = [
+    ("Basic Pay", "BASIC", None),
+    ("Overtime Pay", "OVERTIME", None),
+    ("Allowance", "ALLOWANCE", None),
+    ("Absences", "ABSENCES", None),
+    ("Tardiness", "LATE", None),
+    ("Undertime", "UNDERTIME", None),
+    ("Other Earnings", "ADJUSTMENT", "EARNING"),
+    ("SSS", "SSS", None),
+    ("PhilHealth", "PHILHEALTH", None),
+    ("Pag-IBIG", "PAGIBIG", None),
+    ("Withholding Tax", "TAX", None),
+    ("Loans", "LOAN", None),
+    ("Other Deductions", "ADJUSTMENT", "DEDUCTION"),
+]
+REGISTER_TOTAL_COLUMNS = [
+    ("Gross Pay", "gross_pay"),
+    ("Total Deductions", "total_deductions"),
+    ("Net Pay", "net_pay"),
+]
+REGISTER_HEADERS = (
+    ["Employee No.", "Employee", "Department", "Days Worked"]
+    + [header for header, _, _ in REGISTER_LINE_COLUMNS]
+    + [header for header, _ in REGISTER_TOTAL_COLUMNS]
+)
+
+# Bank payroll credit file: 80-character records ending in CRLF.
+#   H  company code (10)  pay date YYYYMMDD (8)  funding account (16)
+#   D  account number (16)  amount in centavos (15)  employee no. (10)  name (38)
+#   T  detail count (6)  total centavos (15)  account hash total (15)
+# The account hash total is the sum of the numeric account numbers, modulo
+# 10^15, which lets the bank detect a changed account as well as an amount.
+BANK_RECORD_LENGTH = 80
+BANK_ACCOUNT_DIGITS = 16
+BANK_HASH_MODULUS = 10**15
+
+
+def get_register_line_annotations():
+    annotations = {}
+    for index, (_, code, category) in enumerate(REGISTER_LINE_COLUMNS):
+        line_filter = Q(lines__code=code)
+        if category:
+            line_filter &= Q(lines__category=category)
+        annotations[f"line_{index}"] = Coalesce(
+            Sum("lines__amount", filter=line_filter), 0
+        )
+    return annotations
+
+
+def get_register_line_amounts(lines):
+    return [
+        sum(
+            line_amount
+            for line_code, line_category, _, line_amount, _ in lines
+            if line_code == code and category in (None, line_category)
+        )
+        for _, code, category in REGISTER_LINE_COLUMNS
+    ]
+
+
+def iter_live_payroll_register_rows(period):
+    # One grouped query gives each payslip with its line amounts by column.
+    rows = (
+        get_payslip_report_queryset(period)
+        .values(
+            "id",
+            "days_worked",
+            "gross_pay",
+            "total_contributions",
+            "withholding_tax",
+            "total_deductions",
+            "net_pay",
+            first_name=F("user__first_name"),
+            last_name=F("user__last_name"),
+            employee_number=F("user__userdetails__employee_number"),
+            department_name=F("department__name"),
+        )
+        .annotate(**get_register_line_annotations())
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    for row in rows:
+        row["line_amounts"] = [
+            row.pop(f"line_{index}") for index in range(len(REGISTER_LINE_COLUMNS))
+        ]
+        yield row
+
+
+def iter_payroll_register_rows(period):
+    if not period.is_locked:
+        return iter_live_payroll_register_rows(period)
+    return (
+        {**payslip, "line_amounts": get_register_line_amounts(payslip["lines"])}
+        for payslip in iter_payslip_report_rows(period)
+    )
+
+
+def centavos_to_decimal(amount):
+    return Decimal(amount).scaleb(-2)
+
+
+def get_register_cell(worksheet, value, bold=False):
+    cell = WriteOnlyCell(worksheet, value=value)
+    if isinstance(value, Decimal):
+        cell.number_format = REGISTER_AMOUNT_FORMAT
+    if bold:
+        cell.font = Font(bold=True)
+    return cell
+
+
+def write_payroll_register(period, output):
+    # Write-only mode appends each row to a temporary sheet file as it comes
+    # off the cursor; the totals row is accumulated in the same pass.
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet("Payroll Register")
+    worksheet.append(
+        [get_register_cell(worksheet, header, bold=True) for header in REGISTER_HEADERS]
+    )
+
+    totals = [0] * (len(REGISTER_LINE_COLUMNS) + len(REGISTER_TOTAL_COLUMNS))
+    employee_count = 0
+    days_worked = 0
+    for row in iter_payroll_register_rows(period):
+        row["total_deductions"] += row["total_contributions"] + row["withholding_tax"]
+        amounts = row["line_amounts"] + [row[key] for _, key in REGISTER_TOTAL_COLUMNS]
+        for index, amount in enumerate(amounts):
+            totals[index] += amount
+        employee_count += 1
+        days_worked += row["days_worked"]
+        worksheet.append(
+            [
+                row["employee_number"] or "",
+                f"{row['last_name']}, {row['first_name']}".title(),
+                row["department_name"] or "",
+                row["days_worked"],
+            ]
+            + [
+                get_register_cell(worksheet, centavos_to_decimal(amount))
+                for amount in amounts
+            ]
+        )
+
+    worksheet.append(
+        [
+            get_register_cell(worksheet, "TOTAL", bold=True),
+            get_register_cell(worksheet, f"{employee_count} employees", bold=True),
+            None,
+            get_register_cell(worksheet, days_worked, bold=True),
+        ]
+        + [
+            get_register_cell(worksheet, centavos_to_decimal(amount), bold=True)
+            for amount in totals
+        ]
+    )
+    workbook.save(output)
+
+
+def iter_payroll_register_xlsx(period):
+    # An XLSX file is a ZIP archive whose directory is written last, so the
+    # workbook is built in a temporary file and streamed out once saved.
+    with tempfile.TemporaryFile() as output:
+        write_payroll_register(period, output)
+        output.seek(0)
+        while data := output.read(EXPORT_STREAM_BLOCK_SIZE):
+            yield data
+
+
+def to_bank_text(value):
+    # Bank files take plain uppercase ASCII, so accents are stripped.
+    text = unicodedata.normalize("NFKD", str(value or ""))
+    return text.encode("ascii", errors="ignore").decode().upper()
+
+
+def get_bank_field(value, width, numeric=False):
+    if numeric:
+        text = str(value)
+        if len(text) > width:
+            raise ValueError(f"{value} does not fit in {width} digits.")
+        return text.rjust(width, "0")
+    return to_bank_text(value)[:width].ljust(width)
+
+
+def get_bank_record(*fields):
+    return "".join(fields).ljust(BANK_RECORD_LENGTH) + "\r\n"
+
+
+def get_bank_account_digits(account_number):
+    return "".join(character for character in account_number if character.isdigit())
+
+
+def iter_bank_credit_rows(period):
+    # Employees without an account number on file are paid by other means
+    # and left out, so the trailer always matches the detail records.
+    if period.is_locked:
+        return (
+            (
+                payslip["bank_account_number"],
+                payslip["employee_number"],
+                payslip["first_name"],
+                payslip["last_name"],
+                payslip["net_pay"],
+            )
+            for payslip in iter_payslip_report_rows(period)
+            if payslip["net_pay"] > 0 and payslip["bank_account_number"]
+        )
+    return (
+        get_payslip_report_queryset(period)
+        .filter(net_pay__gt=0, user__userdetails__bank_account_number__gt="")
+        .values_list(
+            "user__userdetails__bank_account_number",
+            "user__userdetails__employee_number",
+            "user__first_name",
+            "user__last_name",
+            "net_pay",
+        )
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+
+def get_bank_credit_file_records(period):
+    # Built whole before anything is sent (82 bytes per employee), so a bad
+    # account fails the download instead of cutting the file short.
+    records = [
+        get_bank_record(
+            "H",
+            get_bank_field(settings.PAYROLL_BANK_COMPANY_CODE, 10),
+            (period.pay_date or period.end_date).strftime("%Y%m%d"),
+            get_bank_field(
+                get_bank_account_digits(settings.PAYROLL_BANK_ACCOUNT_NUMBER),
+                BANK_ACCOUNT_DIGITS,
+            ),
+        )
+    ]
+
+    total_amount = 0
+    account_hash_total = 0
+    for (
+        account_number,
+        employee_number,
+        first_name,
+        last_name,
+        net_pay,
+    ) in iter_bank_credit_rows(period):
+        account_digits = get_bank_account_digits(account_number)
+        # A cut or empty account would credit the wrong account or none.
+        if not 0 < len(account_digits) <= BANK_ACCOUNT_DIGITS:
+            raise ValueError(
+                f"Bank account number {account_number!r} of employee "
+                f"{employee_number} must have 1 to {BANK_ACCOUNT_DIGITS} digits."
+            )
+        total_amount += net_pay
+        account_hash_total = (
+            account_hash_total + int(account_digits)
+        ) % BANK_HASH_MODULUS
+        records.append(
+            get_bank_record(
+                "D",
+                get_bank_field(account_digits, BANK_ACCOUNT_DIGITS),
+                get_bank_field(net_pay, 15, numeric=True),
+                get_bank_field(employee_number, 10),
+                get_bank_field(f"{last_name}, {first_name}", 38),
+            )
+        )
+
+    records.append(
+        get_bank_record(
+            "T",
+            get_bank_field(len(records) - 1, 6, numeric=True),
+            get_bank_field(total_amount, 15, numeric=True),
+            get_bank_field(account_hash_total, 15, numeric=True),
+        )
+    )
+    return records
@@ -0,0 +1,309 @@
+import multiprocessing
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+
+import django
+from django.db import connections
+from django.utils.text import slugify
+
+from payroll.models import PayrollPeriod, PayslipLine
+from payroll.utils.snapshot_utils import (
+    get_payslip_report_queryset,
+    iter_live_payslip_report_rows,
+    iter_payslip_report_rows,
+)
+
+# Payslips rendered per worker task, and tasks kept in flight per worker; the
+# window bounds memory however large the period is.
+PAYSLIP_PDF_CHUNK_SIZE = 50
+PAYSLIP_PDF_TASKS_PER_WORKER = 2
+
+# Half-letter landscape page, in points.
+PAGE_WIDTH, PAGE_HEIGHT = 612, 396
+LEFT_MARGIN, RIGHT_MARGIN = 36, 576
+LINE_HEIGHT = 13
+# Earnings and deductions are listed down from LINES_TOP, clear of the
+# totals rule below LINES_BOTTOM.
+LINES_TOP, LINES_BOTTOM = 272, 92
+LINES_PER_COLUMN = (LINES_TOP - LINES_BOTTOM) // LINE_HEIGHT + 1
+
+ATTENDANCE_DEDUCTION_CODES = {"ABSENCES", "LATE", "UNDERTIME"}
+
+# Helvetica advance widths (1/1000 em) of the characters in amounts, for
+# right-aligning columns without font metrics files.
+AMOUNT_CHARACTER_WIDTHS = {",": 278, ".": 278, "-": 333}
+
+
+def escape_pdf_text(text):
+    return (
+        str(text)
+        .replace("\\", "\\\\")
+        .replace("(", "\\(")
+        .replace(")", "\\)")
+        .encode("cp1252", errors="replace")
+    )
+
+
+def format_centavos(amount):
+    sign = "-" if amount < 0 else ""
+    amount = abs(amount)
+    return f"{sign}{amount // 100:,}.{amount % 100:02d}"
+
+
+def draw_text(x, y, text, bold=False, size=9):
+    font = b"/F2" if bold else b"/F1"
+    return b"BT %s %d Tf %d %d Td (%s) Tj ET\n" % (
+        font,
+        size,
+        x,
+        y,
+        escape_pdf_text(text),
+    )
+
+
+def draw_amount(right_x, y, amount, bold=False, size=9):
+    text = format_centavos(amount)
+    width = sum(AMOUNT_CHARACTER_WIDTHS.get(character, 556) for character in text)
+    return draw_text(right_x - width * size // 1000, y, text, bold, size)
+
+
+def draw_rule(y):
+    return b"%d %d m %d %d l S\n" % (LEFT_MARGIN, y, RIGHT_MARGIN, y)
+
+
+def compile_payslip_layout():
+    # Everything that is the same on every payslip: the document objects
+    # before the page content, and the labels and rules of the page.
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+        b"/Resources << /Font << /F1 4 0 R /F2 5 0 R >> >> /Contents 6 0 R >>"
+        % (PAGE_WIDTH, PAGE_HEIGHT),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+        b"/Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold "
+        b"/Encoding /WinAnsiEncoding >>",
+    ]
+    header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(header))
+        header += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+
+    static_content = (
+        b"0.5 w\n"
+        + draw_text(LEFT_MARGIN, 360, "PAYSLIP", bold=True, size=14)
+        + draw_text(LEFT_MARGIN, 336, "Employee")
+        + draw_text(LEFT_MARGIN, 323, "Employee No.")
+        + draw_text(LEFT_MARGIN, 310, "Department")
+        + draw_text(330, 336, "Period")
+        + draw_text(330, 323, "Pay Date")
+        + draw_text(330, 310, "Days Worked")
+        + draw_rule(300)
+        + draw_text(LEFT_MARGIN, 286, "Earnings", bold=True)
+        + draw_text(330, 286, "Deductions", bold=True)
+        + draw_rule(80)
+        + draw_text(LEFT_MARGIN, 64, "Gross Pay", bold=True)
+        + draw_text(330, 64, "Total Deductions", bold=True)
+        + draw_text(330, 44, "Net Pay", bold=True, size=11)
+    )
+    return header, offsets, static_content
+
+
+PAYSLIP_LAYOUT = compile_payslip_layout()
+
+
+def render_payslip_pdf(payslip):
+    header, offsets, static_content = PAYSLIP_LAYOUT
+    content = [
+        static_content,
+        draw_text(120, 336, payslip["employee_name"]),
+        draw_text(120, 323, payslip["employee_number"]),
+        draw_text(120, 310, payslip["department"]),
+        draw_text(400, 336, payslip["period"]),
+        draw_text(400, 323, payslip["pay_date"]),
+        draw_text(400, 310, payslip["days_worked"]),
+    ]
+    columns = {"EARNING": (LEFT_MARGIN, 300), "DEDUCTION": (330, RIGHT_MARGIN)}
+    column_lines = {"EARNING": [], "DEDUCTION": []}
+    for description, column, amount in payslip["lines"]:
+        column_lines[column].append((description, amount))
+    for column, lines in column_lines.items():
+        if len(lines) > LINES_PER_COLUMN:
+            # Lines that do not fit are summed on the last row, so the column
+            # still adds up to its total.
+            other_lines = lines[LINES_PER_COLUMN - 1 :]
+            lines = lines[: LINES_PER_COLUMN - 1] + [
+                (
+                    f"{len(other_lines)} other items",
+                    sum(amount for _, amount in other_lines),
+                )
+            ]
+        left_x, right_x = columns[column]
+        for row, (description, amount) in enumerate(lines):
+            y = LINES_TOP - row * LINE_HEIGHT
+            content.append(draw_text(left_x + 8, y, description))
+            content.append(draw_amount(right_x, y, amount))
+    content.extend(
+        [
+            draw_amount(300, 64, payslip["gross_pay"], bold=True),
+            draw_amount(RIGHT_MARGIN, 64, payslip["total_deductions"], bold=True),
+            draw_amount(RIGHT_MARGIN, 44, payslip["net_pay"], bold=True, size=11),
+        ]
+    )
+    stream = zlib.compress(b"".join(content))
+
+    document = header + (
+        b"6 0 obj\n<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream\nendobj\n"
+        % (len(stream), stream)
+    )
+    xref_offset = len(document)
+    xref = b"xref\n0 7\n0000000000 65535 f \n" + b"".join(
+        b"%010d 00000 n \n" % offset for offset in offsets + [len(header)]
+    )
+    return (
+        document
+        + xref
+        + (
+            b"trailer\n<< /Size 7 /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % xref_offset
+        )
+    )
+
+
+def get_payslip_line_entry(line):
+    code, category, description, amount, _ = line
+    # Gross pay is already net of attendance deductions, so they are listed
+    # as negative earnings to keep each column adding up to its total.
+    if code in ATTENDANCE_DEDUCTION_CODES:
+        return description, "EARNING", -amount
+    if category == PayslipLine.Category.EARNING:
+        return description, "EARNING", amount
+    return description, "DEDUCTION", amount
+
+
+def get_payslip_pdf_data(period, payslip):
+    full_name = f"{payslip['first_name']} {payslip['last_name']}".strip()
+    return {
+        # The user ID keeps names unique within the archive.
+        "filename": f"{slugify(full_name) or payslip['username']}-"
+        f"{payslip['user_id']}.pdf",
+        "employee_name": full_name.title(),
+        "employee_number": payslip["employee_number"] or "",
+        "department": payslip["department_name"] or "",
+        "period": f"{period.start_date:%b %d, %Y} - {period.end_date:%b %d, %Y}",
+        "pay_date": f"{period.pay_date:%b %d, %Y}" if period.pay_date else "",
+        "days_worked": payslip["days_worked"],
+        "lines": [get_payslip_line_entry(line) for line in payslip["lines"]],
+        "gross_pay": payslip["gross_pay"],
+        "total_deductions": payslip["total_contributions"]
+        + payslip["withholding_tax"]
+        + payslip["total_deductions"],
+        "net_pay": payslip["net_pay"],
+    }
+
+
+def render_payslip_data_chunk(payslips):
+    return [(payslip["filename"], render_payslip_pdf(payslip)) for payslip in payslips]
+
+
+def render_payslip_pdf_chunk(period_id, payslip_ids):
+    period = PayrollPeriod.objects.get(id=period_id)
+    return render_payslip_data_chunk(
+        [
+            get_payslip_pdf_data(period, payslip)
+            for payslip in iter_live_payslip_report_rows(period, payslip_ids)
+        ]
+    )
+
+
+def iter_chunks(items):
+    items = iter(items)
+    while chunk := list(islice(items, PAYSLIP_PDF_CHUNK_SIZE)):
+        yield chunk
+
+
+def iter_payslip_pdf_tasks(period):
+    # A locked period's payslips come from its snapshot, read once here and
+    # chunked as the tasks are taken; otherwise each task loads its own chunk
+    # of payslips, since that costs more than drawing them.
+    if period.is_locked:
+        for payslips in iter_chunks(
+            get_payslip_pdf_data(period, payslip)
+            for payslip in iter_payslip_report_rows(period)
+        ):
+            yield render_payslip_data_chunk, (payslips,)
+        return
+    payslip_ids = list(get_payslip_report_queryset(period).values_list("id", flat=True))
+    for chunk in iter_chunks(payslip_ids):
+        yield render_payslip_pdf_chunk, (period.id, chunk)
+
+
+def render_payslip_pdfs(period, worker_count=1):
+    tasks = iter_payslip_pdf_tasks(period)
+    first_tasks = list(islice(tasks, 2))
+    tasks = chain(first_tasks, tasks)
+    if worker_count <= 1 or len(first_tasks) <= 1:
+        for function, arguments in tasks:
+            yield from function(*arguments)
+        return
+
+    # Spawned like payroll run workers, each with its own connection; results
+    # are yielded in archive order while at most a few chunks per worker are
+    # held in memory.
+    connections.close_all()
+    executor = ProcessPoolExecutor(
+        max_workers=worker_count,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=django.setup,
+    )
+    try:
+        pending = deque()
+        for function, arguments in tasks:
+            pending.append(executor.submit(function, *arguments))
+            if len(pending) >= worker_count * PAYSLIP_PDF_TASKS_PER_WORKER:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+class ZipStreamBuffer:
+    # Write-only file object for ZipFile that hands written bytes back to a
+    # generator instead of keeping the archive.
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def iter_payslip_zip(period, worker_count=1):
+    # Entries are stored, not deflated: the PDF content streams are already
+    # compressed. Each payslip is yielded as soon as it is written.
+    buffer = ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+        for filename, pdf in render_payslip_pdfs(period, worker_count):
+            archive.writestr(filename, pdf)
+            yield buffer.pop()
+    yield buffer.pop()
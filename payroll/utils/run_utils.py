@@ -0,0 +1,167 @@
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+from payroll.models import PayrollPeriod, PayrollRun, PayrollRunShard, Payslip
+from payroll.utils.computation_utils import (
+    compute_payroll,
+    delete_payslips,
+    get_payroll_compensations,
+    load_payroll_inputs,
+    save_payroll_results,
+)
+from payroll.utils.statutory_utils import get_statutory_tables
+from payroll.utils.worker_utils import setup_payroll_worker
+
+
+def get_department_user_ids(period):
+    department_user_ids = defaultdict(list)
+    for department_id, user_id in (
+        get_payroll_compensations(period)
+        .order_by("user_id")
+        .values_list("user__userdetails__department_id", "user_id")
+    ):
+        department_user_ids[department_id].append(user_id)
+    return department_user_ids
+
+
+def get_resumable_payroll_run(period):
+    return (
+        PayrollRun.objects.filter(period=period)
+        .exclude(status=PayrollRun.Status.COMPLETED)
+        .order_by("-id")
+        .first()
+    )
+
+
+def start_payroll_run(period, worker_count=1, restart=False):
+    with transaction.atomic():
+        # Locking the period row serializes starts, so two runs of the same
+        # period never overlap.
+        period = PayrollPeriod.objects.select_for_update().get(id=period.id)
+        if period.is_locked:
+            raise ValueError(f"Payroll period {period} is locked.")
+        running_runs = period.runs.filter(status=PayrollRun.Status.RUNNING)
+        if restart:
+            # A run left running by a killed process would block every start;
+            # failing it also stops it saving shards if it is still alive.
+            running_runs.update(status=PayrollRun.Status.FAILED)
+        elif running_runs.exists():
+            raise ValueError(f"Payroll period {period} already has a run in progress.")
+        run = PayrollRun.objects.create(period=period, worker_count=worker_count)
+        PayrollRunShard.objects.bulk_create(
+            [
+                PayrollRunShard(run=run, department_id=department_id, user_ids=user_ids)
+                for department_id, user_ids in get_department_user_ids(period).items()
+            ]
+        )
+    return run
+
+
+def compute_payroll_shard(period_id, shard_id, user_ids):
+    # Runs in a worker process; only reads, the parent saves the results.
+    period = PayrollPeriod.objects.get(id=period_id)
+    inputs = load_payroll_inputs(period, user_ids)
+    return shard_id, compute_payroll(inputs, get_statutory_tables(period))
+
+
+def lock_running_payroll_run(run_id):
+    # Held until the caller's transaction ends, so a restart cannot fail the
+    # run between the check and the save.
+    run = PayrollRun.objects.select_for_update().get(id=run_id)
+    if run.status != PayrollRun.Status.RUNNING:
+        raise ValueError(f"Payroll run {run.id} is no longer running.")
+    return run
+
+
+def save_payroll_shard(shard, results):
+    with transaction.atomic():
+        lock_running_payroll_run(shard.run_id)
+        save_payroll_results(shard.run.period, results)
+        shard.payslip_count = len(results["user_ids"])
+        shard.completed = timezone.now()
+        shard.save(update_fields=["payslip_count", "completed"])
+
+
+def delete_unpaid_payslips(run):
+    # Shards only replace their own employees' payslips; once all are saved,
+    # payslips of employees in no shard (deactivated, compensation ended)
+    # are removed.
+    paid_user_ids = {
+        user_id
+        for user_ids in run.shards.values_list("user_ids", flat=True)
+        for user_id in user_ids
+    }
+    unpaid_user_ids = set(
+        Payslip.objects.filter(period_id=run.period_id).values_list(
+            "user_id", flat=True
+        )
+    ).difference(paid_user_ids)
+    if unpaid_user_ids:
+        delete_payslips(run.period, sorted(unpaid_user_ids))
+
+
+def execute_payroll_run(run, worker_count=1):
+    # Biggest shards first, so the pool is not left waiting on one at the end.
+    pending_shards = sorted(
+        run.shards.filter(completed__isnull=True).select_related("run__period"),
+        key=lambda shard: len(shard.user_ids),
+        reverse=True,
+    )
+    with transaction.atomic():
+        run = PayrollRun.objects.select_for_update().get(id=run.id)
+        if run.status == PayrollRun.Status.COMPLETED:
+            raise ValueError(f"Payroll run {run.id} is already completed.")
+        run.status = PayrollRun.Status.RUNNING
+        run.worker_count = worker_count
+        run.save(update_fields=["status", "worker_count"])
+    try:
+        if worker_count > 1 and len(pending_shards) > 1:
+            compute_shards_in_process_pool(run, pending_shards, worker_count)
+        else:
+            for shard in pending_shards:
+                _, results = compute_payroll_shard(
+                    run.period_id, shard.id, shard.user_ids
+                )
+                save_payroll_shard(shard, results)
+    except BaseException:
+        PayrollRun.objects.filter(id=run.id).update(status=PayrollRun.Status.FAILED)
+        raise
+
+    with transaction.atomic():
+        lock_running_payroll_run(run.id)
+        delete_unpaid_payslips(run)
+        PayrollRun.objects.filter(id=run.id).update(
+            status=PayrollRun.Status.COMPLETED, completed=timezone.now()
+        )
+        PayrollPeriod.objects.filter(id=run.period_id).update(
+            status=PayrollPeriod.Status.COMPUTED
+        )
+    run.refresh_from_db()
+    return run
+
+
+def compute_shards_in_process_pool(run, shards, worker_count):
+    shards_by_id = {shard.id: shard for shard in shards}
+    database_name = connections["default"].settings_dict["NAME"]
+    # Workers are spawned rather than forked so no open database connection
+    # is shared with them; each sets Django up and opens its own.
+    connections.close_all()
+    with ProcessPoolExecutor(
+        max_workers=min(worker_count, len(shards)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=setup_payroll_worker,
+        initargs=(database_name,),
+    ) as executor:
+        futures = [
+            executor.submit(
+                compute_payroll_shard, run.period_id, shard.id, shard.user_ids
+            )
+            for shard in shards
+        ]
+        for future in as_completed(futures):
+            shard_id, results = future.result()
+            save_payroll_shard(shards_by_id[shard_id], results)
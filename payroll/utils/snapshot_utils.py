@@ -0,0 +1,221 @@
+import hashlib
+import json
+import zlib
+from collections import Counter
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Prefetch
+
+from payroll.models import (
+    PayrollPeriod,
+    PayrollRun,
+    PayrollSnapshot,
+    Payslip,
+    PayslipLine,
+)
+from payroll.utils.computation_utils import (
+    compute_payroll,
+    get_changed_payslip_user_ids,
+    load_payroll_inputs,
+)
+from payroll.utils.statutory_utils import get_statutory_tables
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_CHUNK_SIZE = 500
+
+PAYSLIP_AMOUNT_COLUMNS = (
+    "gross_pay",
+    "taxable_income",
+    "total_contributions",
+    "withholding_tax",
+    "total_deductions",
+    "net_pay",
+)
+
+
+def get_payslip_report_queryset(period, payslip_ids=None):
+    # The order every report lists payslips in.
+    payslips = Payslip.objects.filter(period=period).order_by(
+        "department__name", "user__last_name", "user__first_name", "id"
+    )
+    if payslip_ids is not None:
+        payslips = payslips.filter(id__in=payslip_ids)
+    return payslips
+
+
+def get_payslip_report_row(payslip):
+    # Everything a report shows of a payslip, flattened so that it reads the
+    # same whether it comes from the live tables or from a snapshot.
+    user = payslip.user
+    user_details = getattr(user, "userdetails", None)
+    return {
+        "id": payslip.id,
+        "user_id": user.id,
+        "username": user.username,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "employee_number": user_details.employee_number if user_details else None,
+        "bank_account_number": (
+            user_details.bank_account_number if user_details else None
+        ),
+        "department_name": payslip.department.name if payslip.department else None,
+        "days_worked": payslip.days_worked,
+        "late_minutes": payslip.late_minutes,
+        "undertime_minutes": payslip.undertime_minutes,
+        "overtime_minutes": payslip.overtime_minutes,
+        **{column: getattr(payslip, column) for column in PAYSLIP_AMOUNT_COLUMNS},
+        "input_fingerprint": payslip.input_fingerprint,
+        "lines": [
+            [line.code, line.category, line.description, line.amount, line.is_taxable]
+            for line in payslip.lines.all()
+        ],
+    }
+
+
+def iter_live_payslip_report_rows(period, payslip_ids=None):
+    payslips = (
+        get_payslip_report_queryset(period, payslip_ids)
+        .select_related("user__userdetails", "department")
+        .prefetch_related(Prefetch("lines", PayslipLine.objects.order_by("id")))
+    )
+    for payslip in payslips.iterator(chunk_size=SNAPSHOT_CHUNK_SIZE):
+        yield get_payslip_report_row(payslip)
+
+
+def encode_snapshot_value(value):
+    # Arrays keep their dtype so the engine gets back exactly what it read.
+    if isinstance(value, np.ndarray):
+        return {"dtype": value.dtype.str, "values": value.tolist()}
+    if isinstance(value, dict):
+        return {key: encode_snapshot_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [encode_snapshot_value(item) for item in value]
+    return value
+
+
+def decode_snapshot_value(value):
+    if isinstance(value, dict):
+        if value.keys() == {"dtype", "values"}:
+            return np.array(value["values"], dtype=value["dtype"])
+        return {key: decode_snapshot_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [decode_snapshot_value(item) for item in value]
+    return value
+
+
+def get_payroll_snapshot_data(period):
+    return {
+        "version": SNAPSHOT_VERSION,
+        "period": {
+            "id": period.id,
+            "start_date": period.start_date.isoformat(),
+            "end_date": period.end_date.isoformat(),
+            "pay_date": period.pay_date.isoformat() if period.pay_date else None,
+            "frequency": period.frequency,
+        },
+        "tables": encode_snapshot_value(get_statutory_tables(period)),
+        "inputs": encode_snapshot_value(load_payroll_inputs(period)),
+        "payslips": list(iter_live_payslip_report_rows(period)),
+    }
+
+
+def encode_payroll_snapshot(data):
+    # Canonical JSON, so equal contents always hash the same.
+    content = json.dumps(data, sort_keys=True, separators=(",", ":")).encode()
+    return zlib.compress(content, 9), hashlib.sha256(content).hexdigest()
+
+
+def decode_payroll_snapshot(snapshot):
+    content = zlib.decompress(bytes(snapshot.data))
+    if hashlib.sha256(content).hexdigest() != snapshot.content_hash:
+        raise ValueError(f"Payroll snapshot {snapshot.id} does not match its hash.")
+    return json.loads(content)
+
+
+def lock_payroll_period(period):
+    with transaction.atomic():
+        # Payslip saves lock the same row, so none can land mid-snapshot.
+        period = PayrollPeriod.objects.select_for_update().get(id=period.id)
+        if period.status != PayrollPeriod.Status.COMPUTED:
+            raise ValueError(
+                f"Payroll period {period} must be computed before it is locked."
+            )
+        changed_user_ids, removed_user_ids = get_changed_payslip_user_ids(period)
+        if changed_user_ids or removed_user_ids:
+            raise ValueError(
+                f"{len(changed_user_ids) + len(removed_user_ids)} payslips of "
+                f"{period} are out of date; recompute the period first."
+            )
+
+        data = get_payroll_snapshot_data(period)
+        compressed_data, content_hash = encode_payroll_snapshot(data)
+        snapshot = PayrollSnapshot.objects.create(
+            period=period,
+            run=period.runs.filter(status=PayrollRun.Status.COMPLETED)
+            .order_by("-id")
+            .first(),
+            data=compressed_data,
+            content_hash=content_hash,
+            payslip_count=len(data["payslips"]),
+        )
+        PayrollPeriod.objects.filter(id=period.id).update(
+            status=PayrollPeriod.Status.LOCKED
+        )
+    return snapshot
+
+
+def unlock_payroll_period(period):
+    # Snapshots are kept: they record what each approval was based on.
+    return PayrollPeriod.objects.filter(
+        id=period.id, status=PayrollPeriod.Status.LOCKED
+    ).update(status=PayrollPeriod.Status.COMPUTED)
+
+
+def get_period_snapshot(period):
+    return period.snapshots.order_by("-id").first()
+
+
+def iter_payslip_report_rows(period, payslip_ids=None):
+    # Locked periods are reported as approved, whatever changed since.
+    if not period.is_locked:
+        return iter_live_payslip_report_rows(period, payslip_ids)
+    snapshot = get_period_snapshot(period)
+    if snapshot is None:
+        raise ValueError(f"Payroll period {period} is locked but has no snapshot.")
+    payslips = decode_payroll_snapshot(snapshot)["payslips"]
+    if payslip_ids is not None:
+        payslip_ids = set(payslip_ids)
+        payslips = [payslip for payslip in payslips if payslip["id"] in payslip_ids]
+    return iter(payslips)
+
+
+def verify_payroll_snapshot(snapshot):
+    # Recomputes the payslips from the snapshot's own inputs and tables, with
+    # no live table read, and returns the employees whose payslip differs.
+    data = decode_payroll_snapshot(snapshot)
+    inputs = decode_snapshot_value(data["inputs"])
+    results = compute_payroll(inputs, decode_snapshot_value(data["tables"]))
+
+    computed_payslips = {}
+    for row, user_id in enumerate(results["user_ids"].tolist()):
+        computed_payslips[user_id] = {
+            column: int(results[column][row]) for column in PAYSLIP_AMOUNT_COLUMNS
+        }
+        computed_payslips[user_id]["lines"] = Counter()
+    for row, code, category, description, amount, is_taxable in results["lines"]:
+        user_id = int(results["user_ids"][row])
+        computed_payslips[user_id]["lines"][
+            (str(code), str(category), description, amount, is_taxable)
+        ] += 1
+
+    mismatched_user_ids = set(computed_payslips)
+    for payslip in data["payslips"]:
+        computed_payslip = computed_payslips.get(payslip["user_id"])
+        saved_payslip = {column: payslip[column] for column in PAYSLIP_AMOUNT_COLUMNS}
+        saved_payslip["lines"] = Counter(tuple(line) for line in payslip["lines"])
+        if computed_payslip == saved_payslip:
+            mismatched_user_ids.discard(payslip["user_id"])
+        else:
+            mismatched_user_ids.add(payslip["user_id"])
+    return sorted(mismatched_user_ids)
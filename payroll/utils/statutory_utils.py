@@ -0,0 +1,103 @@
+import hashlib
+from bisect import bisect_right
+from functools import lru_cache
+
+import numpy as np
+from django.apps import apps
+
+from core.utils import get_reference_data
+
+# Bracket tables compile to rows of (lower bound, base amount, rate in basis
+# points), amounts in centavos: a value in [lower bound, next lower bound)
+# owes the base amount plus the rate applied to the excess over the lower bound.
+
+
+def divide_round(numerator, denominator):
+    # Integer division rounding half up, for non-negative centavo arrays.
+    return (2 * numerator + denominator) // (2 * denominator)
+
+
+def load_statutory_tables():
+    statutory_bracket_model = apps.get_model("payroll", "StatutoryBracket")
+    brackets = statutory_bracket_model.objects.order_by(
+        "table__kind", "table__effective_date", "lower_bound"
+    ).values_list(
+        "table__kind", "table__effective_date", "lower_bound", "base_amount", "rate"
+    )
+
+    # kind -> (sorted effective dates, bracket rows of each date)
+    statutory_tables = {}
+    for kind, effective_date, lower_bound, base_amount, rate in brackets:
+        effective_dates, tables = statutory_tables.setdefault(kind, ([], []))
+        if not effective_dates or effective_dates[-1] != effective_date:
+            effective_dates.append(effective_date)
+            tables.append(())
+        tables[-1] += (
+            (int(lower_bound * 100), int(base_amount * 100), int(rate * 100)),
+        )
+    return statutory_tables
+
+
+@lru_cache(maxsize=64)
+def compile_bracket_table(brackets):
+    compiled_table = tuple(
+        np.array(column, dtype=np.int64) for column in zip(*sorted(brackets))
+    )
+    for column in compiled_table:
+        column.flags.writeable = False
+    return compiled_table
+
+
+def get_statutory_brackets(kind, as_of):
+    effective_dates, tables = get_reference_data(
+        "statutory_tables", load_statutory_tables
+    ).get(kind, ((), ()))
+    index = bisect_right(effective_dates, as_of) - 1
+    if index < 0:
+        raise ValueError(f"No {kind} statutory table is effective on {as_of}.")
+    return tables[index]
+
+
+def get_statutory_table(kind, as_of):
+    # Compiled arrays are cached per table, so they are shared by every run
+    # on or after the same effective date.
+    return compile_bracket_table(get_statutory_brackets(kind, as_of))
+
+
+def evaluate_bracket_table(table, values):
+    lower_bounds, base_amounts, rates = table
+    values = np.maximum(np.asarray(values, dtype=np.int64), 0)
+    brackets = np.maximum(np.searchsorted(lower_bounds, values, side="right") - 1, 0)
+    excess = values - lower_bounds[brackets]
+    return base_amounts[brackets] + divide_round(excess * rates[brackets], 10000)
+
+
+def get_statutory_table_kinds(period):
+    statutory_table_model = apps.get_model("payroll", "StatutoryTable")
+    return {
+        "sss": statutory_table_model.Kind.SSS,
+        "philhealth": statutory_table_model.Kind.PHILHEALTH,
+        "pagibig": statutory_table_model.Kind.PAGIBIG,
+        "withholding_tax": (
+            statutory_table_model.Kind.SEMI_MONTHLY_WITHHOLDING_TAX
+            if period.frequency == period.Frequency.SEMI_MONTHLY
+            else statutory_table_model.Kind.MONTHLY_WITHHOLDING_TAX
+        ),
+    }
+
+
+def get_statutory_tables(period):
+    as_of = period.pay_date or period.end_date
+    return {
+        name: get_statutory_table(kind, as_of)
+        for name, kind in get_statutory_table_kinds(period).items()
+    }
+
+
+def get_statutory_tables_fingerprint(period):
+    as_of = period.pay_date or period.end_date
+    brackets = [
+        (kind, get_statutory_brackets(kind, as_of))
+        for kind in get_statutory_table_kinds(period).values()
+    ]
+    return hashlib.sha256(repr(brackets).encode()).hexdigest()
@@ -0,0 +1,11 @@
+import django
+from django.db import connections
+
+# Kept apart from the modules that import models: a spawned worker imports
+# its initializer before Django is set up.
+
+
+def setup_payroll_worker(database_name):
+    django.setup()
+    # The parent's database, which under test is not the one in settings.
+    connections["default"].settings_dict["NAME"] = database_name
@@ -0,0 +1,199 @@
+import datetime
+from itertools import chain
+
+import numpy as np
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+from payroll.models import PayrollPeriod, PayslipLine, StatutoryTable
+from payroll.utils.snapshot_utils import iter_payslip_report_rows
+from payroll.utils.statutory_utils import (
+    divide_round,
+    evaluate_bracket_table,
+    get_statutory_table,
+)
+
+# 13th-month pay and other benefits are tax-exempt up to 90,000 a year
+# (TRAIN); centavos.
+THIRTEENTH_MONTH_PAY_EXEMPTION = 9000000
+
+TIME_DEDUCTION_CODES = (
+    PayslipLine.Code.ABSENCES,
+    PayslipLine.Code.LATE,
+    PayslipLine.Code.UNDERTIME,
+)
+
+# Columns of the per-employee aggregation, in order after the employee fields:
+# (line codes, line categories, taxable lines only); None matches any.
+YEAR_END_AGGREGATES = {
+    "basic_pay": ([PayslipLine.Code.BASIC], None, False),
+    "time_deductions": (TIME_DEDUCTION_CODES, None, False),
+    # Taxable lines count toward taxable income the way the payroll engine
+    # counts them: earnings add to it, deductions and contributions subtract.
+    "taxable_earnings": (None, [PayslipLine.Category.EARNING], True),
+    "taxable_deductions": (
+        None,
+        [PayslipLine.Category.DEDUCTION, PayslipLine.Category.CONTRIBUTION],
+        True,
+    ),
+    "withholding_tax": ([PayslipLine.Code.WITHHOLDING_TAX], None, False),
+}
+
+
+def get_year_payroll_periods(year):
+    # A payslip belongs to the year it is paid in.
+    return PayrollPeriod.objects.filter(
+        Q(pay_date__year=year) | Q(pay_date__isnull=True, end_date__year=year)
+    )
+
+
+def get_year_payslip_lines(year):
+    return PayslipLine.objects.filter(
+        payslip__period__in=get_year_payroll_periods(year)
+    )
+
+
+def get_aggregate_line_filter(codes, categories, taxable_only):
+    line_filter = Q()
+    if codes is not None:
+        line_filter &= Q(code__in=codes)
+    if categories is not None:
+        line_filter &= Q(category__in=categories)
+    if taxable_only:
+        line_filter &= Q(is_taxable=True)
+    return line_filter
+
+
+def is_aggregate_line(line, codes, categories, taxable_only):
+    code, category, _, _, is_taxable = line
+    return (
+        (codes is None or code in codes)
+        and (categories is None or category in categories)
+        and (is_taxable or not taxable_only)
+    )
+
+
+def iter_live_year_end_rows(year, user_ids=None):
+    # Unlocked periods: one grouped query over their lines gives every
+    # employee's totals.
+    lines = get_year_payslip_lines(year).exclude(
+        payslip__period__status=PayrollPeriod.Status.LOCKED
+    )
+    if user_ids is not None:
+        lines = lines.filter(payslip__user_id__in=list(user_ids))
+    return (
+        lines.values(
+            "payslip__user_id",
+            "payslip__user__first_name",
+            "payslip__user__last_name",
+            "payslip__user__userdetails__employee_number",
+        )
+        .annotate(
+            payslip_count=Count("payslip", distinct=True),
+            **{
+                column: Coalesce(
+                    Sum("amount", filter=get_aggregate_line_filter(*aggregate)), 0
+                )
+                for column, aggregate in YEAR_END_AGGREGATES.items()
+            },
+        )
+        .order_by()
+        .values_list(
+            "payslip__user_id",
+            "payslip__user__first_name",
+            "payslip__user__last_name",
+            "payslip__user__userdetails__employee_number",
+            "payslip_count",
+            *YEAR_END_AGGREGATES,
+        )
+    )
+
+
+def iter_locked_year_end_rows(year, user_ids=None):
+    # Locked periods count as approved, from their snapshots, like every
+    # other report of them.
+    if user_ids is not None:
+        user_ids = set(user_ids)
+    for period in get_year_payroll_periods(year).filter(
+        status=PayrollPeriod.Status.LOCKED
+    ):
+        for payslip in iter_payslip_report_rows(period):
+            if user_ids is not None and payslip["user_id"] not in user_ids:
+                continue
+            yield (
+                payslip["user_id"],
+                payslip["first_name"],
+                payslip["last_name"],
+                payslip["employee_number"],
+                1,
+                *(
+                    sum(
+                        line[3]
+                        for line in payslip["lines"]
+                        if is_aggregate_line(line, *aggregate)
+                    )
+                    for aggregate in YEAR_END_AGGREGATES.values()
+                ),
+            )
+
+
+def load_year_end_inputs(year, user_ids=None):
+    totals = {}
+    for user_id, first_name, last_name, employee_number, *amounts in chain(
+        iter_live_year_end_rows(year, user_ids),
+        iter_locked_year_end_rows(year, user_ids),
+    ):
+        if user_id in totals:
+            # Live names win over the ones recorded in snapshots.
+            first_name, last_name, employee_number, total_amounts = totals[user_id]
+            amounts = [total + amount for total, amount in zip(total_amounts, amounts)]
+        totals[user_id] = (first_name, last_name, employee_number, amounts)
+    rows = [(user_id, *totals[user_id]) for user_id in sorted(totals)]
+
+    inputs = {
+        "year": year,
+        "user_ids": np.array([row[0] for row in rows], dtype=np.int64),
+        "employees": [(row[3] or "", f"{row[2]}, {row[1]}".title()) for row in rows],
+        "payslip_counts": np.array([row[4][0] for row in rows], dtype=np.int64),
+    }
+    for index, column in enumerate(YEAR_END_AGGREGATES, start=1):
+        inputs[column] = np.array([row[4][index] for row in rows], dtype=np.int64)
+    return inputs
+
+
+def get_annual_income_tax_table(year):
+    return get_statutory_table(
+        StatutoryTable.Kind.ANNUAL_INCOME_TAX, datetime.date(year, 12, 31)
+    )
+
+
+def compute_year_end(inputs, annual_income_tax_table):
+    results = {"user_ids": inputs["user_ids"]}
+
+    # 13th-month pay is a twelfth of the basic pay actually earned in the
+    # year, so absences and time deductions reduce it.
+    results["earned_basic_pay"] = np.maximum(
+        inputs["basic_pay"] - inputs["time_deductions"], 0
+    )
+    results["thirteenth_month_pay"] = divide_round(results["earned_basic_pay"], 12)
+    results["taxable_thirteenth_month_pay"] = np.maximum(
+        results["thirteenth_month_pay"] - THIRTEENTH_MONTH_PAY_EXEMPTION, 0
+    )
+
+    results["taxable_income"] = (
+        np.maximum(inputs["taxable_earnings"] - inputs["taxable_deductions"], 0)
+        + results["taxable_thirteenth_month_pay"]
+    )
+    results["annual_tax"] = evaluate_bracket_table(
+        annual_income_tax_table, results["taxable_income"]
+    )
+    results["withholding_tax"] = inputs["withholding_tax"]
+    # Positive: still to be withheld, usually on the last payroll of the year;
+    # negative: over-withheld and refunded.
+    results["tax_balance"] = results["annual_tax"] - results["withholding_tax"]
+    return results
+
+
+def run_year_end(year, user_ids=None):
+    inputs = load_year_end_inputs(year, user_ids)
+    return inputs, compute_year_end(inputs, get_annual_income_tax_table(year))
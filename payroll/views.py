@@ -1,3 +1,63 @@
-from django.shortcuts import render
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+
+from payroll.models import PayrollPeriod
+from payroll.utils.export_utils import (
+    get_bank_credit_file_records,
+    iter_payroll_register_xlsx,
+)
+from payroll.utils.payslip_pdf_utils import iter_payslip_zip
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def get_period_download_response(streaming_content, content_type, filename):
+    response = StreamingHttpResponse(streaming_content, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
 
 # Create your views here.
+@login_required(login_url="/login")
+def download_payslips(request, period_id):
+    if not request.user.is_staff:
+        return HttpResponse(status=403)
+
+    period = get_object_or_404(PayrollPeriod, id=period_id)
+    # Rendered in this process: a request should not spawn a worker pool.
+    return get_period_download_response(
+        iter_payslip_zip(period),
+        "application/zip",
+        f"payslips-{period.start_date}-{period.end_date}.zip",
+    )
+
+
+@login_required(login_url="/login")
+def download_payroll_register(request, period_id):
+    if not request.user.is_staff:
+        return HttpResponse(status=403)
+
+    period = get_object_or_404(PayrollPeriod, id=period_id)
+    return get_period_download_response(
+        iter_payroll_register_xlsx(period),
+        XLSX_CONTENT_TYPE,
+        f"payroll-register-{period.start_date}-{period.end_date}.xlsx",
+    )
+
+
+@login_required(login_url="/login")
+def download_bank_credit_file(request, period_id):
+    if not request.user.is_staff:
+        return HttpResponse(status=403)
+
+    period = get_object_or_404(PayrollPeriod, id=period_id)
+    try:
+        records = get_bank_credit_file_records(period)
+    except ValueError as error:
+        return HttpResponse(str(error), status=400, content_type="text/plain")
+    return get_period_download_response(
+        records,
+        "text/plain; charset=us-ascii",
+        f"payroll-credit-{period.pay_date or period.end_date}.txt",
+    )